@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA  02110-1301, USA.
+
+
+"""
+Example of logging using the binary log format of the ZMQ server (cfzmq).
+The data of the log configuration is published in batches of packed samples
+instead of one JSON message per sample, which is decoded here using NumPy.
+
+Start the server with bin/cfzmq before running the example.
+"""
+
+import struct
+
+import numpy as np
+
+try:
+    import zmq
+except ImportError as e:
+    raise Exception("ZMQ library probably not installed ({})".format(e))
+
+SRV_ADDR = "tcp://127.0.0.1"
+CF_URI = "radio://0/80/2M"
+
+FRAME_HEADER = struct.Struct('<4sBBHH')
+
+context = zmq.Context()
+client_conn = context.socket(zmq.REQ)
+client_conn.connect("{}:2000".format(SRV_ADDR))
+
+log_conn = context.socket(zmq.SUB)
+log_conn.connect("{}:2001".format(SRV_ADDR))
+log_conn.setsockopt_string(zmq.SUBSCRIBE, u"")
+
+client_conn.send_json({"version": 1, "cmd": "connect", "uri": CF_URI})
+resp = client_conn.recv_json()
+if resp["status"] != 0:
+    raise Exception("Could not connect: {}".format(resp["msg"]))
+
+client_conn.send_json({
+    "version": 1,
+    "cmd": "log",
+    "action": "create",
+    "name": "Stabilizer",
+    "period": 10,
+    "format": "binary",
+    "batch": 20,
+    "batch_ms": 100,
+    "variables": [
+        "stabilizer.roll",
+        "stabilizer.pitch",
+        "stabilizer.yaw",
+    ]
+})
+resp = client_conn.recv_json()
+if resp["status"] != 0:
+    raise Exception("Could not create log config: {}".format(resp["msg"]))
+
+schema = resp["schema"]
+sample_dtype = np.dtype(list(zip(["timestamp"] + schema["variables"],
+                                 schema["dtypes"])))
+
+client_conn.send_json({"version": 1, "cmd": "log", "action": "start",
+                       "name": "Stabilizer"})
+client_conn.recv_json()
+
+samples = 0
+while samples < 1000:
+    # The last frame is the message, servers started with --topics send a
+    # topic frame first
+    msg = log_conn.recv_multipart()[-1]
+    if msg[:4] != b'CFLB':
+        # JSON events for the log configurations
+        continue
+    _, _, _, stream, count = FRAME_HEADER.unpack_from(msg)
+    if stream != schema["stream"]:
+        continue
+    data = np.frombuffer(msg, dtype=sample_dtype, count=count,
+                         offset=FRAME_HEADER.size)
+    samples += count
+    print("{} samples, last at {} ms: roll {:.2f} pitch {:.2f} yaw {:.2f}"
+          .format(count, data["timestamp"][-1],
+                  data["stabilizer.roll"][-1], data["stabilizer.pitch"][-1],
+                  data["stabilizer.yaw"][-1]))
+
+client_conn.send_json({"version": 1, "cmd": "disconnect"})
+client_conn.recv_json()
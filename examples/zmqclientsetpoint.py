@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA  02110-1301, USA.
+
+
+"""
+Sends binary setpoints to the ZMQ server (cfzmq) and prints the setpoint
+statistics published by the server, including the latency from the moment
+the setpoint was sent until it was passed on to the Crazyflie. The latency is
+measured with the clock of the computer, so the client and the server have to
+run on the same computer (or have synchronized clocks).
+
+The thrust of the setpoints is 0, so the motors will not start. Connect to
+the Crazyflie (for instance with zmqsrvtest.py) before running the example.
+Start the server with --ctrl-rate to forward the setpoints at a fixed rate.
+"""
+
+import argparse
+import json
+import struct
+import time
+
+try:
+    import zmq
+except ImportError as e:
+    raise Exception("ZMQ library probably not installed ({})".format(e))
+
+SRV_ADDR = "tcp://127.0.0.1"
+
+# Magic, version, length of the target, roll, pitch, yaw, thrust and the time
+# the setpoint was sent, followed by the target
+SETPOINT = struct.Struct('<2sBBfffHd')
+
+
+def pack_setpoint(roll, pitch, yaw, thrust, target=None):
+    target = target.encode() if target else b''
+    return SETPOINT.pack(b'SP', 1, len(target), roll, pitch, yaw, thrust,
+                         time.time()) + target
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rate", type=float, default=100,
+                    help="Setpoints sent per second")
+parser.add_argument("--duration", type=float, default=10,
+                    help="Time to send setpoints (s)")
+parser.add_argument("--target", default=None,
+                    help="Alias or URI of the Crazyflie for servers started"
+                         " with --multi")
+args = parser.parse_args()
+
+context = zmq.Context()
+ctrl_conn = context.socket(zmq.PUSH)
+ctrl_conn.connect("{}:2004".format(SRV_ADDR))
+
+conn_conn = context.socket(zmq.SUB)
+conn_conn.connect("{}:2003".format(SRV_ADDR))
+conn_conn.setsockopt_string(zmq.SUBSCRIBE, u"")
+
+period = 1.0 / args.rate
+end = time.monotonic() + args.duration
+next_send = time.monotonic()
+while time.monotonic() < end:
+    ctrl_conn.send(pack_setpoint(0.0, 0.0, 0.0, 0, args.target))
+    next_send += period
+
+    while conn_conn.poll(max(0.0, next_send - time.monotonic()) * 1000):
+        event = json.loads(conn_conn.recv_multipart()[-1])
+        if event["event"] in ("ctrl", "watchdog"):
+            print(event)
@@ -38,10 +38,12 @@ else:
 config_path = AppDirs("cfclient", "Bitcraze").user_config_dir
 
 if not hasattr(sys, 'frozen'):
-    import pkg_resources
+    # importlib.metadata is used instead of pkg_resources, importing
+    # pkg_resources scans all installed packages and slows down startup
+    from importlib import metadata
     try:
-        VERSION = pkg_resources.require("cfclient")[0].version
-    except pkg_resources.DistributionNotFound:
+        VERSION = metadata.version("cfclient")
+    except metadata.PackageNotFoundError:
         VERSION = "dev"
 else:
     try:
@@ -80,6 +80,15 @@ def main():
                         const=True, nargs="?",
                         help="Check python imports and exit successfully" +
                         " (intended for CI)")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Start the client in a child process, report "
+                             "the import time of all modules and the time "
+                             "until the main window is shown, then exit")
+    parser.add_argument('--startup-budget', type=float, default=None,
+                        metavar='SECONDS',
+                        help="Used with --profile-startup, exit with an "
+                             "error if the main window was not shown within "
+                             "SECONDS (intended for CI)")
     args = parser.parse_args()
     debug = args.debug
 
@@ -108,6 +117,14 @@ def main():
     logger.debug("Using config path {}".format(cfclient.config_path))
     logger.debug("sys.path={}".format(sys.path))
 
+    if args.profile_startup or args.startup_budget is not None:
+        from cfclient.utils import startup_profiler
+        child_args = []
+        if args.debug != 'info':
+            child_args = ['--debug'] + args.debug
+        sys.exit(startup_profiler.profile_startup(
+            child_args, budget=args.startup_budget))
+
     # Try all the imports used in the project here to control what happens....
     try:
         import usb  # noqa
@@ -188,6 +205,17 @@ def main():
     app.setFont(UiUtils.FONT)
     main_window.show()
     main_window.set_default_theme()
+
+    from cfclient.utils import startup_profiler
+    if startup_profiler.is_profiling():
+        # Runs once the event loop has processed the show event
+        from PyQt6.QtCore import QTimer
+
+        def window_shown():
+            startup_profiler.notify_window_shown()
+            app.closeAllWindows()
+        QTimer.singleShot(0, window_shown)
+
     sys.exit(app.exec())
 
 
@@ -33,7 +33,9 @@ import sys
 
 import cfclient.utils
 import cflib.crtp
+from cfclient.utils.connection_profiler import ConnectionProfiler
 from cfclient.utils.input import JoystickReader
+from cfclient.utils import sim_link
 from cflib.crazyflie import Crazyflie
 
 if os.name == 'posix':
@@ -53,6 +55,7 @@ class HeadlessClient():
     def __init__(self):
         """Initialize the headless client and libraries"""
         cflib.crtp.init_drivers()
+        sim_link.init_driver()
 
         self._jr = JoystickReader(do_device_discovery=False)
 
@@ -87,6 +90,18 @@ class HeadlessClient():
         for map in os.listdir(cfclient.config_path + '/input'):
             print(" - " + map.split(".json")[0])
 
+    def profile_connection(self, path):
+        """Write a timeline of the connection phases to path as JSON"""
+        self._profiler = ConnectionProfiler(self._cf)
+        self._profiler.finished.add_callback(
+            lambda profiler: self._connection_profiled(profiler, path))
+
+    def _connection_profiled(self, profiler, path):
+        """Callback when the connection timeline is finished"""
+        print("Connection set up in {:.3f} s, timeline written to {}".format(
+            profiler.timeline()["total"], path))
+        profiler.dump(path)
+
     def connect_crazyflie(self, link_uri):
         """Connect to a Crazyflie on the given link uri"""
         self._cf.connection_failed.add_callback(self._connection_failed)
@@ -140,6 +155,11 @@ def main():
     parser.add_argument("--controllers", action="store_true",
                         dest="list_controllers",
                         help="Only display available controllers and exit")
+    parser.add_argument("--profile-connection", action="store",
+                        dest="profile_connection", type=str, default=None,
+                        metavar="FILE",
+                        help="Write a timeline of the connection phases to"
+                             " FILE as JSON")
     (args, unused) = parser.parse_known_args()
 
     if args.debug:
@@ -155,6 +175,8 @@ def main():
         if headless.controller_connected():
             headless.setup_controller(input_config=args.input,
                                       input_device=args.controller)
+            if args.profile_connection:
+                headless.profile_connection(args.profile_connection)
             headless.connect_crazyflie(link_uri=args.uri)
         else:
             print("No input-device connected, exiting!")
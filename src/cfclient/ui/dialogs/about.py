@@ -30,11 +30,11 @@ The about dialog.
 import sys
 
 import cfclient
+from cfclient.utils.uicache import load_ui_type
 import cflib.crtp
 from PyQt6.QtCore import QT_VERSION_STR
 from PyQt6.QtCore import PYQT_VERSION_STR
 from PyQt6 import QtWidgets
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 from cflib.crazyflie.mem import MemoryElement
 
@@ -42,8 +42,8 @@ __author__ = 'Bitcraze AB'
 __all__ = ['AboutDialog']
 
 (about_widget_class,
- about_widget_base_class) = (uic.loadUiType(cfclient.module_path +
-                                            '/ui/dialogs/about.ui'))
+ about_widget_base_class) = (load_ui_type(cfclient.module_path +
+                                          '/ui/dialogs/about.ui'))
 
 DEBUG_INFO_FORMAT = """
 <b>Cfclient</b><br>
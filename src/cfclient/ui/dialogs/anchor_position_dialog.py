@@ -29,12 +29,11 @@ import logging
 
 import cfclient
 from cfclient.utils.logconfigreader import FILE_REGEX_YAML
+from cfclient.utils.uicache import load_ui_type
 from PyQt6 import QtWidgets
-from PyQt6 import uic
 from PyQt6.QtCore import QAbstractTableModel, QVariant, Qt
 from PyQt6.QtGui import QBrush, QColor
 from PyQt6.QtWidgets import QInputDialog, QFileDialog
-import yaml
 import os
 
 __author__ = 'Bitcraze AB'
@@ -43,7 +42,7 @@ __all__ = ['AnchorPositionDialog']
 logger = logging.getLogger(__name__)
 
 (anchor_postiong_widget_class, connect_widget_base_class) = (
-    uic.loadUiType(
+    load_ui_type(
         cfclient.module_path + '/ui/dialogs/anchor_position_dialog.ui')
 )
 
@@ -220,6 +219,8 @@ class AnchorPositionDialog(QtWidgets.QWidget, anchor_postiong_widget_class):
 
         self._helper.current_folder = os.path.dirname(names[0])
 
+        # yaml is only needed for loading and saving, do not import it at startup
+        import yaml
         f = open(names[0], 'r')
         with f:
             data = yaml.safe_load(f)
@@ -247,6 +248,7 @@ class AnchorPositionDialog(QtWidgets.QWidget, anchor_postiong_widget_class):
         else:
             filename = names[0]
 
+        import yaml
         f = open(filename, 'w')
         with f:
             yaml.dump(data, f)
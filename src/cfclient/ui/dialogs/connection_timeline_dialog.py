@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+"""
+Dialog showing the timeline of the last connection to a Crazyflie.
+"""
+import logging
+
+import cfclient
+from cfclient.utils.uicache import load_ui_type
+
+from PyQt6 import QtWidgets
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtCore import QTimer
+
+__author__ = 'Bitcraze AB'
+__all__ = ['ConnectionTimelineDialog']
+
+logger = logging.getLogger(__name__)
+
+(timeline_dialog_class, connect_widget_base_class) = (
+    load_ui_type(
+        cfclient.module_path + '/ui/dialogs/connection_timeline_dialog.ui')
+)
+
+
+class ConnectionTimelineDialog(QtWidgets.QWidget, timeline_dialog_class):
+    """Shows a waterfall of the connection phases and log blocks"""
+
+    _finished_signal = pyqtSignal(object)
+
+    # Refresh rate while the connection is still being set up
+    REFRESH_PERIOD_MS = 200
+
+    def __init__(self, helper, *args):
+        super(ConnectionTimelineDialog, self).__init__(*args)
+        self.setupUi(self)
+
+        self._profiler = helper.connection_profiler
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(self.REFRESH_PERIOD_MS)
+        self._refresh_timer.timeout.connect(self._refresh)
+
+        self._finished_signal.connect(lambda profiler: self._refresh())
+        self._profiler.finished.add_callback(self._finished_signal.emit)
+
+        self._save_button.clicked.connect(self._save)
+        self._close_button.clicked.connect(self.close)
+
+    def showEvent(self, event):
+        self._refresh_timer.start()
+        self._refresh()
+
+    def hideEvent(self, event):
+        self._refresh_timer.stop()
+
+    def _refresh(self):
+        timeline = self._profiler.timeline()
+        if timeline['uri'] is None:
+            return
+
+        if timeline['finished']:
+            state = 'logging after {:.0f} ms'.format(timeline['total'] * 1000)
+        else:
+            state = 'in progress'
+        self._status_label.setText(
+            'Connection to {}: {}'.format(timeline['uri'], state))
+        self._timeline.set_timeline(timeline)
+
+    def _save(self):
+        names = QtWidgets.QFileDialog.getSaveFileName(
+            self, 'Save connection timeline', cfclient.config_path,
+            'JSON files (*.json)')
+
+        if names[0] == '':
+            return
+
+        try:
+            self._profiler.dump(names[0])
+        except IOError as e:
+            logger.warning('Failed to save connection timeline: %s', e)
@@ -28,8 +28,8 @@ Dialog box used to configure base station geometry. Used from the lighthouse tab
 import logging
 
 import cfclient
+from cfclient.utils.uicache import load_ui_type
 from PyQt6 import QtWidgets
-from PyQt6 import uic
 from PyQt6.QtCore import QVariant, Qt, QAbstractTableModel, pyqtSignal
 from cflib.localization import LighthouseBsGeoEstimator
 from cflib.localization import LighthouseSweepAngleAverageReader
@@ -42,7 +42,7 @@ __all__ = ['LighthouseBsGeometryDialog']
 logger = logging.getLogger(__name__)
 
 (basestation_geometry_widget_class, connect_widget_base_class) = (
-    uic.loadUiType(
+    load_ui_type(
         cfclient.module_path + '/ui/dialogs/lighthouse_bs_geometry_dialog.ui')
 )
 
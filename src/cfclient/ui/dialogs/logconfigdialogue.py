@@ -35,8 +35,9 @@ import logging
 import struct
 
 import cfclient
+from cfclient.utils.uicache import load_ui_type
 from cfclient.utils.ui import UiUtils
-from PyQt6 import QtWidgets, uic
+from PyQt6 import QtWidgets
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QShortcut, QKeySequence
 
@@ -48,7 +49,7 @@ __all__ = ['LogConfigDialogue']
 logger = logging.getLogger(__name__)
 
 (logconfig_widget_class, connect_widget_base_class) = (
-    uic.loadUiType(cfclient.module_path + '/ui/dialogs/logconfigdialogue.ui'))
+    load_ui_type(cfclient.module_path + '/ui/dialogs/logconfigdialogue.ui'))
 
 NAME_FIELD = 0
 ID_FIELD = 1
@@ -32,6 +32,7 @@ import usb
 
 import cfclient
 from cfclient.ui.pose_logger import PoseLogger
+from cfclient.ui.tab_toolbox import LazyTabToolbox
 from cfclient.ui.tab_toolbox import TabToolbox
 import cfclient.ui.tabs
 import cflib.crtp
@@ -40,16 +41,18 @@ from cfclient.ui.dialogs.bootloader import BootloaderDialog
 from cfclient.ui.connectivity_manager import ConnectivityManager
 from cfclient.utils.config import Config
 from cfclient.utils.config_manager import ConfigManager
+from cfclient.utils.connection_profiler import ConnectionProfiler
 from cfclient.utils.input import JoystickReader
 from cfclient.utils.logconfigreader import LogConfigReader
+from cfclient.utils.log_broker import LogBroker
+from cfclient.utils.param_writer import ParamWriter
 from cfclient.utils.ui import UiUtils
+from cfclient.utils.uicache import load_ui_type
 from cfclient.utils.zmq_led_driver import ZMQLEDDriver
 from cfclient.utils.zmq_param import ZMQParamAccess
 from cflib.crazyflie import Crazyflie
-from cflib.crazyflie.log import LogConfig
 from cflib.crazyflie.mem import MemoryElement
 from PyQt6 import QtWidgets
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtCore import pyqtSlot
 from PyQt6.QtCore import QDir
@@ -64,8 +67,10 @@ from PyQt6.QtGui import QPalette
 from PyQt6.QtWidgets import QLabel
 from PyQt6.QtWidgets import QMenu
 from PyQt6.QtWidgets import QMessageBox
+from lis import lis_backend
 
 from .dialogs.cf2config import Cf2ConfigDialog
+from .dialogs.connection_timeline_dialog import ConnectionTimelineDialog
 from .dialogs.inputconfigdialogue import InputConfigDialogue
 from .dialogs.logconfigdialogue import LogConfigDialogue
 
@@ -76,8 +81,8 @@ __all__ = ['MainUI']
 logger = logging.getLogger(__name__)
 
 (main_window_class,
- main_windows_base_class) = (uic.loadUiType(cfclient.module_path +
-                                            '/ui/main.ui'))
+ main_windows_base_class) = (load_ui_type(cfclient.module_path +
+                                          '/ui/main.ui'))
 
 
 class UIState:
@@ -119,6 +124,16 @@ class MainUI(QtWidgets.QMainWindow, main_window_class):
                             rw_cache=cfclient.config_path + "/cache")
 
         cflib.crtp.init_drivers()
+        if Config().get("enable_sim_driver"):
+            # Lists a simulated Crazyflie (sim://0) among the interfaces, and
+            # one running the LIS application (lissim://0). They are only
+            # imported when enabled, to keep them out of the startup
+            from cfclient.utils import sim_link
+            from lis import Emulator as lis_emulator
+            sim_link.init_driver()
+            lis_emulator.init_driver()
+
+        self._connection_profiler = ConnectionProfiler(self.cf)
 
         zmq_params = ZMQParamAccess(self.cf)
         zmq_params.start()
@@ -234,6 +249,13 @@ class MainUI(QtWidgets.QMainWindow, main_window_class):
         # Parse the log configuration files
         self.logConfigReader = LogConfigReader(self.cf)
 
+        # Log blocks shared between the tabs
+        self._log_broker = LogBroker(self.cf)
+        self._battery_subscription = None
+
+        # Parameter writes from widgets that change values continuously
+        self._param_writer = ParamWriter(self.cf)
+
         self._current_input_config = None
         self._active_config = None
         self._active_config = None
@@ -244,10 +266,17 @@ class MainUI(QtWidgets.QMainWindow, main_window_class):
         cfclient.ui.pluginhelper.cf = self.cf
         cfclient.ui.pluginhelper.inputDeviceReader = self.joystickReader
         cfclient.ui.pluginhelper.logConfigReader = self.logConfigReader
-        cfclient.ui.pluginhelper.pose_logger = PoseLogger(self.cf)
+        cfclient.ui.pluginhelper.log_broker = self._log_broker
+        cfclient.ui.pluginhelper.param_writer = self._param_writer
+        cfclient.ui.pluginhelper.pose_logger = PoseLogger(self.cf, self._log_broker)
         cfclient.ui.pluginhelper.connectivity_manager = self._connectivity_manager
+        cfclient.ui.pluginhelper.connection_profiler = self._connection_profiler
         cfclient.ui.pluginhelper.mainUI = self
 
+        # The LIS tabs share one backend and are created when first shown,
+        # so it follows the Crazyflie from the start whichever tab is open
+        lis_backend.attach_cf(self.cf, self._log_broker)
+
         self.logConfigDialogue = LogConfigDialogue(cfclient.ui.pluginhelper)
         self._bootloader_dialog = BootloaderDialog(cfclient.ui.pluginhelper)
         self._cf2config_dialog = Cf2ConfigDialog(cfclient.ui.pluginhelper)
@@ -255,6 +284,13 @@ class MainUI(QtWidgets.QMainWindow, main_window_class):
         self._about_dialog = AboutDialog(cfclient.ui.pluginhelper)
         self.menuItemAbout.triggered.connect(self._about_dialog.show)
         self._menu_cf2_config.triggered.connect(self._cf2config_dialog.show)
+        self._connection_timeline_dialog = ConnectionTimelineDialog(
+            cfclient.ui.pluginhelper)
+        self._menu_connection_timeline = QAction("Connection timeline",
+                                                 self.menuConnect)
+        self._menu_connection_timeline.triggered.connect(
+            self._connection_timeline_dialog.show)
+        self.menuConnect.addAction(self._menu_connection_timeline)
 
         self._connectivity_manager.set_address(self.address.value())
 
@@ -324,7 +360,12 @@ class MainUI(QtWidgets.QMainWindow, main_window_class):
         loaded_tab_toolboxes = {}
 
         for tab_class in cfclient.ui.tabs.available:
-            tab_toolbox = tab_class(cfclient.ui.pluginhelper)
+            # Tabs are created the first time they are shown, until then a
+            # light weight placeholder is used in the menus
+            if tab_class.lazy_load and tab_class.tab_toolbox_name is not None:
+                tab_toolbox = LazyTabToolbox(cfclient.ui.pluginhelper, tab_class)
+            else:
+                tab_toolbox = tab_class(cfclient.ui.pluginhelper)
             loaded_tab_toolboxes[tab_toolbox.get_tab_toolbox_name()] = tab_toolbox
 
             # Set reference for plot-tab.
@@ -604,22 +645,19 @@ class MainUI(QtWidgets.QMainWindow, main_window_class):
             self.sitl_enabled = True
         
         if not self.sitl_enabled:
-            lg = LogConfig("Battery", 1000)
-            lg.add_variable("pm.vbat", "float")
-            lg.add_variable("pm.state", "int8_t")
-            try:
-                self.cf.log.add_config(lg)
-                lg.data_received_cb.add_callback(self.batteryUpdatedSignal.emit)
-                lg.error_cb.add_callback(self._log_error_signal.emit)
-                lg.start()
-            except KeyError as e:
-                logger.warning(str(e))
+            self._battery_subscription = self._log_broker.subscribe(
+                "Battery", [("pm.vbat", "float"), ("pm.state", "int8_t")], 1000,
+                self.batteryUpdatedSignal.emit, self._log_error_signal.emit)
 
         mems = self.cf.mem.get_mems(MemoryElement.TYPE_DRIVER_LED)
         if len(mems) > 0:
             mems[0].write_data(self._led_write_done)
 
     def _disconnected(self):
+        if self._battery_subscription is not None:
+            self._log_broker.unsubscribe(self._battery_subscription)
+            self._battery_subscription = None
+
         self.uiState = UIState.DISCONNECTED
         self._update_ui_state()
 
@@ -43,6 +43,9 @@ class PluginHelper():
         self.logConfigReader = None
         self.mainUI = None
         self.plotTab = None
+        self.log_broker = None
+        self.param_writer = None
         self.pose_logger = None
         self.connectivity_manager = None
+        self.connection_profiler = None
         self.current_folder = os.path.expanduser('~')
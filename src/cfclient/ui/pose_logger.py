@@ -32,9 +32,10 @@ import logging
 import math
 
 from cflib.crazyflie import Crazyflie
-from cflib.crazyflie.log import LogConfig
 from cflib.utils.callbacks import Caller
 
+from cfclient.utils.log_broker import LogBroker
+
 __author__ = 'Bitcraze AB'
 __all__ = ['PoseLogger']
 
@@ -50,11 +51,16 @@ class PoseLogger:
     LOG_NAME_ESTIMATE_YAW = 'stateEstimate.yaw'
     NO_POSE = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
 
-    def __init__(self, cf: Crazyflie) -> None:
+    PERIOD_MS = 40
+
+    def __init__(self, cf: Crazyflie, log_broker: LogBroker = None) -> None:
         self._cf = cf
-        self._cf.connected.add_callback(self._connected)
         self._cf.disconnected.add_callback(self._disconnected)
 
+        if log_broker is None:
+            log_broker = LogBroker(cf)
+        self._log_broker = log_broker
+
         self.data_received_cb = Caller()
         self.error_cb = Caller()
 
@@ -63,6 +69,13 @@ class PoseLogger:
         # roll, pitch and yaw in degrees
         self.pose = self.NO_POSE
 
+        variables = [self.LOG_NAME_ESTIMATE_X, self.LOG_NAME_ESTIMATE_Y,
+                     self.LOG_NAME_ESTIMATE_Z, self.LOG_NAME_ESTIMATE_ROLL,
+                     self.LOG_NAME_ESTIMATE_PITCH, self.LOG_NAME_ESTIMATE_YAW]
+        self._subscription = self._log_broker.subscribe(
+            "Pose", [(name, "float") for name in variables], self.PERIOD_MS,
+            self._data_received, self._error)
+
     @property
     def position(self):
         """Get the position part of the full pose"""
@@ -78,25 +91,6 @@ class PoseLogger:
         """Get the roll, pitch and yaw of the full pose in radians"""
         return [math.radians(self.pose[3]), math.radians(self.pose[4]), math.radians(self.pose[5])]
 
-    def _connected(self, link_uri) -> None:
-        logConf = LogConfig("Pose", 40)
-        logConf.add_variable(self.LOG_NAME_ESTIMATE_X, "float")
-        logConf.add_variable(self.LOG_NAME_ESTIMATE_Y, "float")
-        logConf.add_variable(self.LOG_NAME_ESTIMATE_Z, "float")
-        logConf.add_variable(self.LOG_NAME_ESTIMATE_ROLL, "float")
-        logConf.add_variable(self.LOG_NAME_ESTIMATE_PITCH, "float")
-        logConf.add_variable(self.LOG_NAME_ESTIMATE_YAW, "float")
-
-        try:
-            self._cf.log.add_config(logConf)
-            logConf.data_received_cb.add_callback(self._data_received)
-            logConf.error_cb.add_callback(self._error)
-            logConf.start()
-        except KeyError as e:
-            logger.warning(str(e))
-        except AttributeError as e:
-            logger.warning(str(e))
-
     def _disconnected(self, link_uri) -> None:
         self.pose = self.NO_POSE
 
@@ -35,11 +35,12 @@ from PyQt6 import QtWidgets
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QCloseEvent
+from cflib.utils.callbacks import Caller
 
 from cfclient.utils.config import Config
 
 __author__ = 'Bitcraze AB'
-__all__ = ['TabToolbox']
+__all__ = ['TabToolbox', 'LazyTabToolbox']
 
 logger = logging.getLogger(__name__)
 
@@ -56,13 +57,22 @@ class TabToolbox(QtWidgets.QWidget):
     DS_TAB = 1
     DS_TOOLBOX = 2
 
-    def __init__(self, helper, tab_toolbox_name):
+    # The name that will be shown in the tab or toolbox, set by sub classes
+    tab_toolbox_name = None
+
+    # Set to False for tabs that must be created at startup, for instance
+    # because they have to follow everything that happens from the start of
+    # a connection. Other tabs are created the first time they are shown.
+    lazy_load = True
+
+    def __init__(self, helper, tab_toolbox_name=None):
         super(TabToolbox, self).__init__()
         self._helper = helper
-        self.tab_toolbox_name = tab_toolbox_name
+        if tab_toolbox_name is not None:
+            self.tab_toolbox_name = tab_toolbox_name
 
         # Dock widget for toolbox behavior
-        self.dock_widget = self.ClosingDockWidget(tab_toolbox_name)
+        self.dock_widget = self.ClosingDockWidget(self.tab_toolbox_name)
         self.dock_widget.tab_toolbox = self
 
         self._display_state = self.DS_HIDDEN
@@ -206,3 +216,64 @@ class TabToolbox(QtWidgets.QWidget):
         def closeEvent(self, event: QCloseEvent) -> None:
             super(TabToolbox.ClosingDockWidget, self).closeEvent(event)
             self.closed.emit()
+
+
+class LazyTabToolbox(TabToolbox):
+    """
+    Placeholder for a tab or toolbox that is shown in the menus but where the
+    real tab or toolbox is not created until the first time it is shown.
+    Hidden tabs will thus not build any widgets or register any callbacks.
+    """
+
+    def __init__(self, helper, tab_toolbox_class):
+        super(LazyTabToolbox, self).__init__(
+            helper, tab_toolbox_class.tab_toolbox_name)
+        self.tab_toolbox_class = tab_toolbox_class
+        self.tab_toolbox = None
+
+        # Called with the real tab or toolbox when it has been created
+        self.tab_toolbox_created = Caller()
+
+        self._layout = QtWidgets.QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+
+    def set_display_state(self, new_display_state):
+        if new_display_state != self.DS_HIDDEN and self.tab_toolbox is None:
+            self._create_tab_toolbox()
+
+        super(LazyTabToolbox, self).set_display_state(new_display_state)
+
+        if self.tab_toolbox is not None:
+            # Used by the tab itself to check if it is visible
+            self.tab_toolbox._display_state = new_display_state
+
+    def enable(self):
+        if self.tab_toolbox is not None:
+            self.tab_toolbox.enable()
+
+    def disable(self):
+        if self.tab_toolbox is not None:
+            self.tab_toolbox.disable()
+
+    def _create_tab_toolbox(self):
+        logger.info('Creating {}'.format(self.tab_toolbox_name))
+        cf = self._helper.cf
+
+        connected_cbs = list(cf.connected.callbacks)
+        fully_connected_cbs = list(cf.fully_connected.callbacks)
+
+        self.tab_toolbox = self.tab_toolbox_class(self._helper)
+        self._layout.addWidget(self.tab_toolbox)
+
+        # If we are already connected the new tab has missed the connection
+        # callbacks, call the ones it registered so it can catch up
+        if cf.is_connected():
+            for cb in cf.connected.callbacks:
+                if cb not in connected_cbs:
+                    cb(cf.link_uri)
+            if cf.param.is_updated:
+                for cb in cf.fully_connected.callbacks:
+                    if cb not in fully_connected_cbs:
+                        cb(cf.link_uri)
+
+        self.tab_toolbox_created.call(self.tab_toolbox)
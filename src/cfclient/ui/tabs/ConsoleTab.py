@@ -31,31 +31,33 @@ The console tab is used as a console for printouts from the Crazyflie.
 
 import logging
 
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtGui import QTextCursor
 
 import cfclient
 from cfclient.ui.tab_toolbox import TabToolbox
+from cfclient.utils.uicache import load_ui_type
 
 __author__ = 'Bitcraze AB'
 __all__ = ['ConsoleTab']
 
 logger = logging.getLogger(__name__)
 
-console_tab_class = uic.loadUiType(cfclient.module_path +
-                                   "/ui/tabs/consoleTab.ui")[0]
+console_tab_class = load_ui_type(cfclient.module_path +
+                                 "/ui/tabs/consoleTab.ui")[0]
 
 
 class ConsoleTab(TabToolbox, console_tab_class):
     """Console tab for showing printouts from Crazyflie"""
+    tab_toolbox_name = 'Console'
+
     _link_established_signal = pyqtSignal(str)
     _connected_signal = pyqtSignal(str)
     _disconnected_signal = pyqtSignal(str)
     _update = pyqtSignal(str)
 
     def __init__(self, helper):
-        super(ConsoleTab, self).__init__(helper, 'Console')
+        super(ConsoleTab, self).__init__(helper)
         self.setupUi(self)
 
         # Always wrap callbacks from Crazyflie API though QT Signal/Slots
@@ -32,28 +32,30 @@ from time import time
 from binascii import hexlify
 
 from PyQt6 import QtWidgets
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtCore import pyqtSlot
 from PyQt6.QtCore import Qt
 
 import cfclient
 from cfclient.ui.tab_toolbox import TabToolbox
+from cfclient.utils.uicache import load_ui_type
 
 __author__ = 'Bitcraze AB'
 __all__ = ['CrtpSharkToolbox']
 
-param_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/crtpSharkToolbox.ui")[0]
+param_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/crtpSharkToolbox.ui")[0]
 
 
 class CrtpSharkToolbox(TabToolbox, param_tab_class):
     """Show packets that is sent vie the communication link"""
+    tab_toolbox_name = 'Crtp sniffer'
+
     nameModified = pyqtSignal()
     _incoming_packet_signal = pyqtSignal(object)
     _outgoing_packet_signal = pyqtSignal(object)
 
     def __init__(self, helper):
-        super(CrtpSharkToolbox, self).__init__(helper, 'Crtp sniffer')
+        super(CrtpSharkToolbox, self).__init__(helper)
         self.setupUi(self)
 
         # Init the tree widget
@@ -34,24 +34,26 @@ connects the connected/disconnected callbacks.
 
 import logging
 
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
 
 import cfclient
 from cfclient.ui.tab_toolbox import TabToolbox
+from cfclient.utils.uicache import load_ui_type
 
 __author__ = 'Bitcraze AB'
 __all__ = ['ExampleTab']
 
 logger = logging.getLogger(__name__)
 
-example_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/exampleTab.ui")[0]
+example_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/exampleTab.ui")[0]
 
 
 class ExampleTab(TabToolbox, example_tab_class):
     """Tab for plotting logging data"""
 
+    tab_toolbox_name = 'Example'
+
     _connected_signal = pyqtSignal(str)
     _disconnected_signal = pyqtSignal(str)
     _log_data_signal = pyqtSignal(int, object, object)
@@ -59,7 +61,7 @@ class ExampleTab(TabToolbox, example_tab_class):
     _param_updated_signal = pyqtSignal(str, str)
 
     def __init__(self, helper):
-        super(ExampleTab, self).__init__(helper, 'Example')
+        super(ExampleTab, self).__init__(helper)
         self.setupUi(self)
 
         # Always wrap callbacks from Crazyflie API though QT Signal/Slots
@@ -32,14 +32,13 @@ The flight control tab shows telemetry data and flight settings.
 import logging
 from enum import Enum
 
-from PyQt6 import uic
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
 
 import cfclient
 from cfclient.ui.widgets.ai import AttitudeIndicator
+from cfclient.utils.uicache import load_ui_type
 
-from cflib.crazyflie.log import LogConfig
 
 from cfclient.utils.config import Config
 from cfclient.utils.input import JoystickReader
@@ -51,8 +50,8 @@ __all__ = ['FlightTab']
 
 logger = logging.getLogger(__name__)
 
-flight_tab_class = uic.loadUiType(cfclient.module_path +
-                                  "/ui/tabs/flightTab.ui")[0]
+flight_tab_class = load_ui_type(cfclient.module_path +
+                                "/ui/tabs/flightTab.ui")[0]
 
 MAX_THRUST = 65536.0
 
@@ -88,6 +87,8 @@ class CommanderAction(Enum):
 
 
 class FlightTab(TabToolbox, flight_tab_class):
+    tab_toolbox_name = 'Flight Control'
+
     uiSetupReadySignal = pyqtSignal()
 
     _log_data_signal = pyqtSignal(int, object, object)
@@ -119,7 +120,7 @@ class FlightTab(TabToolbox, flight_tab_class):
     LOG_NAME_SUPERVISOR_INFO = 'supervisor.info'
 
     def __init__(self, helper):
-        super(FlightTab, self).__init__(helper, 'Flight Control')
+        super(FlightTab, self).__init__(helper)
         self.setupUi(self)
 
         self.disconnectedSignal.connect(self.disconnected)
@@ -162,6 +163,7 @@ class FlightTab(TabToolbox, flight_tab_class):
         self._log_error_signal.connect(self._logging_error)
 
         self._isConnected = False
+        self._log_subscription = None
         self.sitl_enabled = False
 
         # Connect UI signals that are in this tab
@@ -456,32 +458,27 @@ class FlightTab(TabToolbox, flight_tab_class):
     def connected(self, linkURI):
         self._isConnected = True
         # MOTOR & THRUST
-        lg = LogConfig("Motors", Config().get("ui_update_period"))
-        lg.add_variable(self.LOG_NAME_THRUST, "uint16_t")
-        lg.add_variable(self.LOG_NAME_MOTOR_1)
-        lg.add_variable(self.LOG_NAME_MOTOR_2)
-        lg.add_variable(self.LOG_NAME_MOTOR_3)
-        lg.add_variable(self.LOG_NAME_MOTOR_4)
-        lg.add_variable(self.LOG_NAME_CAN_FLY)
+        variables = [
+            (self.LOG_NAME_THRUST, "uint16_t"),
+            self.LOG_NAME_MOTOR_1,
+            self.LOG_NAME_MOTOR_2,
+            self.LOG_NAME_MOTOR_3,
+            self.LOG_NAME_MOTOR_4,
+            self.LOG_NAME_CAN_FLY,
+        ]
 
         # Add supervisor info if it exists to keep backwards compatibility
         if self._helper.cf.log.toc.get_element_by_complete_name(self.LOG_NAME_SUPERVISOR_INFO):
-            lg.add_variable(self.LOG_NAME_SUPERVISOR_INFO)
+            variables.append(self.LOG_NAME_SUPERVISOR_INFO)
         # Full supervisor info available after V7, hide supervisor info for earlier versions
         update_supervisor_info = self._helper.cf.platform.get_protocol_version() >= 7
         self._supervisor_state.setVisible(update_supervisor_info)
         self._supervisor_label1.setVisible(update_supervisor_info)
         self._supervisor_label2.setVisible(update_supervisor_info)
 
-        try:
-            self._helper.cf.log.add_config(lg)
-            lg.data_received_cb.add_callback(self._log_data_signal.emit)
-            lg.error_cb.add_callback(self._log_error_signal.emit)
-            lg.start()
-        except KeyError as e:
-            logger.warning(str(e))
-        except AttributeError as e:
-            logger.warning(str(e))
+        self._log_subscription = self._helper.log_broker.subscribe(
+            "Motors", variables, Config().get("ui_update_period"),
+            self._log_data_signal.emit, self._log_error_signal.emit)
 
     def _enable_estimators(self, should_enable):
         self.estimateX.setEnabled(should_enable)
@@ -497,6 +494,10 @@ class FlightTab(TabToolbox, flight_tab_class):
 
     def disconnected(self, linkURI):
         self._isConnected = False
+        if self._log_subscription is not None:
+            self._helper.log_broker.unsubscribe(self._log_subscription)
+            self._log_subscription = None
+
         self.ai.setRollPitch(0, 0)
         self.actualM1.setValue(0)
         self.actualM2.setValue(0)
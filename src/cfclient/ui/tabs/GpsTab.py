@@ -31,6 +31,7 @@ pre-configured.
 import logging
 
 import cfclient
+from cfclient.utils.uicache import load_ui_type
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
 from cfclient.ui.tab_toolbox import TabToolbox
@@ -39,20 +40,21 @@ from PyQt6 import QtCore
 from PyQt6 import QtGui
 from PyQt6 import QtNetwork
 from PyQt6 import QtWebKit
-from PyQt6 import uic
 
 __author__ = 'Bitcraze AB'
 __all__ = ['GpsTab']
 
 logger = logging.getLogger(__name__)
 
-gps_tab_class = uic.loadUiType(cfclient.module_path +
-                               "/ui/tabs/gpsTab.ui")[0]
+gps_tab_class = load_ui_type(cfclient.module_path +
+                             "/ui/tabs/gpsTab.ui")[0]
 
 
 class GpsTab(TabToolbox, gps_tab_class):
     """Tab for plotting logging data"""
 
+    tab_toolbox_name = 'GPS'
+
     _log_data_signal = pyqtSignal(int, object, object)
     _log_error_signal = pyqtSignal(object, str)
 
@@ -61,7 +63,7 @@ class GpsTab(TabToolbox, gps_tab_class):
     _console_signal = pyqtSignal(str)
 
     def __init__(self, helper):
-        super(GpsTab, self).__init__(helper, 'GPS')
+        super(GpsTab, self).__init__(helper)
         self.setupUi(self)
         self._cf = helper.cf
 
@@ -32,11 +32,12 @@ Basic tab to be able to set (and test) colors in the LED-ring.
 
 import logging
 
-from PyQt6 import QtGui, uic
+from PyQt6 import QtGui
 from PyQt6.QtCore import pyqtSignal
 from PyQt6 import QtWidgets
 
 import cfclient
+from cfclient.utils.uicache import load_ui_type
 from cfclient.ui.tab_toolbox import TabToolbox
 from cfclient.utils.ui import UiUtils
 
@@ -47,17 +48,19 @@ __all__ = ['LEDTab']
 
 logger = logging.getLogger(__name__)
 
-led_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/ledTab.ui")[0]
+led_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/ledTab.ui")[0]
 
 
 class LEDTab(TabToolbox, led_tab_class):
     """Tab for plotting logging data"""
 
+    tab_toolbox_name = 'LED'
+
     _connected_signal = pyqtSignal(str)
     _disconnected_signal = pyqtSignal(str)
 
     def __init__(self, helper):
-        super(LEDTab, self).__init__(helper, 'LED')
+        super(LEDTab, self).__init__(helper)
         self.setupUi(self)
 
         # Always wrap callbacks from Crazyflie API though QT Signal/Slots
@@ -30,16 +30,17 @@ Shows all the parameters available in the Crazyflie and also gives the ability
 to edit them.
 """
 
-from PyQt6 import QtWidgets, uic
+from PyQt6 import QtWidgets
 from PyQt6.QtCore import Qt, pyqtSignal
 
 import cfclient
+from cfclient.utils.uicache import load_ui_type
 from cfclient.ui.tab_toolbox import TabToolbox
 
 __author__ = 'Bitcraze AB'
 __all__ = ['LogBlockDebugTab']
 
-logblock_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/logBlockDebugTab.ui")[0]
+logblock_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/logBlockDebugTab.ui")[0]
 
 
 class LogBlockDebugTab(TabToolbox, logblock_tab_class):
@@ -47,11 +48,16 @@ class LogBlockDebugTab(TabToolbox, logblock_tab_class):
     Used to show debug-information about log status.
     """
 
+    tab_toolbox_name = 'Log Blocks Debugging'
+    # Log blocks are only reported as they are added, so the tab has to
+    # exist before connecting
+    lazy_load = False
+
     _blocks_updated_signal = pyqtSignal(object, bool)
     _disconnected_signal = pyqtSignal(str)
 
     def __init__(self, helper):
-        super(LogBlockDebugTab, self).__init__(helper, 'Log Blocks Debugging')
+        super(LogBlockDebugTab, self).__init__(helper)
         self.setupUi(self)
 
         self._helper.cf.log.block_added_cb.add_callback(self._block_added)
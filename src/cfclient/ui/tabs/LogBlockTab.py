@@ -31,11 +31,11 @@ This tab shows all log blocks that are registered and can be used to start the
 logging and also to write the logging data to file.
 """
 
-from PyQt6 import uic
 from PyQt6.QtCore import Qt, pyqtSignal
 
 import cfclient
 from cfclient.ui.tab_toolbox import TabToolbox
+from cfclient.utils.uicache import load_ui_type
 
 import logging
 
@@ -48,7 +48,7 @@ from cfclient.utils.logdatawriter import LogWriter
 __author__ = 'Bitcraze AB'
 __all__ = ['LogBlockTab']
 
-logblock_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/logBlockTab.ui")[0]
+logblock_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/logBlockTab.ui")[0]
 
 logger = logging.getLogger(__name__)
 
@@ -321,12 +321,17 @@ class LogBlockTab(TabToolbox, logblock_tab_class):
     Used to show debug-information about logblock status.
     """
 
+    tab_toolbox_name = 'Log Blocks'
+    # Log blocks are only reported as they are added, so the tab has to
+    # exist before connecting
+    lazy_load = False
+
     _blocks_updated_signal = pyqtSignal(bool)
     _disconnected_signal = pyqtSignal(str)
 
     def __init__(self, helper):
         """Initialize the tab"""
-        super(LogBlockTab, self).__init__(helper, 'Log Blocks')
+        super(LogBlockTab, self).__init__(helper)
         self.setupUi(self)
 
         self._helper.cf.log.block_added_cb.add_callback(self._block_added)
@@ -31,18 +31,18 @@ Shows information from the Python logging framework
 
 import logging
 
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 
 import cfclient
 from cfclient.ui.tab_toolbox import TabToolbox
+from cfclient.utils.uicache import load_ui_type
 
 __author__ = 'Bitcraze AB'
 __all__ = ['LogClientTab']
 
 logger = logging.getLogger(__name__)
 
-log_client_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/logClientTab.ui")[0]
+log_client_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/logClientTab.ui")[0]
 
 
 class LogHandler(logging.StreamHandler):
@@ -65,10 +65,12 @@ class LogClientTab(TabToolbox, log_client_tab_class):
     A tab for showing client logging information, such
     as USB Gamepad connections or scan feedback.
     """
+    tab_toolbox_name = 'Log Client'
+
     _update = pyqtSignal(str)
 
     def __init__(self, helper):
-        super(LogClientTab, self).__init__(helper, 'Log Client')
+        super(LogClientTab, self).__init__(helper)
         self.setupUi(self)
 
         self._update.connect(self.printText)
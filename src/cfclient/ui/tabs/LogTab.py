@@ -29,8 +29,8 @@ Shows the Log TOC of available variables in the Crazyflie.
 
 import cfclient
 from cfclient.ui.tab_toolbox import TabToolbox
+from cfclient.utils.uicache import load_ui_type
 from PyQt6 import QtWidgets
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtCore import pyqtSlot
 from PyQt6.QtCore import Qt
@@ -38,15 +38,17 @@ from PyQt6.QtCore import Qt
 __author__ = 'Bitcraze AB'
 __all__ = ['LogTab']
 
-param_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/logTab.ui")[0]
+param_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/logTab.ui")[0]
 
 
 class LogTab(TabToolbox, param_tab_class):
+    tab_toolbox_name = 'Log TOC'
+
     connectedSignal = pyqtSignal(str)
     disconnectedSignal = pyqtSignal(str)
 
     def __init__(self, helper):
-        super(LogTab, self).__init__(helper, 'Log TOC')
+        super(LogTab, self).__init__(helper)
         self.setupUi(self)
 
         self.cf = helper.cf
@@ -33,23 +33,25 @@ to edit them.
 import logging
 from threading import Event
 
-from PyQt6 import uic, QtCore
+from PyQt6 import QtCore
 from PyQt6.QtCore import QSortFilterProxyModel, Qt, pyqtSignal
 from PyQt6.QtCore import QAbstractItemModel, QModelIndex, QVariant
 from PyQt6.QtGui import QBrush, QColor
 from PyQt6.QtWidgets import QHeaderView, QFileDialog, QMessageBox
 
 from cflib.crazyflie.param import PersistentParamState
-from cflib.localization import ParamFileManager
 
 import cfclient
+from cfclient.utils.uicache import load_ui_type
 from cfclient.ui.tab_toolbox import TabToolbox
 from cfclient.utils.logconfigreader import FILE_REGEX_YAML
+from cfclient.utils.param_snapshot import BulkParamEngine
+from cfclient.utils.param_snapshot import ParamSnapshot
 
 __author__ = 'Bitcraze AB'
 __all__ = ['ParamTab']
 
-param_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/paramTab.ui")[0]
+param_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/paramTab.ui")[0]
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +73,7 @@ class ParamChildItem(object):
         """Initialize the node"""
         self.parent = parent
         self.name = name
+        self.row = len(parent.children)
         self.ctype = None
         self.access = None
         self.persistent = False
@@ -83,7 +86,9 @@ class ParamChildItem(object):
         """Callback from the param layer when a parameter has been updated"""
         self.value = round_if_float(value)
         self.is_updating = False
-        self.parent.model.proxy.dataChanged.emit(QModelIndex(), QModelIndex())
+        # Called from the cflib thread, the model updates the view in the UI
+        # thread
+        self.parent.model.param_updated.emit(self)
 
     def child_count(self):
         """Return the number of children this node has"""
@@ -100,6 +105,7 @@ class ParamGroupItem(object):
         self.children = []
         self.name = name
         self.model = model
+        self.row = len(model._nodes)
 
     def child_count(self):
         """Return the number of children this node has"""
@@ -109,6 +115,10 @@ class ParamGroupItem(object):
 class ParamBlockModel(QAbstractItemModel):
     """Model for handling the parameters in the tree-view"""
 
+    VALUE_COLUMN = 4
+
+    param_updated = pyqtSignal(object)
+
     def __init__(self, parent, mainUI):
         """Create the empty model"""
         super(ParamBlockModel, self).__init__(parent)
@@ -117,10 +127,7 @@ class ParamBlockModel(QAbstractItemModel):
         self._red_brush = QBrush(QColor("red"))
         self._enabled = False
         self._mainUI = mainUI
-        self.proxy = None
-
-    def set_proxy(self, proxy):
-        self.proxy = proxy
+        self.param_updated.connect(self._param_updated)
 
     def set_enabled(self, enabled):
         if self._enabled != enabled:
@@ -129,6 +136,7 @@ class ParamBlockModel(QAbstractItemModel):
 
     def set_toc(self, toc, crazyflie):
         """Populate the model with data from the param TOC"""
+        self.beginResetModel()
 
         # No luck using proxy sorting, so do it here instead...
         for group in sorted(toc.keys()):
@@ -146,12 +154,31 @@ class ParamBlockModel(QAbstractItemModel):
                 new_group.children.append(new_param)
             self._nodes.append(new_group)
 
-        self.layoutChanged.emit()
+        self.endResetModel()
 
     def refresh(self):
         """Force a refresh of the view though the model"""
         self.layoutChanged.emit()
 
+    def _param_updated(self, node):
+        """Notify the view that the value of one parameter has changed"""
+        group = node.parent
+        if group.row >= len(self._nodes) or self._nodes[group.row] is not group:
+            # The parameter belongs to a TOC that is no longer in the model
+            return
+        index = self.createIndex(node.row, self.VALUE_COLUMN, node)
+        self.dataChanged.emit(index, index)
+
+    def filter_index(self):
+        """
+        Return a list with one tuple per group, with the lowercase name of
+        the group and a list of the lowercase complete names of its
+        parameters. Used for filtering without going through the model.
+        """
+        return [(group.name.lower(),
+                 [(group.name + '.' + child.name).lower() for child in group.children])
+                for group in self._nodes]
+
     def parent(self, index):
         """Re-implemented method to get the parent of the given index"""
         if not index.isValid():
@@ -161,8 +188,7 @@ class ParamBlockModel(QAbstractItemModel):
         if node.parent is None:
             return QModelIndex()
         else:
-            return self.createIndex(self._nodes.index(node.parent), 0,
-                                    node.parent)
+            return self.createIndex(node.parent.row, 0, node.parent)
 
     def columnCount(self, parent):
         """Re-implemented method to get the number of columns"""
@@ -253,18 +279,72 @@ class ParamBlockModel(QAbstractItemModel):
 class ParamTreeFilterProxy(QSortFilterProxyModel):
     """
     Implement a filtering proxy model that show all children if the group matches.
+
+    Rows are matched as lowercase substrings against an index of the group
+    and parameter names that is built once per TOC, and the accepted rows are
+    computed once per filter text instead of once per row.
     """
     def __init__(self, paramTree):
         super(ParamTreeFilterProxy, self).__init__(paramTree)
+        self._filter_index = []
+        self._filter_text = ''
+        # Accepted group rows and a set of accepted param rows per group row,
+        # None when all rows are accepted
+        self._groups = None
+        self._params = None
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelReset.connect(self._rebuild_index)
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        self._filter_index = self.sourceModel().filter_index()
+        self._groups = None
+        self.set_filter_text(self._filter_text)
+
+    def set_filter_text(self, text):
+        """Only show the groups and parameters with names containing text"""
+        text = text.lower()
+        if not text:
+            groups = None
+            params = None
+        else:
+            # When the text is extended, only rows that matched the previous
+            # text can match
+            narrowing = self._groups is not None and text.startswith(self._filter_text)
+            candidates = self._groups if narrowing else range(len(self._filter_index))
+
+            groups = set()
+            params = {}
+            for group_row in candidates:
+                group_name, param_names = self._filter_index[group_row]
+                if text in group_name:
+                    groups.add(group_row)
+                    params[group_row] = range(len(param_names))
+                    continue
+                rows = self._params[group_row] if narrowing else range(len(param_names))
+                matching = set(row for row in rows if text in param_names[row])
+                if matching:
+                    groups.add(group_row)
+                    params[group_row] = matching
+
+        self._filter_text = text
+        self._groups = groups
+        self._params = params
+        self.invalidateFilter()
 
     def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
         '''
         When a group match the filter, make sure all children matches as well.
         '''
+        if self._groups is None:
+            return True
+
         if not source_parent.isValid():
-            return super().filterAcceptsRow(source_row, source_parent)
+            return source_row in self._groups
 
-        return super().filterAcceptsRow(source_parent.row(), source_parent.parent())
+        return source_row in self._params.get(source_parent.row(), ())
 
 
 class ParamTab(TabToolbox, param_tab_class):
@@ -272,6 +352,8 @@ class ParamTab(TabToolbox, param_tab_class):
     Show all the parameters in the TOC and give the user the ability to edit
     them
     """
+    tab_toolbox_name = 'Parameters'
+
     _expand_all_signal = pyqtSignal()
     _connected_signal = pyqtSignal(str)
     _disconnected_signal = pyqtSignal(str)
@@ -280,10 +362,11 @@ class ParamTab(TabToolbox, param_tab_class):
     _persistent_state_signal = pyqtSignal(PersistentParamState)
     _param_default_signal = pyqtSignal(object)
     _reset_param_signal = pyqtSignal(str)
+    _restore_done_signal = pyqtSignal(object)
 
     def __init__(self, helper):
         """Create the parameter tab"""
-        super(ParamTab, self).__init__(helper, 'Parameters')
+        super(ParamTab, self).__init__(helper)
         self.setupUi(self)
 
         self.cf = helper.cf
@@ -306,12 +389,10 @@ class ParamTab(TabToolbox, param_tab_class):
 
         self.proxyModel = ParamTreeFilterProxy(self.paramTree)
         self.proxyModel.setSourceModel(self._model)
-        self.proxyModel.setRecursiveFilteringEnabled(True)
-        self._model.set_proxy(self.proxyModel)
 
         @QtCore.pyqtSlot(str)
         def onFilterChanged(text):
-            self.proxyModel.setFilterRegularExpression(text)
+            self.proxyModel.set_filter_text(text)
 
         self.filterBox.textChanged.connect(onFilterChanged)
 
@@ -322,6 +403,11 @@ class ParamTab(TabToolbox, param_tab_class):
         self._load_param_button.clicked.connect(self._load_param_button_clicked)
         self._dump_param_button.clicked.connect(self._dump_param_button_clicked)
         self._clear_param_button.clicked.connect(self._clear_stored_persistent_params_button_clicked)
+        self._snapshot_param_button.clicked.connect(self._snapshot_param_button_clicked)
+        self._restore_param_button.clicked.connect(self._restore_param_button_clicked)
+        self._restore_done_signal.connect(self._restore_done)
+
+        self._param_engine = BulkParamEngine(self.cf)
 
         self._is_connected = False
         self._update_param_io_buttons()
@@ -423,6 +509,8 @@ class ParamTab(TabToolbox, param_tab_class):
         self._load_param_button.setEnabled(enabled)
         self._dump_param_button.setEnabled(enabled)
         self._clear_param_button.setEnabled(enabled)
+        self._snapshot_param_button.setEnabled(enabled)
+        self._restore_param_button.setEnabled(enabled)
 
     def _load_param_button_clicked(self):
         names = QFileDialog.getOpenFileName(self, 'Open file', cfclient.config_path, FILE_REGEX_YAML)
@@ -430,6 +518,8 @@ class ParamTab(TabToolbox, param_tab_class):
         if names[0] == '':
             return
         filename = names[0]
+        # cflib.localization pulls in scipy, only import it when needed
+        from cflib.localization import ParamFileManager
         parameters = ParamFileManager.read(filename)
 
         def _is_persistent_stored_callback(complete_name, success):
@@ -439,17 +529,15 @@ class ParamTab(TabToolbox, param_tab_class):
             else:
                 print(f'Persistent params: stored {complete_name}!')
 
-        _set_param_names = []
-        for param, state in parameters.items():
-            if state.is_stored:
-                try:
-                    self.cf.param.set_value(param, state.stored_value)
-                    _set_param_names.append(param)
-                except Exception:
-                    print(f'Failed to set {param}!')
-                    QMessageBox.about(self, 'Warning', f'Failed to set {param}!')
-                print(f'Set {param}!')
-                self.cf.param.persistent_store(param, _is_persistent_stored_callback)
+        result = self._param_engine.write_values_sync(
+            [(param, state.stored_value) for param, state in parameters.items() if state.is_stored])
+        if result.failed:
+            QMessageBox.about(self, 'Warning', 'Failed to set ' + ', '.join(sorted(result.failed)) + '!')
+
+        _set_param_names = result.succeeded
+        for param in _set_param_names:
+            print(f'Set {param}!')
+            self.cf.param.persistent_store(param, _is_persistent_stored_callback)
 
         self._update_param_io_buttons()
         dlg = QMessageBox(self)
@@ -460,19 +548,6 @@ class ParamTab(TabToolbox, param_tab_class):
         dlg.setIcon(QMessageBox.Icon.NoIcon)
         dlg.exec()
 
-    def _get_persistent_state(self, complete_param_name):
-        wait_for_callback_event = Event()
-        state_value = None
-
-        def state_callback(complete_name, value):
-            nonlocal state_value
-            state_value = value
-            wait_for_callback_event.set()
-
-        self.cf.param.persistent_get_state(complete_param_name, state_callback)
-        wait_for_callback_event.wait()
-        return state_value
-
     def _get_all_persistent_param_names(self):
         persistent_params = []
         for group_name, params in self.cf.param.toc.toc.items():
@@ -484,20 +559,18 @@ class ParamTab(TabToolbox, param_tab_class):
         return persistent_params
 
     def _get_all_stored_persistent_param_names(self):
-        persistent_params = self._get_all_persistent_param_names()
-        stored_params = []
-        for complete_name in persistent_params:
-            state = self._get_persistent_state(complete_name)
-            if state.is_stored:
-                stored_params.append(complete_name)
-        return stored_params
+        return list(self._get_all_stored_persistent_params().keys())
 
     def _get_all_stored_persistent_params(self):
         persistent_params = self._get_all_persistent_param_names()
+        result = self._param_engine.get_persistent_states_sync(persistent_params)
+        if result.failed:
+            logger.warning('Failed to get persistent state: %s', result.summary())
+
         stored_params = {}
         for complete_name in persistent_params:
-            state = self._get_persistent_state(complete_name)
-            if state.is_stored:
+            state = result.values.get(complete_name)
+            if state is not None and state.is_stored:
                 stored_params[complete_name] = state
         return stored_params
 
@@ -511,6 +584,7 @@ class ParamTab(TabToolbox, param_tab_class):
         else:
             filename = names[0]
 
+        from cflib.localization import ParamFileManager
         ParamFileManager.write(filename, stored_persistent_params)
         dlg = QMessageBox(self)
         dlg.setWindowTitle('Info')
@@ -545,6 +619,53 @@ class ParamTab(TabToolbox, param_tab_class):
             for complete_name in stored_persistent_params:
                 self._clear_persistent_parameter(complete_name)
 
+    def _snapshot_param_button_clicked(self):
+        names = QFileDialog.getSaveFileName(self, 'Save file', cfclient.config_path, FILE_REGEX_YAML)
+        if names[0] == '':
+            return
+        filename = names[0]
+        if not filename.endswith('.yaml'):
+            filename += '.yaml'
+
+        snapshot = ParamSnapshot.capture(self.cf)
+        snapshot.save(filename)
+        QMessageBox.about(self, 'Info', f'Saved {len(snapshot.values)} parameters to file')
+
+    def _restore_param_button_clicked(self):
+        names = QFileDialog.getOpenFileName(self, 'Open file', cfclient.config_path, FILE_REGEX_YAML)
+        if names[0] == '':
+            return
+
+        try:
+            snapshot = ParamSnapshot.load(names[0])
+        except Exception as e:
+            QMessageBox.about(self, 'Warning', f'Failed to read snapshot: {e}')
+            return
+
+        changes = snapshot.diff(self.cf)
+        if not changes:
+            QMessageBox.about(self, 'Info', 'All parameters already have the values in the snapshot')
+            return
+
+        dlg = QMessageBox(self)
+        dlg.setWindowTitle('Restore Parameters Confirmation')
+        dlg.setText(f'Write {len(changes)} parameters that differ from the snapshot?')
+        dlg.setDetailedText('\n'.join(f'{c.name}: {c.current} -> {c.target}' for c in changes))
+        dlg.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if dlg.exec() != QMessageBox.StandardButton.Yes:
+            return
+
+        self._restore_param_button.setEnabled(False)
+        self._param_engine.write_values([(c.name, c.target) for c in changes],
+                                        finished_cb=self._restore_done_signal.emit)
+
+    def _restore_done(self, result):
+        self._update_param_io_buttons()
+        if result.ok:
+            QMessageBox.about(self, 'Info', 'Restored parameters: ' + result.summary())
+        else:
+            QMessageBox.about(self, 'Warning', 'Failed to restore parameters: ' + result.summary())
+
     def _connected(self, link_uri):
         self._model.reset()
         self._model.set_toc(self.cf.param.toc.toc, self._helper.cf)
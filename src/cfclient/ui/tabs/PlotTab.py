@@ -32,7 +32,7 @@ import logging
 
 from cfclient.ui.tab_toolbox import TabToolbox
 from cfclient.ui.widgets.plotwidget import PlotWidget
-from PyQt6 import uic
+from cfclient.utils.uicache import load_ui_type
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtCore import QAbstractItemModel
 from PyQt6.QtCore import QModelIndex
@@ -46,7 +46,7 @@ __all__ = ['PlotTab']
 
 logger = logging.getLogger(__name__)
 
-plot_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/plotTab.ui")[0]
+plot_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/plotTab.ui")[0]
 
 
 class LogConfigModel(QAbstractItemModel):
@@ -115,6 +115,11 @@ class LogConfigModel(QAbstractItemModel):
 class PlotTab(TabToolbox, plot_tab_class):
     """Tab for plotting logging data"""
 
+    tab_toolbox_name = 'Plotter'
+    # Log configurations are added to the plotter as they are created when
+    # connecting, so it has to exist from the start
+    lazy_load = False
+
     _log_data_signal = pyqtSignal(int, object, object)
     _log_error_signal = pyqtSignal(object, str)
     _disconnected_signal = pyqtSignal(str)
@@ -133,7 +138,7 @@ class PlotTab(TabToolbox, plot_tab_class):
     ]
 
     def __init__(self, helper):
-        super(PlotTab, self).__init__(helper, 'Plotter')
+        super(PlotTab, self).__init__(helper)
         self.setupUi(self)
 
         self._log_error_signal.connect(self._logging_error)
@@ -27,13 +27,14 @@ Tab for tuning PID controller, mainly for larger quads.
 import logging
 
 from PyQt6 import QtWidgets
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal, Qt
 import time
 
 import cfclient
 from cfclient.ui.tab_toolbox import TabToolbox
 from cfclient.ui.widgets.super_slider import SuperSlider
+from cfclient.utils.param_writer import ParamWriter
+from cfclient.utils.uicache import load_ui_type
 from cflib.crazyflie import Crazyflie, Param
 from cflib.utils.callbacks import Syncer
 
@@ -42,7 +43,7 @@ __all__ = ['TuningTab']
 
 logger = logging.getLogger(__name__)
 
-tuning_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/tuningTab.ui")[0]
+tuning_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/tuningTab.ui")[0]
 
 
 class SliderParamMapper:
@@ -61,13 +62,16 @@ class SliderParamMapper:
         self.linked_checkbox: QtWidgets.QCheckBox = None
 
         self.cf = None
+        self.param_writer: ParamWriter = None
 
-    def connected(self, cf: Crazyflie):
+    def connected(self, cf: Crazyflie, param_writer: ParamWriter):
         self.cf = cf
+        self.param_writer = param_writer
         return self.param_group, self.param_name
 
     def disconnected(self):
         self.cf = None
+        self.param_writer = None
 
     def link_with(self, other_mapper: 'SliderParamMapper', checkbox: QtWidgets.QCheckBox):
         self.linked_mapper = other_mapper
@@ -84,13 +88,17 @@ class SliderParamMapper:
         if self.cf is not None:
             if self.cf.is_connected():
                 self.receive_block_time = time.time() + 0.4
-                self.cf.param.set_value(self.full_param_name, value)
+                self.param_writer.write(self.full_param_name, value)
 
         if self.linked_mapper is not None:
             self.linked_mapper.linked_update(value)
 
     # Called when a parameter in the CF has changed, this is also true if we initiated the param update
     def param_updated_cb(self, full_param_name, value):
+        if self.param_writer is not None and self.param_writer.is_pending(full_param_name):
+            # An older value coming back while the latest one is on its way
+            return
+
         if time.time() > self.receive_block_time:
             self.slider.set_value(float(value))
 
@@ -103,19 +111,21 @@ class SliderParamMapper:
             self.slider.set_value(float(value))
             if self.cf is not None and self.cf.is_connected():
                 self.receive_block_time = time.time() + 0.4
-                self.cf.param.set_value(self.full_param_name, value)
+                self.param_writer.write(self.full_param_name, value)
 
 
 class TuningTab(TabToolbox, tuning_tab_class):
     """Tab for plotting logging data"""
 
+    tab_toolbox_name = 'Tuning'
+
     _connected_signal = pyqtSignal(str)
     _disconnected_signal = pyqtSignal(str)
 
     _param_updated_signal = pyqtSignal(str, object)
 
     def __init__(self, helper):
-        super(TuningTab, self).__init__(helper, 'Tuning')
+        super(TuningTab, self).__init__(helper)
         self.setupUi(self)
 
         # Always wrap callbacks from Crazyflie API though QT Signal/Slots
@@ -220,7 +230,7 @@ class TuningTab(TabToolbox, tuning_tab_class):
     def _connected(self, link_uri):
         """Callback when the Crazyflie has been connected"""
         for mapper in self.mappers.values():
-            param_group, param_name = mapper.connected(self._helper.cf)
+            param_group, param_name = mapper.connected(self._helper.cf, self._helper.param_writer)
             self._helper.cf.param.add_update_callback(
                 group=param_group, name=param_name, cb=self._param_updated_signal.emit)
 
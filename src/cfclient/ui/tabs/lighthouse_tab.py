@@ -32,7 +32,6 @@ Shows data for the Lighthouse Positioning system
 
 import logging
 
-from PyQt6 import uic
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtWidgets import QFileDialog
@@ -40,18 +39,14 @@ from PyQt6.QtWidgets import QLabel
 
 import cfclient
 from cfclient.ui.tab_toolbox import TabToolbox
+from cfclient.utils.uicache import load_ui_type
 
-from cflib.crazyflie.log import LogConfig
 from cflib.crazyflie.mem import LighthouseMemHelper
-from cflib.localization import LighthouseConfigWriter
-from cflib.localization import LighthouseConfigFileManager
 
-from cfclient.ui.dialogs.lighthouse_bs_geometry_dialog import LighthouseBsGeometryDialog
 from cfclient.ui.dialogs.basestation_mode_dialog import LighthouseBsModeDialog
 from cfclient.ui.dialogs.lighthouse_system_type_dialog import LighthouseSystemTypeDialog
 from cfclient.utils.logconfigreader import FILE_REGEX_YAML
 
-from vispy import scene
 import numpy as np
 import math
 import os
@@ -61,7 +56,7 @@ __all__ = ['LighthouseTab']
 
 logger = logging.getLogger(__name__)
 
-lighthouse_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/lighthouse_tab.ui")[0]
+lighthouse_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/lighthouse_tab.ui")[0]
 
 STYLE_RED_BACKGROUND = "background-color: lightpink;"
 STYLE_GREEN_BACKGROUND = "background-color: lightgreen;"
@@ -70,199 +65,11 @@ STYLE_ORANGE_BACKGROUND = "background-color: orange;"
 STYLE_NO_BACKGROUND = "background-color: none;"
 
 
-class MarkerPose():
-    COL_X_AXIS = 'red'
-    COL_Y_AXIS = 'green'
-    COL_Z_AXIS = 'blue'
-
-    AXIS_LEN = 0.3
-
-    LABEL_SIZE = 100
-    LABEL_OFFSET = np.array((0.0, 0, 0.25))
-
-    def __init__(self, the_scene, color, text=None):
-        self._scene = the_scene
-        self._color = color
-        self._text = text
-
-        self._marker = scene.visuals.Markers(
-            pos=np.array([[0, 0, 0]]),
-            parent=self._scene,
-            face_color=self._color)
-
-        self._x_axis = scene.visuals.Line(
-            pos=np.array([[0, 0, 0], [0, 0, 0]]),
-            color=self.COL_X_AXIS,
-            parent=self._scene)
-
-        self._y_axis = scene.visuals.Line(pos=np.array(
-            [[0, 0, 0], [0, 0, 0]]),
-            color=self.COL_Y_AXIS,
-            parent=self._scene)
-
-        self._z_axis = scene.visuals.Line(
-            pos=np.array([[0, 0, 0], [0, 0, 0]]),
-            color=self.COL_Z_AXIS,
-            parent=self._scene)
-
-        self._label = None
-        if self._text:
-            self._label = scene.visuals.Text(
-                text=self._text,
-                font_size=self.LABEL_SIZE,
-                pos=self.LABEL_OFFSET,
-                parent=self._scene)
-
-    def set_pose(self, position, rot):
-        self._marker.set_data(pos=np.array([position]), face_color=self._color)
-
-        if self._label:
-            self._label.pos = self.LABEL_OFFSET + position
-
-        x_tip = np.dot(np.array(rot), np.array([self.AXIS_LEN, 0, 0]))
-        self._x_axis.set_data(np.array([position, x_tip + position]), color=self.COL_X_AXIS)
-
-        y_tip = np.dot(np.array(rot), np.array([0, self.AXIS_LEN, 0]))
-        self._y_axis.set_data(np.array([position, y_tip + position]), color=self.COL_Y_AXIS)
-
-        z_tip = np.dot(np.array(rot), np.array([0, 0, self.AXIS_LEN]))
-        self._z_axis.set_data(np.array([position, z_tip + position]), color=self.COL_Z_AXIS)
-
-    def remove(self):
-        self._marker.parent = None
-        self._x_axis.parent = None
-        self._y_axis.parent = None
-        self._z_axis.parent = None
-        if self._label:
-            self._label.parent = None
-
-    def set_color(self, color):
-        self._color = color
-        self._marker.set_data(face_color=self._color)
-
-
-class Plot3dLighthouse(scene.SceneCanvas):
-    POSITION_BRUSH = np.array((0, 0, 1.0))
-    BS_BRUSH_VISIBLE = np.array((0.2, 0.5, 0.2))
-    BS_BRUSH_NOT_VISIBLE = np.array((0.8, 0.5, 0.5))
-
-    VICINITY_DISTANCE = 2.5
-    HIGHLIGHT_DISTANCE = 0.5
-
-    LABEL_SIZE = 100
-    LABEL_HIGHLIGHT_SIZE = 200
-
-    HIGHLIGHT_SIZE = 20
-
-    TEXT_OFFSET = np.array((0.0, 0, 0.25))
-
-    def __init__(self):
-        scene.SceneCanvas.__init__(self, keys=None)
-        self.unfreeze()
-
-        self._view = self.central_widget.add_view()
-        self._view.bgcolor = '#ffffff'
-        self._view.camera = scene.TurntableCamera(
-            distance=10.0,
-            up='+z',
-            center=(0.0, 0.0, 1.0))
-
-        self._cf = None
-        self._base_stations = {}
-
-        self.freeze()
-
-        plane_size = 10
-        scene.visuals.Plane(
-            width=plane_size,
-            height=plane_size,
-            width_segments=plane_size,
-            height_segments=plane_size,
-            color=(0.5, 0.5, 0.5, 0.5),
-            edge_color="gray",
-            parent=self._view.scene)
-
-        self._addArrows(1, 0.02, 0.1, 0.1, self._view.scene)
-
-    def _addArrows(self, length, width, head_length, head_width, parent):
-        # The Arrow visual in vispy does not seem to work very good,
-        # draw arrows using lines instead.
-        w = width / 2
-        hw = head_width / 2
-        base_len = length - head_length
-
-        # X-axis
-        scene.visuals.LinePlot([
-            [0, w, 0],
-            [base_len, w, 0],
-            [base_len, hw, 0],
-            [length, 0, 0],
-            [base_len, -hw, 0],
-            [base_len, -w, 0],
-            [0, -w, 0]],
-            width=1.0, color='red', parent=parent, marker_size=0.0)
-
-        # Y-axis
-        scene.visuals.LinePlot([
-            [w, 0, 0],
-            [w, base_len, 0],
-            [hw, base_len, 0],
-            [0, length, 0],
-            [-hw, base_len, 0],
-            [-w, base_len, 0],
-            [-w, 0, 0]],
-            width=1.0, color='green', parent=parent, marker_size=0.0)
-
-        # Z-axis
-        scene.visuals.LinePlot([
-            [0, w, 0],
-            [0, w, base_len],
-            [0, hw, base_len],
-            [0, 0, length],
-            [0, -hw, base_len],
-            [0, -w, base_len],
-            [0, -w, 0]],
-            width=1.0, color='blue', parent=parent, marker_size=0.0)
-
-    def update_cf_pose(self, position, rot):
-        if not self._cf:
-            self._cf = MarkerPose(self._view.scene, self.POSITION_BRUSH)
-        self._cf.set_pose(position, rot)
-
-    def update_base_station_geos(self, geos):
-        for id, geo in geos.items():
-            if (geo is not None) and (id not in self._base_stations):
-                self._base_stations[id] = MarkerPose(self._view.scene, self.BS_BRUSH_NOT_VISIBLE, text=f"{id + 1}")
-            self._base_stations[id].set_pose(geo.origin, geo.rotation_matrix)
-
-        geos_to_remove = self._base_stations.keys() - geos.keys()
-        for id in geos_to_remove:
-            existing = self._base_stations.pop(id)
-            existing.remove()
-
-    def update_base_station_visibility(self, visibility):
-        for id, bs in self._base_stations.items():
-            if id in visibility:
-                bs.set_color(self.BS_BRUSH_VISIBLE)
-            else:
-                bs.set_color(self.BS_BRUSH_NOT_VISIBLE)
-
-    def clear(self):
-        if self._cf:
-            self._cf.remove()
-            self._cf = None
-
-        for bs in self._base_stations.values():
-            bs.remove()
-        self._base_stations = {}
-
-    def _mix(self, col1, col2, mix):
-        return col1 * mix + col2 * (1.0 - mix)
-
-
 class LighthouseTab(TabToolbox, lighthouse_tab_class):
     """Tab for plotting Lighthouse data"""
 
+    tab_toolbox_name = 'Lighthouse Positioning'
+
     # Update period of log data in ms
     UPDATE_PERIOD_LOG = 100
 
@@ -292,7 +99,7 @@ class LighthouseTab(TabToolbox, lighthouse_tab_class):
     _calibration_read_signal = pyqtSignal(object)
 
     def __init__(self, helper):
-        super(LighthouseTab, self).__init__(helper, 'Lighthouse Positioning')
+        super(LighthouseTab, self).__init__(helper)
         self.setupUi(self)
 
         # Always wrap callbacks from Crazyflie API though QT Signal/Slots
@@ -312,6 +119,7 @@ class LighthouseTab(TabToolbox, lighthouse_tab_class):
         self._set_up_plots()
 
         self.is_lighthouse_deck_active = False
+        self._log_subscriptions = []
 
         self._lh_memory_helper = None
         self._lh_config_writer = None
@@ -344,6 +152,9 @@ class LighthouseTab(TabToolbox, lighthouse_tab_class):
         self._graph_timer.timeout.connect(self._update_graphics)
         self._graph_timer.start()
 
+        # The geometry dialog and cflib.localization pull in the lighthouse
+        # solvers (scipy), they are only imported when the tab is created
+        from cfclient.ui.dialogs.lighthouse_bs_geometry_dialog import LighthouseBsGeometryDialog
         self._basestation_geometry_dialog = LighthouseBsGeometryDialog(self)
         self._basestation_mode_dialog = LighthouseBsModeDialog(self)
         self._system_type_dialog = LighthouseSystemTypeDialog(helper)
@@ -378,6 +189,8 @@ class LighthouseTab(TabToolbox, lighthouse_tab_class):
         self._basestation_mode_dialog.show()
 
     def _set_up_plots(self):
+        # vispy is slow to import, only pull it in when the tab is created
+        from cfclient.ui.widgets.lighthouse_plot3d import Plot3dLighthouse
         self._plot_3d = Plot3dLighthouse()
         self._plot_layout.addWidget(self._plot_3d.native)
 
@@ -416,6 +229,7 @@ class LighthouseTab(TabToolbox, lighthouse_tab_class):
 
             # Now that we know we have a lighthouse deck, setup the memory helper and config writer
             self._lh_memory_helper = LighthouseMemHelper(self._helper.cf)
+            from cflib.localization import LighthouseConfigWriter
             self._lh_config_writer = LighthouseConfigWriter(self._helper.cf)
 
     def _start_read_of_geo_data(self):
@@ -477,6 +291,9 @@ class LighthouseTab(TabToolbox, lighthouse_tab_class):
     def _disconnected(self, link_uri):
         """Callback for when the Crazyflie has been disconnected"""
         logger.debug("Crazyflie disconnected from {}".format(link_uri))
+        for subscription in self._log_subscriptions:
+            self._helper.log_broker.unsubscribe(subscription)
+        self._log_subscriptions = []
         self._clear_state()
         self._update_graphics()
         self._plot_3d.clear()
@@ -487,18 +304,13 @@ class LighthouseTab(TabToolbox, lighthouse_tab_class):
 
     def _register_logblock(self, logblock_name, variables, data_cb, error_cb,
                            update_period=UPDATE_PERIOD_LOG):
-        """Register log data to listen for. One logblock can only contain a limited
-        number of parameters."""
-        lg = LogConfig(logblock_name, update_period)
-        for variable in variables:
-            if self._is_in_log_toc(variable):
-                lg.add_variable(variable)
-
-        self._helper.cf.log.add_config(lg)
-        lg.data_received_cb.add_callback(data_cb)
-        lg.error_cb.add_callback(error_cb)
-        lg.start()
-        return lg
+        """Register log data to listen for. The log broker shares log blocks with other
+        tabs and splits the variables over as many blocks as needed."""
+        variables = [variable for variable in variables if self._is_in_log_toc(variable)]
+        subscription = self._helper.log_broker.subscribe(logblock_name, variables, update_period,
+                                                         data_cb, error_cb)
+        self._log_subscriptions.append(subscription)
+        return subscription
 
     def _is_in_log_toc(self, variable):
         toc = self._helper.cf.log.toc
@@ -711,4 +523,5 @@ class LighthouseTab(TabToolbox, lighthouse_tab_class):
         else:
             filename = names[0]
 
+        from cflib.localization import LighthouseConfigFileManager
         LighthouseConfigFileManager.write(filename, geos=geos, calibs=calibs, system_type=system_type)
@@ -35,22 +35,19 @@ from enum import Enum
 from collections import namedtuple
 
 import time
-from PyQt6 import uic
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtWidgets import QLabel
 
 import cfclient
 from cfclient.ui.tab_toolbox import TabToolbox
+from cfclient.utils.uicache import load_ui_type
 
-from cflib.crazyflie.log import LogConfig
 from cflib.crazyflie.mem import MemoryElement
 from lpslib.lopoanchor import LoPoAnchor
 
 from cfclient.ui.dialogs.anchor_position_dialog import AnchorPositionDialog
 
-from vispy import scene
-import numpy as np
 
 import copy
 
@@ -59,7 +56,7 @@ __all__ = ['LocoPositioningTab']
 
 logger = logging.getLogger(__name__)
 
-locopositioning_tab_class = uic.loadUiType(cfclient.module_path + "/ui/tabs/locopositioning_tab.ui")[0]
+locopositioning_tab_class = load_ui_type(cfclient.module_path + "/ui/tabs/locopositioning_tab.ui")[0]
 
 STYLE_RED_BACKGROUND = "background-color: lightpink;"
 STYLE_GREEN_BACKGROUND = "background-color: lightgreen;"
@@ -106,160 +103,6 @@ class AxisScaleStep:
         self.center_only = center_only
 
 
-class Plot3dLps(scene.SceneCanvas):
-    ANCHOR_BRUSH = np.array((0.2, 0.5, 0.2))
-    ANCHOR_BRUSH_INVALID = np.array((0.8, 0.5, 0.5))
-    HIGHLIGHT_ANCHOR_BRUSH = np.array((0, 1, 0))
-    POSITION_BRUSH = np.array((0, 0, 1.0))
-
-    VICINITY_DISTANCE = 2.5
-    HIGHLIGHT_DISTANCE = 0.5
-
-    LABEL_SIZE = 100
-    LABEL_HIGHLIGHT_SIZE = 200
-
-    ANCHOR_SIZE = 10
-    HIGHLIGHT_SIZE = 20
-
-    TEXT_OFFSET = np.array((0.0, 0, 0.25))
-
-    def __init__(self):
-        scene.SceneCanvas.__init__(self, keys=None, resizable=True, size=(2.0,2.0))
-        self.unfreeze()
-
-        self._view = self.central_widget.add_view()
-        self._view.bgcolor = '#ffffff'
-        self._view.camera = scene.TurntableCamera(
-            distance=10.0,
-            up='+z',
-            center=(0.0, 0.0, 1.0))
-
-        self._cf = scene.visuals.Markers(
-            pos=np.array([[0, 0, 0]]),
-            parent=self._view.scene,
-            face_color=self.POSITION_BRUSH)
-        self._anchor_contexts = {}
-
-        self.freeze()
-
-        plane_size = 10
-        scene.visuals.Plane(
-            width=plane_size,
-            height=plane_size,
-            width_segments=plane_size,
-            height_segments=plane_size,
-            color=(0.5, 0.5, 0.5, 0.5),
-            edge_color="gray",
-            parent=self._view.scene)
-
-        self.addArrows(1, 0.02, 0.1, 0.1, self._view.scene)
-
-    def addArrows(self, length, width, head_length, head_width, parent):
-        # The Arrow visual in vispy does not seem to work very good,
-        # draw arrows using lines instead.
-        w = width / 2
-        hw = head_width / 2
-        base_len = length - head_length
-
-        # X-axis
-        scene.visuals.LinePlot([
-            [0, w, 0],
-            [base_len, w, 0],
-            [base_len, hw, 0],
-            [length, 0, 0],
-            [base_len, -hw, 0],
-            [base_len, -w, 0],
-            [0, -w, 0]],
-            width=1.0, color='red', parent=parent, marker_size=0.0)
-
-        # Y-axis
-        scene.visuals.LinePlot([
-            [w, 0, 0],
-            [w, base_len, 0],
-            [hw, base_len, 0],
-            [0, length, 0],
-            [-hw, base_len, 0],
-            [-w, base_len, 0],
-            [-w, 0, 0]],
-            width=1.0, color='green', parent=parent, marker_size=0.0)
-
-        # Z-axis
-        scene.visuals.LinePlot([
-            [0, w, 0],
-            [0, w, base_len],
-            [0, hw, base_len],
-            [0, 0, length],
-            [0, -hw, base_len],
-            [0, -w, base_len],
-            [0, -w, 0]],
-            width=1.0, color='blue', parent=parent, marker_size=0.0)
-
-    def update_data(self, anchors, pos, display_mode):
-        self._cf.set_data(pos=np.array([pos]), face_color=self.POSITION_BRUSH)
-
-        for id, anchor in anchors.items():
-            self._update_anchor(id, anchor, display_mode)
-
-        self._purge_anchors(anchors.keys())
-
-    def _update_anchor(self, id, anchor, display_mode):
-        if anchor.is_active():
-            color = self.ANCHOR_BRUSH
-        else:
-            color = self.ANCHOR_BRUSH_INVALID
-
-        size = self.ANCHOR_SIZE
-        font_size = self.LABEL_SIZE
-        distance = anchor.distance
-        if display_mode is DisplayMode.identify_anchor:
-            if distance < self.VICINITY_DISTANCE:
-                amount = (distance - self.HIGHLIGHT_DISTANCE) / \
-                    (self.VICINITY_DISTANCE - self.HIGHLIGHT_DISTANCE)
-                color = self._mix(color, self.HIGHLIGHT_ANCHOR_BRUSH, amount)
-
-            if distance < self.HIGHLIGHT_DISTANCE:
-                color = self.HIGHLIGHT_ANCHOR_BRUSH
-                size = self.HIGHLIGHT_SIZE
-                font_size = self.LABEL_HIGHLIGHT_SIZE
-
-        marker_pos = anchor.get_position()
-        text_pos = self.TEXT_OFFSET + marker_pos
-        if id in self._anchor_contexts:
-            self._anchor_contexts[id][0].set_data(
-                pos=np.array([marker_pos]),
-                face_color=color,
-                size=size)
-
-            text = self._anchor_contexts[id][1]
-            text.pos = text_pos
-            text.font_size = font_size
-        else:
-            marker = scene.visuals.Markers(
-                pos=np.array([marker_pos]),
-                face_color=color,
-                size=size,
-                parent=self._view.scene)
-            text = scene.visuals.Text(
-                text=str(id),
-                font_size=font_size,
-                pos=text_pos,
-                parent=self._view.scene)
-            self._anchor_contexts[id] = [marker, text]
-
-    def _purge_anchors(self, keep):
-        to_remove = []
-        for id, context in self._anchor_contexts.items():
-            if id not in keep:
-                to_remove.append(id)
-                for visual in context:
-                    visual.parent = None
-        for id in to_remove:
-            self._anchor_contexts.pop(id)
-
-    def _mix(self, col1, col2, mix):
-        return col1 * mix + col2 * (1.0 - mix)
-
-
 class DisplayMode(Enum):
     identify_anchor = 1
     estimated_position = 2
@@ -344,6 +187,8 @@ class AnchorStateMachine:
 class LocoPositioningTab(TabToolbox, locopositioning_tab_class):
     """Tab for plotting Loco Positioning data"""
 
+    tab_toolbox_name = 'Loco Positioning'
+
     # Update period of log data in ms
     UPDATE_PERIOD_LOG = 100
 
@@ -376,7 +221,7 @@ class LocoPositioningTab(TabToolbox, locopositioning_tab_class):
     _anchor_data_updated_signal = pyqtSignal(object)
 
     def __init__(self, helper):
-        super(LocoPositioningTab, self).__init__(helper, 'Loco Positioning')
+        super(LocoPositioningTab, self).__init__(helper)
         self.setupUi(self)
 
         self._anchors = {}
@@ -465,6 +310,7 @@ class LocoPositioningTab(TabToolbox, locopositioning_tab_class):
         self._set_up_plots()
 
         self.is_loco_deck_active = False
+        self._log_subscriptions = []
 
         self._graph_timer = QTimer()
         self._graph_timer.setInterval(int(1000 / self.FPS))
@@ -489,6 +335,8 @@ class LocoPositioningTab(TabToolbox, locopositioning_tab_class):
             fkn(arg)
 
     def _set_up_plots(self):
+        # vispy is slow to import, only pull it in when the tab is created
+        from cfclient.ui.widgets.lps_plot3d import Plot3dLps
         self._plot_3d = Plot3dLps()
         self._plot_layout.addWidget(self._plot_3d.native)
 
@@ -610,6 +458,9 @@ class LocoPositioningTab(TabToolbox, locopositioning_tab_class):
     def _disconnected(self, link_uri):
         """Callback for when the Crazyflie has been disconnected"""
         logger.debug("Crazyflie disconnected from {}".format(link_uri))
+        for subscription in self._log_subscriptions:
+            self._helper.log_broker.unsubscribe(subscription)
+        self._log_subscriptions = []
         self._stop_polling_anchor_pos()
         self._clear_state()
         self._update_graphics()
@@ -622,19 +473,15 @@ class LocoPositioningTab(TabToolbox, locopositioning_tab_class):
 
     def _register_logblock(self, logblock_name, variables, data_cb, error_cb,
                            update_period=UPDATE_PERIOD_LOG):
-        """Register log data to listen for. One logblock can contain a limited
-        number of parameters (6 for floats)."""
-        lg = LogConfig(logblock_name, update_period)
-        for variable in variables:
-            if self._is_in_log_toc(variable):
-                lg.add_variable('{}.{}'.format(variable[0], variable[1]),
-                                variable[2])
-
-        self._helper.cf.log.add_config(lg)
-        lg.data_received_cb.add_callback(data_cb)
-        lg.error_cb.add_callback(error_cb)
-        lg.start()
-        return lg
+        """Register log data to listen for. The log broker shares log blocks with other
+        tabs and splits the variables over as many blocks as needed."""
+        subscription = self._helper.log_broker.subscribe(
+            logblock_name,
+            [('{}.{}'.format(variable[0], variable[1]), variable[2])
+             for variable in variables if self._is_in_log_toc(variable)],
+            update_period, data_cb, error_cb)
+        self._log_subscriptions.append(subscription)
+        return subscription
 
     def _is_in_log_toc(self, variable):
         toc = self._helper.cf.log.toc
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2022-2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+
+
+"""
+3D view of the Crazyflie and the base stations in the Lighthouse tab
+"""
+
+from vispy import scene
+import numpy as np
+
+__author__ = 'Bitcraze AB'
+__all__ = ['Plot3dLighthouse']
+
+
+class MarkerPose():
+    COL_X_AXIS = 'red'
+    COL_Y_AXIS = 'green'
+    COL_Z_AXIS = 'blue'
+
+    AXIS_LEN = 0.3
+
+    LABEL_SIZE = 100
+    LABEL_OFFSET = np.array((0.0, 0, 0.25))
+
+    def __init__(self, the_scene, color, text=None):
+        self._scene = the_scene
+        self._color = color
+        self._text = text
+
+        self._marker = scene.visuals.Markers(
+            pos=np.array([[0, 0, 0]]),
+            parent=self._scene,
+            face_color=self._color)
+
+        self._x_axis = scene.visuals.Line(
+            pos=np.array([[0, 0, 0], [0, 0, 0]]),
+            color=self.COL_X_AXIS,
+            parent=self._scene)
+
+        self._y_axis = scene.visuals.Line(pos=np.array(
+            [[0, 0, 0], [0, 0, 0]]),
+            color=self.COL_Y_AXIS,
+            parent=self._scene)
+
+        self._z_axis = scene.visuals.Line(
+            pos=np.array([[0, 0, 0], [0, 0, 0]]),
+            color=self.COL_Z_AXIS,
+            parent=self._scene)
+
+        self._label = None
+        if self._text:
+            self._label = scene.visuals.Text(
+                text=self._text,
+                font_size=self.LABEL_SIZE,
+                pos=self.LABEL_OFFSET,
+                parent=self._scene)
+
+    def set_pose(self, position, rot):
+        self._marker.set_data(pos=np.array([position]), face_color=self._color)
+
+        if self._label:
+            self._label.pos = self.LABEL_OFFSET + position
+
+        x_tip = np.dot(np.array(rot), np.array([self.AXIS_LEN, 0, 0]))
+        self._x_axis.set_data(np.array([position, x_tip + position]), color=self.COL_X_AXIS)
+
+        y_tip = np.dot(np.array(rot), np.array([0, self.AXIS_LEN, 0]))
+        self._y_axis.set_data(np.array([position, y_tip + position]), color=self.COL_Y_AXIS)
+
+        z_tip = np.dot(np.array(rot), np.array([0, 0, self.AXIS_LEN]))
+        self._z_axis.set_data(np.array([position, z_tip + position]), color=self.COL_Z_AXIS)
+
+    def remove(self):
+        self._marker.parent = None
+        self._x_axis.parent = None
+        self._y_axis.parent = None
+        self._z_axis.parent = None
+        if self._label:
+            self._label.parent = None
+
+    def set_color(self, color):
+        self._color = color
+        self._marker.set_data(face_color=self._color)
+
+
+class Plot3dLighthouse(scene.SceneCanvas):
+    POSITION_BRUSH = np.array((0, 0, 1.0))
+    BS_BRUSH_VISIBLE = np.array((0.2, 0.5, 0.2))
+    BS_BRUSH_NOT_VISIBLE = np.array((0.8, 0.5, 0.5))
+
+    VICINITY_DISTANCE = 2.5
+    HIGHLIGHT_DISTANCE = 0.5
+
+    LABEL_SIZE = 100
+    LABEL_HIGHLIGHT_SIZE = 200
+
+    HIGHLIGHT_SIZE = 20
+
+    TEXT_OFFSET = np.array((0.0, 0, 0.25))
+
+    def __init__(self):
+        scene.SceneCanvas.__init__(self, keys=None)
+        self.unfreeze()
+
+        self._view = self.central_widget.add_view()
+        self._view.bgcolor = '#ffffff'
+        self._view.camera = scene.TurntableCamera(
+            distance=10.0,
+            up='+z',
+            center=(0.0, 0.0, 1.0))
+
+        self._cf = None
+        self._base_stations = {}
+
+        self.freeze()
+
+        plane_size = 10
+        scene.visuals.Plane(
+            width=plane_size,
+            height=plane_size,
+            width_segments=plane_size,
+            height_segments=plane_size,
+            color=(0.5, 0.5, 0.5, 0.5),
+            edge_color="gray",
+            parent=self._view.scene)
+
+        self._addArrows(1, 0.02, 0.1, 0.1, self._view.scene)
+
+    def _addArrows(self, length, width, head_length, head_width, parent):
+        # The Arrow visual in vispy does not seem to work very good,
+        # draw arrows using lines instead.
+        w = width / 2
+        hw = head_width / 2
+        base_len = length - head_length
+
+        # X-axis
+        scene.visuals.LinePlot([
+            [0, w, 0],
+            [base_len, w, 0],
+            [base_len, hw, 0],
+            [length, 0, 0],
+            [base_len, -hw, 0],
+            [base_len, -w, 0],
+            [0, -w, 0]],
+            width=1.0, color='red', parent=parent, marker_size=0.0)
+
+        # Y-axis
+        scene.visuals.LinePlot([
+            [w, 0, 0],
+            [w, base_len, 0],
+            [hw, base_len, 0],
+            [0, length, 0],
+            [-hw, base_len, 0],
+            [-w, base_len, 0],
+            [-w, 0, 0]],
+            width=1.0, color='green', parent=parent, marker_size=0.0)
+
+        # Z-axis
+        scene.visuals.LinePlot([
+            [0, w, 0],
+            [0, w, base_len],
+            [0, hw, base_len],
+            [0, 0, length],
+            [0, -hw, base_len],
+            [0, -w, base_len],
+            [0, -w, 0]],
+            width=1.0, color='blue', parent=parent, marker_size=0.0)
+
+    def update_cf_pose(self, position, rot):
+        if not self._cf:
+            self._cf = MarkerPose(self._view.scene, self.POSITION_BRUSH)
+        self._cf.set_pose(position, rot)
+
+    def update_base_station_geos(self, geos):
+        for id, geo in geos.items():
+            if (geo is not None) and (id not in self._base_stations):
+                self._base_stations[id] = MarkerPose(self._view.scene, self.BS_BRUSH_NOT_VISIBLE, text=f"{id + 1}")
+            self._base_stations[id].set_pose(geo.origin, geo.rotation_matrix)
+
+        geos_to_remove = self._base_stations.keys() - geos.keys()
+        for id in geos_to_remove:
+            existing = self._base_stations.pop(id)
+            existing.remove()
+
+    def update_base_station_visibility(self, visibility):
+        for id, bs in self._base_stations.items():
+            if id in visibility:
+                bs.set_color(self.BS_BRUSH_VISIBLE)
+            else:
+                bs.set_color(self.BS_BRUSH_NOT_VISIBLE)
+
+    def clear(self):
+        if self._cf:
+            self._cf.remove()
+            self._cf = None
+
+        for bs in self._base_stations.values():
+            bs.remove()
+        self._base_stations = {}
+
+    def _mix(self, col1, col2, mix):
+        return col1 * mix + col2 * (1.0 - mix)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2018-2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+
+
+"""
+3D view of the Crazyflie and the anchors in the Loco Positioning tab
+"""
+
+from vispy import scene
+import numpy as np
+
+from cfclient.ui.tabs.locopositioning_tab import DisplayMode
+
+__author__ = 'Bitcraze AB'
+__all__ = ['Plot3dLps']
+
+
+class Plot3dLps(scene.SceneCanvas):
+    ANCHOR_BRUSH = np.array((0.2, 0.5, 0.2))
+    ANCHOR_BRUSH_INVALID = np.array((0.8, 0.5, 0.5))
+    HIGHLIGHT_ANCHOR_BRUSH = np.array((0, 1, 0))
+    POSITION_BRUSH = np.array((0, 0, 1.0))
+
+    VICINITY_DISTANCE = 2.5
+    HIGHLIGHT_DISTANCE = 0.5
+
+    LABEL_SIZE = 100
+    LABEL_HIGHLIGHT_SIZE = 200
+
+    ANCHOR_SIZE = 10
+    HIGHLIGHT_SIZE = 20
+
+    TEXT_OFFSET = np.array((0.0, 0, 0.25))
+
+    def __init__(self):
+        scene.SceneCanvas.__init__(self, keys=None, resizable=True, size=(2.0, 2.0))
+        self.unfreeze()
+
+        self._view = self.central_widget.add_view()
+        self._view.bgcolor = '#ffffff'
+        self._view.camera = scene.TurntableCamera(
+            distance=10.0,
+            up='+z',
+            center=(0.0, 0.0, 1.0))
+
+        self._cf = scene.visuals.Markers(
+            pos=np.array([[0, 0, 0]]),
+            parent=self._view.scene,
+            face_color=self.POSITION_BRUSH)
+        self._anchor_contexts = {}
+
+        self.freeze()
+
+        plane_size = 10
+        scene.visuals.Plane(
+            width=plane_size,
+            height=plane_size,
+            width_segments=plane_size,
+            height_segments=plane_size,
+            color=(0.5, 0.5, 0.5, 0.5),
+            edge_color="gray",
+            parent=self._view.scene)
+
+        self.addArrows(1, 0.02, 0.1, 0.1, self._view.scene)
+
+    def addArrows(self, length, width, head_length, head_width, parent):
+        # The Arrow visual in vispy does not seem to work very good,
+        # draw arrows using lines instead.
+        w = width / 2
+        hw = head_width / 2
+        base_len = length - head_length
+
+        # X-axis
+        scene.visuals.LinePlot([
+            [0, w, 0],
+            [base_len, w, 0],
+            [base_len, hw, 0],
+            [length, 0, 0],
+            [base_len, -hw, 0],
+            [base_len, -w, 0],
+            [0, -w, 0]],
+            width=1.0, color='red', parent=parent, marker_size=0.0)
+
+        # Y-axis
+        scene.visuals.LinePlot([
+            [w, 0, 0],
+            [w, base_len, 0],
+            [hw, base_len, 0],
+            [0, length, 0],
+            [-hw, base_len, 0],
+            [-w, base_len, 0],
+            [-w, 0, 0]],
+            width=1.0, color='green', parent=parent, marker_size=0.0)
+
+        # Z-axis
+        scene.visuals.LinePlot([
+            [0, w, 0],
+            [0, w, base_len],
+            [0, hw, base_len],
+            [0, 0, length],
+            [0, -hw, base_len],
+            [0, -w, base_len],
+            [0, -w, 0]],
+            width=1.0, color='blue', parent=parent, marker_size=0.0)
+
+    def update_data(self, anchors, pos, display_mode):
+        self._cf.set_data(pos=np.array([pos]), face_color=self.POSITION_BRUSH)
+
+        for id, anchor in anchors.items():
+            self._update_anchor(id, anchor, display_mode)
+
+        self._purge_anchors(anchors.keys())
+
+    def _update_anchor(self, id, anchor, display_mode):
+        if anchor.is_active():
+            color = self.ANCHOR_BRUSH
+        else:
+            color = self.ANCHOR_BRUSH_INVALID
+
+        size = self.ANCHOR_SIZE
+        font_size = self.LABEL_SIZE
+        distance = anchor.distance
+        if display_mode is DisplayMode.identify_anchor:
+            if distance < self.VICINITY_DISTANCE:
+                amount = (distance - self.HIGHLIGHT_DISTANCE) / \
+                    (self.VICINITY_DISTANCE - self.HIGHLIGHT_DISTANCE)
+                color = self._mix(color, self.HIGHLIGHT_ANCHOR_BRUSH, amount)
+
+            if distance < self.HIGHLIGHT_DISTANCE:
+                color = self.HIGHLIGHT_ANCHOR_BRUSH
+                size = self.HIGHLIGHT_SIZE
+                font_size = self.LABEL_HIGHLIGHT_SIZE
+
+        marker_pos = anchor.get_position()
+        text_pos = self.TEXT_OFFSET + marker_pos
+        if id in self._anchor_contexts:
+            self._anchor_contexts[id][0].set_data(
+                pos=np.array([marker_pos]),
+                face_color=color,
+                size=size)
+
+            text = self._anchor_contexts[id][1]
+            text.pos = text_pos
+            text.font_size = font_size
+        else:
+            marker = scene.visuals.Markers(
+                pos=np.array([marker_pos]),
+                face_color=color,
+                size=size,
+                parent=self._view.scene)
+            text = scene.visuals.Text(
+                text=str(id),
+                font_size=font_size,
+                pos=text_pos,
+                parent=self._view.scene)
+            self._anchor_contexts[id] = [marker, text]
+
+    def _purge_anchors(self, keep):
+        to_remove = []
+        for id, context in self._anchor_contexts.items():
+            if id not in keep:
+                to_remove.append(id)
+                for visual in context:
+                    visual.parent = None
+        for id in to_remove:
+            self._anchor_contexts.pop(id)
+
+    def _mix(self, col1, col2, mix):
+        return col1 * mix + col2 * (1.0 - mix)
@@ -32,17 +32,19 @@ and manipulating the plot.
 For more advanced plotting save the data and use an external application.
 """
 
-from PyQt6 import QtWidgets, uic
+from PyQt6 import QtWidgets
 
 from time import time
 
 import logging
+import sys
 
 from PyQt6.QtWidgets import QButtonGroup
 from PyQt6.QtCore import *  # noqa
 from PyQt6.QtWidgets import *  # noqa
 
 import cfclient
+from cfclient.utils.uicache import load_ui_type
 
 __author__ = 'Bitcraze AB'
 __all__ = ['PlotWidget']
@@ -50,32 +52,49 @@ __all__ = ['PlotWidget']
 logger = logging.getLogger(__name__)
 
 (plot_widget_class, connect_widget_base_class) = (
-    uic.loadUiType(cfclient.module_path + '/ui/widgets/plotter.ui'))
-
-# Try the imports for PyQtGraph to see if it is installed
-try:
-    import pyqtgraph as pg
-    from pyqtgraph import ViewBox
-    import pyqtgraph.console  # noqa
-    import numpy as np  # noqa
-
-    _pyqtgraph_found = True
-except Exception:
-    import traceback
-
-    logger.warning("PyQtGraph (or dependency) failed to import:\n%s",
-                   traceback.format_exc())
-    _pyqtgraph_found = False
-
-# This is required to force py2exe to pull in the correct dependencies on
-# Windows. But for Linux this is not required and might not be installed with
-# the PyQtGraph package.
-try:
-    from scipy.stats import futil  # noqa
-    from scipy.sparse.csgraph import _validation  # noqa
-    from scipy.special import _ufuncs_cxx  # noqa
-except Exception:
-    pass
+    load_ui_type(cfclient.module_path + '/ui/widgets/plotter.ui'))
+
+# PyQtGraph (and the numpy/scipy parts it pulls in) is slow to import, it is
+# imported the first time a plot is created instead of at startup
+pg = None
+ViewBox = None
+_pyqtgraph_found = None
+
+
+def _import_pyqtgraph():
+    """Import PyQtGraph, returns True if it is installed"""
+    global pg, ViewBox, _pyqtgraph_found
+
+    if _pyqtgraph_found is not None:
+        return _pyqtgraph_found
+
+    try:
+        import pyqtgraph
+        import pyqtgraph.console  # noqa
+        import numpy as np  # noqa
+
+        pg = pyqtgraph
+        ViewBox = pyqtgraph.ViewBox
+        _pyqtgraph_found = True
+    except Exception:
+        import traceback
+
+        logger.warning("PyQtGraph (or dependency) failed to import:\n%s",
+                       traceback.format_exc())
+        _pyqtgraph_found = False
+
+    # This is required to force py2exe to pull in the correct dependencies on
+    # Windows. But for Linux this is not required and might not be installed
+    # with the PyQtGraph package.
+    if hasattr(sys, 'frozen'):
+        try:
+            from scipy.stats import futil  # noqa
+            from scipy.sparse.csgraph import _validation  # noqa
+            from scipy.special import _ufuncs_cxx  # noqa
+        except Exception:
+            pass
+
+    return _pyqtgraph_found
 
 
 class PlotItemWrapper:
@@ -119,7 +138,7 @@ class PlotWidget(QtWidgets.QWidget, plot_widget_class):
         self._delay = 0.1
 
         # Check if we could import PyQtGraph, if not then stop here
-        if not _pyqtgraph_found:
+        if not _import_pyqtgraph():
             self.can_enable = False
             return
         else:
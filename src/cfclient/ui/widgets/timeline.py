@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+"""
+Waterfall view of a connection timeline recorded by the ConnectionProfiler.
+"""
+
+from PyQt6 import QtGui
+from PyQt6 import QtWidgets
+from PyQt6.QtCore import QRectF
+from PyQt6.QtCore import Qt
+
+__author__ = 'Bitcraze AB'
+__all__ = ['TimelineWidget']
+
+
+class TimelineWidget(QtWidgets.QWidget):
+    """Widget drawing connection phases and log blocks as a waterfall"""
+
+    ROW_HEIGHT = 18
+    LABEL_WIDTH = 220
+    MARGIN = 8
+    # Space kept to the right of the bars for the end time
+    TIME_WIDTH = 60
+
+    COLOR_PHASE = QtGui.QColor(60, 120, 200)
+    COLOR_CREATING = QtGui.QColor(230, 180, 60)
+    COLOR_STARTING = QtGui.QColor(90, 180, 90)
+    COLOR_FIRST_DATA = QtGui.QColor(150, 210, 150)
+    COLOR_ERROR = QtGui.QColor(210, 60, 60)
+
+    def __init__(self, *args):
+        super(TimelineWidget, self).__init__(*args)
+        self._rows = []
+        self._total = 0.0
+
+    def set_timeline(self, timeline):
+        """Set the timeline (as returned by ConnectionProfiler.timeline())"""
+        self._rows = []
+        for phase in timeline['phases']:
+            self._rows.append((phase['name'], [
+                (phase['start'], phase['end'], self.COLOR_PHASE)]))
+
+        for block in timeline['log_blocks']:
+            label = '{} ({} ms)'.format(block['name'], block['period_ms'])
+            segments = []
+            last = block['added']
+            for key, color in (('created', self.COLOR_CREATING),
+                               ('started', self.COLOR_STARTING),
+                               ('first_data', self.COLOR_FIRST_DATA)):
+                if block[key] is not None:
+                    segments.append((last, block[key], color))
+                    last = block[key]
+            if block['error'] is not None:
+                segments.append((block['error'], block['error'],
+                                 self.COLOR_ERROR))
+            if not segments:
+                segments.append((last, last, self.COLOR_CREATING))
+            self._rows.append((label, segments))
+
+        self._total = timeline['total']
+        self.setMinimumHeight(2 * self.MARGIN +
+                              (len(self._rows) + 1) * self.ROW_HEIGHT)
+        self.update()
+
+    def paintEvent(self, event):
+        qp = QtGui.QPainter(self)
+        qp.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+
+        text_color = self.palette().color(QtGui.QPalette.ColorRole.WindowText)
+        x0 = self.LABEL_WIDTH
+        width = max(self.width() - x0 - self.TIME_WIDTH - self.MARGIN, 1)
+        scale = width / self._total if self._total > 0 else 0
+
+        y = self.MARGIN
+        qp.setPen(text_color)
+        qp.drawText(self.MARGIN, y, x0 - self.MARGIN, self.ROW_HEIGHT,
+                    Qt.AlignmentFlag.AlignVCenter, 'Total')
+        qp.drawText(x0, y, width, self.ROW_HEIGHT,
+                    Qt.AlignmentFlag.AlignVCenter,
+                    '{:.0f} ms'.format(self._total * 1000))
+
+        for label, segments in self._rows:
+            y += self.ROW_HEIGHT
+            qp.setPen(text_color)
+            qp.drawText(self.MARGIN, y, x0 - self.MARGIN, self.ROW_HEIGHT,
+                        Qt.AlignmentFlag.AlignVCenter, label)
+
+            qp.setPen(Qt.PenStyle.NoPen)
+            for start, end, color in segments:
+                # Make sure that events without duration are visible
+                bar_width = max((end - start) * scale, 2)
+                qp.setBrush(color)
+                qp.drawRect(QRectF(x0 + start * scale, y + 3, bar_width,
+                                   self.ROW_HEIGHT - 6))
+
+            end = segments[-1][1]
+            qp.setPen(text_color)
+            qp.drawText(int(x0 + end * scale) + 4, y, self.TIME_WIDTH,
+                        self.ROW_HEIGHT,
+                        Qt.AlignmentFlag.AlignVCenter,
+                        '{:.0f} ms'.format(end * 1000))
+
+        qp.end()
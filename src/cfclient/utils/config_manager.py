@@ -35,7 +35,6 @@ import json
 import logging
 import glob
 import os
-import copy
 
 from .singleton import Singleton
 from cflib.utils.callbacks import Caller
@@ -107,7 +106,9 @@ class ConfigManager(metaclass=Singleton):
                             except Exception:
                                 ids = [a["id"]]
                             for id in ids:
-                                locaxis = copy.deepcopy(axis)
+                                # The values are not containers, a shallow
+                                # copy is enough
+                                locaxis = dict(axis)
                                 if "ids" in a:
                                     if id == a["ids"][0]:
                                         locaxis["scale"] = locaxis[
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+"""
+Records a timeline of the connection to a Crazyflie, from the moment the
+connection is requested until all log blocks are up and running.
+
+The timeline contains the connection phases (link setup, log TOC, memories,
+param TOC and param values) and, for every log block that is added during the
+connection, when it was added, acknowledged as created and started by the
+Crazyflie and when the first data arrived.
+"""
+
+import json
+import logging
+import threading
+import time
+
+from cflib.utils.callbacks import Caller
+
+__author__ = 'Bitcraze AB'
+__all__ = ['ConnectionProfiler']
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionProfiler:
+    """Timestamps the phases of connecting to a Crazyflie"""
+
+    PHASE_LINK = 'Link setup'
+    PHASE_LOG_TOC = 'Log TOC'
+    PHASE_MEMORIES = 'Memories'
+    PHASE_PARAM_TOC = 'Param TOC'
+    PHASE_PARAM_VALUES = 'Param values'
+
+    # Time without any new events, after the connection is fully set up,
+    # before the timeline is considered finished
+    QUIET_PERIOD = 1.0
+
+    # Crazyflie internal callbacks marking the end of the phases that are not
+    # reported through public callbacks
+    _INTERNAL_PHASES = (
+        ('_log_toc_updated_cb', PHASE_LOG_TOC),
+        ('_mems_updated_cb', PHASE_MEMORIES),
+    )
+
+    def __init__(self, cf):
+        self._cf = cf
+        self._lock = threading.Lock()
+        self._finish_timer = None
+
+        # Called with the profiler when the timeline is finished
+        self.finished = Caller()
+
+        self._reset(None)
+
+        cf.connection_requested.add_callback(self._connection_requested)
+        cf.link_established.add_callback(
+            lambda uri: self._phase_done(self.PHASE_LINK))
+        cf.connected.add_callback(
+            lambda uri: self._phase_done(self.PHASE_PARAM_TOC))
+        cf.fully_connected.add_callback(self._fully_connected)
+        cf.disconnected.add_callback(self._disconnected)
+        cf.log.block_added_cb.add_callback(self._block_added)
+
+        for name, phase in self._INTERNAL_PHASES:
+            self._wrap_internal_callback(name, phase)
+
+    def _wrap_internal_callback(self, name, phase):
+        original = getattr(self._cf, name, None)
+        if original is None:
+            logger.info('Can not profile phase %s', phase)
+            return
+
+        def wrapper(*args, **kwargs):
+            self._phase_done(phase)
+            return original(*args, **kwargs)
+
+        setattr(self._cf, name, wrapper)
+
+    def _reset(self, uri):
+        self._uri = uri
+        self._start = time.perf_counter()
+        self._start_wall = time.time()
+        self._phases = []
+        self._blocks = []
+        # Callbacks added to the log configurations, removed when the
+        # timeline is finished or the Crazyflie disconnects
+        self._block_callbacks = []
+        self._events = []
+        self._last_phase_end = 0.0
+        self._is_fully_connected = False
+        self._done = False
+
+    def _now(self):
+        return time.perf_counter() - self._start
+
+    def _event(self, event, name=''):
+        t = self._now()
+        self._events.append({'t': t, 'event': event, 'name': name})
+        return t
+
+    def _connection_requested(self, uri):
+        with self._lock:
+            self._cancel_finish()
+            self._remove_block_callbacks()
+            self._reset(uri)
+            self._event('connection_requested', uri)
+
+    def _phase_done(self, phase):
+        with self._lock:
+            if self._uri is None or self._done:
+                return
+            t = self._event('phase_done', phase)
+            self._phases.append({'name': phase,
+                                 'start': self._last_phase_end,
+                                 'end': t})
+            self._last_phase_end = t
+
+    def _fully_connected(self, uri):
+        self._phase_done(self.PHASE_PARAM_VALUES)
+        with self._lock:
+            self._is_fully_connected = True
+            self._schedule_finish()
+
+    def _disconnected(self, uri):
+        with self._lock:
+            if self._uri is not None and not self._done:
+                self._event('disconnected', uri)
+            self._cancel_finish()
+            self._remove_block_callbacks()
+
+    def _block_added(self, logconf):
+        with self._lock:
+            if self._uri is None or self._done:
+                return
+            block = {'name': logconf.name,
+                     'period_ms': logconf.period_in_ms,
+                     'variables': len(logconf.variables),
+                     'added': self._event('block_added', logconf.name),
+                     'created': None,
+                     'started': None,
+                     'first_data': None,
+                     'error': None,
+                     'error_msg': None}
+            self._blocks.append(block)
+            self._schedule_finish()
+
+        def added(conf, is_added):
+            if is_added:
+                self._block_event(block, 'created')
+
+        def started(conf, is_started):
+            if is_started:
+                self._block_event(block, 'started')
+
+        def first_data(timestamp, data, conf):
+            logconf.data_received_cb.remove_callback(first_data)
+            self._block_event(block, 'first_data')
+
+        def error(conf, msg):
+            self._block_event(block, 'error', msg)
+
+        callbacks = [(logconf.added_cb, added),
+                     (logconf.started_cb, started),
+                     (logconf.data_received_cb, first_data),
+                     (logconf.error_cb, error)]
+        for caller, callback in callbacks:
+            caller.add_callback(callback)
+        with self._lock:
+            self._block_callbacks += callbacks
+
+    def _block_event(self, block, event, msg=None):
+        with self._lock:
+            if self._done or block[event] is not None:
+                return
+            block[event] = self._event('block_' + event, block['name'])
+            if msg is not None:
+                block[event + '_msg'] = msg
+            self._schedule_finish()
+
+    def _remove_block_callbacks(self):
+        for caller, callback in self._block_callbacks:
+            if callback in caller.callbacks:
+                caller.remove_callback(callback)
+        self._block_callbacks = []
+
+    def _schedule_finish(self):
+        if not self._is_fully_connected or self._done:
+            return
+        self._cancel_finish()
+        self._finish_timer = threading.Timer(self.QUIET_PERIOD, self._finish)
+        self._finish_timer.daemon = True
+        self._finish_timer.start()
+
+    def _cancel_finish(self):
+        if self._finish_timer is not None:
+            self._finish_timer.cancel()
+            self._finish_timer = None
+
+    def _finish(self):
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+            self._finish_timer = None
+            self._remove_block_callbacks()
+        logger.info('Connection to %s finished after %.3f s',
+                    self._uri, self.timeline()['total'])
+        self.finished.call(self)
+
+    def is_finished(self):
+        """Return True when the connection is set up and logging"""
+        return self._done
+
+    def timeline(self):
+        """
+        Return the timeline of the last connection as a dict. All times are
+        in seconds from when the connection was requested.
+        """
+        with self._lock:
+            blocks = [dict(b) for b in self._blocks]
+            times = [e['t'] for e in self._events
+                     if e['event'] != 'disconnected']
+            return {
+                'uri': self._uri,
+                'requested_at': self._start_wall,
+                'total': max(times) if times else 0.0,
+                'finished': self._done,
+                'phases': [dict(p) for p in self._phases],
+                'log_blocks': blocks,
+                'events': [dict(e) for e in self._events],
+            }
+
+    def to_json(self):
+        """Return the timeline as a JSON string"""
+        return json.dumps(self.timeline(), indent=2)
+
+    def dump(self, path):
+        """Write the timeline as JSON to a file"""
+        with open(path, 'w') as f:
+            f.write(self.to_json())
@@ -44,6 +44,8 @@ import glob
 import traceback
 import logging
 import shutil
+import threading
+import time
 
 from . import inputreaders as readers
 from . import inputinterfaces as interfaces
@@ -69,6 +71,8 @@ MAX_TARGET_HEIGHT = 1.0
 MIN_TARGET_HEIGHT = 0.03
 MIN_HOVER_HEIGHT = 0.20
 INPUT_READ_PERIOD = 0.01
+# Shortest time between two reads pushed by input device events (s)
+INPUT_MIN_PUSH_PERIOD = 0.005
 
 
 class JoystickReader(object):
@@ -145,6 +149,9 @@ class JoystickReader(object):
 
         # TODO: The polling interval should be set from config file
         self._read_timer = PeriodicTimer(INPUT_READ_PERIOD, self.read_input)
+        # Reads are made by the timer and by devices pushing their events
+        self._read_lock = threading.Lock()
+        self._last_pushed_read = 0.0
 
         if do_device_discovery:
             self._discovery_timer = PeriodicTimer(1.0,
@@ -325,6 +332,7 @@ class JoystickReader(object):
             # device_id = self._available_devices[device_name]
             # Check if we supplied a new map, if not use the preferred one
             device = self._get_device_from_name(device_name)
+            device.event_callback = self._device_event_received
             self._selected_mux.add_device(device, role)
             # Update the UI with the limiting for this device
             self.limiting_updated.call(device.limit_rp,
@@ -350,6 +358,11 @@ class JoystickReader(object):
         """Stop reading from the input device."""
         self._read_timer.stop()
         self._selected_mux.pause()
+        logger.debug("Input read loop: {}".format(self._read_timer.stats()))
+
+    def read_stats(self):
+        """Statistics of the input read loop, see PeriodicTimerStats"""
+        return self._read_timer.stats()
 
     def _set_thrust_slew_rate(self, rate):
         self._thrust_slew_rate = rate
@@ -361,8 +374,23 @@ class JoystickReader(object):
     def _get_thrust_slew_rate(self):
         return self._thrust_slew_rate
 
+    def _device_event_received(self, device):
+        """
+        Called from the reader thread of devices that push their events, the
+        input is read at once instead of at the next period of the timer
+        """
+        now = time.monotonic()
+        if now - self._last_pushed_read < INPUT_MIN_PUSH_PERIOD:
+            return
+        self._last_pushed_read = now
+        self.read_input()
+
     def read_input(self):
         """Read input data from the selected device"""
+        with self._read_lock:
+            self._read_input()
+
+    def _read_input(self):
         try:
             data = self._selected_mux.read()
 
@@ -34,6 +34,9 @@ directory and it will be picked up automatically.
 """
 
 import logging
+
+import numpy as np
+
 from ..inputreaderinterface import InputReaderInterface
 
 __author__ = 'Bitcraze AB'
@@ -80,9 +83,72 @@ def devices():
     return available_devices
 
 
+class _CompiledInputMap:
+    """
+    Input map compiled to arrays: for the axes the device axis, offset,
+    scale and index of the input axis of every mapping, and for the buttons
+    the mask of the device buttons mapped to every input button.
+    """
+
+    def __init__(self, input_map, axes, buttons):
+        self.axes = axes
+        self.buttons = buttons
+        axis_ids = []
+        axis_keys = []
+        offsets = []
+        scales = []
+        masks = dict((key, 0) for key in buttons)
+
+        for index, mapping in (input_map or {}).items():
+            try:
+                kind, number = index.rsplit("-", 1)
+                number = int(number)
+                if kind != mapping["type"]:
+                    continue
+                key = mapping["key"]
+                if kind == "Input.AXIS" and key in axes:
+                    offset = float(mapping["offset"])
+                    scale = float(mapping["scale"])
+                    axis_ids.append(number)
+                    axis_keys.append(axes.index(key))
+                    offsets.append(offset)
+                    scales.append(scale)
+                elif kind == "Input.BUTTON" and key in buttons:
+                    masks[key] |= 1 << number
+            except (KeyError, TypeError, ValueError, AttributeError):
+                # Not a mapping of an axis or a button, ignore..
+                pass
+
+        self.axis_ids = np.array(axis_ids, dtype=np.intp)
+        self.axis_keys = np.array(axis_keys, dtype=np.intp)
+        self.offsets = np.array(offsets)
+        self.scales = np.array(scales)
+        self.button_masks = list(masks.items())
+        # Mappings of the axes the device has, by number of axes
+        self._valid = {}
+
+    def map_axes(self, axes):
+        """Values of the input axes, in the order of self.axes"""
+        count = len(axes)
+        valid = self._valid.get(count)
+        if valid is None:
+            valid = self._valid[count] = np.flatnonzero(self.axis_ids < count)
+        values = (np.asarray(axes, dtype=float)[self.axis_ids[valid]] +
+                  self.offsets[valid]) / self.scales[valid]
+        return np.bincount(self.axis_keys[valid], weights=values,
+                           minlength=len(self.axes)).tolist()
+
+    def map_buttons(self, buttons):
+        """(input button, pressed) of all the input buttons"""
+        pressed = np.packbits(np.asarray(buttons) == 1, bitorder="little")
+        state = int.from_bytes(pressed.tobytes(), "little")
+        return [(key, state & mask != 0) for key, mask in self.button_masks]
+
+
 class InputDevice(InputReaderInterface):
 
     def __init__(self, dev_name, dev_id, dev_reader):
+        self._compiled_map = None
         super(InputDevice, self).__init__(dev_name, dev_id, dev_reader)
 
         # All devices supports mapping (and can be configured)
@@ -94,50 +160,66 @@ class InputDevice(InputReaderInterface):
         self.limit_yaw = True
         self.db = 0.
 
+        # Kernel time (ms) of the last event of readers that push events
+        self.timestamp = None
+        # Called with the device when the reader has new events, if the
+        # reader pushes them instead of being polled
+        self.event_callback = None
+
+    @property
+    def input_map(self):
+        return self._input_map
+
+    @input_map.setter
+    def input_map(self, input_map):
+        """
+        The map is compiled when it is set, maps changed in place must be set
+        again
+        """
+        self._input_map = input_map
+        self._compiled_map = None
+
+    def _compile_input_map(self):
+        data = self.data
+        self._compiled_map = _CompiledInputMap(self._input_map, data._axes,
+                                               data._buttons)
+        return self._compiled_map
+
     def open(self):
         # TODO: Reset data?
         self._reader.open(self.id)
+        if hasattr(self._reader, "set_event_callback"):
+            self._reader.set_event_callback(self.id, self._event_received)
 
     def close(self):
+        if hasattr(self._reader, "set_event_callback"):
+            self._reader.set_event_callback(self.id, None)
         self._reader.close(self.id)
 
+    def _event_received(self, timestamp):
+        self.timestamp = timestamp
+        if self.event_callback:
+            self.event_callback(self)
+
     def set_dead_band(self, db):
         self.db = db
 
     def read(self, include_raw=False):
         [axis, buttons] = self._reader.read(self.id)
 
-        # To support split axis we need to zero all the axis
-        self.data.reset_axes()
-
-        i = 0
-        for a in axis:
-            index = "Input.AXIS-%d" % i
-            try:
-                if self.input_map[index]["type"] == "Input.AXIS":
-                    key = self.input_map[index]["key"]
-                    axisvalue = a + self.input_map[index]["offset"]
-                    axisvalue = axisvalue / self.input_map[index]["scale"]
-                    self.data.set(key, axisvalue + self.data.get(key))
-            except (KeyError, TypeError):
-                pass
-            i += 1
+        data = self.data
+        compiled = self._compiled_map
+        if compiled is None:
+            compiled = self._compile_input_map()
 
-        # Workaround for fixing issues during mapping (remapping buttons while
-        # they are pressed.
-        self.data.reset_buttons()
+        # Several device axes can be mapped to the same input axis (split
+        # axis), their values are added
+        for key, value in zip(compiled.axes, compiled.map_axes(axis)):
+            data.__dict__[key] = value
 
-        i = 0
-        for b in buttons:
-            index = "Input.BUTTON-%d" % i
-            try:
-                if self.input_map[index]["type"] == "Input.BUTTON":
-                    key = self.input_map[index]["key"]
-                    self.data.set(key, True if b == 1 else False)
-            except (KeyError, TypeError):
-                # Button not mapped, ignore..
-                pass
-            i += 1
+        for key, value in compiled.map_buttons(buttons):
+            data.toggled[key] = data._check_toggle(key, value)
+            data.__dict__[key] = value
 
         self.data.roll = InputDevice.deadband(self.data.roll, self.db)
         self.data.pitch = InputDevice.deadband(self.data.pitch, self.db)
@@ -27,13 +27,21 @@ Linux joystick driver using the Linux input_joystick subsystem. Requires sysfs
 to be mounted on /sys and /dev/input/js* to be readable.
 
 This module is very linux specific but should work on any CPU platform
+
+Every opened device has a reader thread that blocks until the device has
+events and reads all of them at once, so the state of the device is
+up to date as soon as the kernel has it. The event_callback of the device,
+set with Joystick.set_event_callback(), is called from the thread with the
+kernel timestamp of the last event read.
 """
 import ctypes
 import glob
 import logging
 import os
+import select
 import struct
 import sys
+import threading
 
 if not sys.platform.startswith('linux'):
     raise Exception("Only supported on Linux")
@@ -58,6 +66,9 @@ JS_EVENT_BUTTON = 0x001
 JS_EVENT_AXIS = 0x002
 JS_EVENT_INIT = 0x080
 
+# Largest number of events read at once
+READ_EVENTS = 64
+
 # ioctls
 JSIOCGAXES = 0x80016a11
 JSIOCGBUTTONS = 0x80016a12
@@ -71,14 +82,16 @@ class JEvent(object):
     Joystick event class. Encapsulate single joystick event.
     """
 
-    def __init__(self, evt_type, number, value):
+    def __init__(self, evt_type, number, value, timestamp=None):
         self.type = evt_type
         self.number = number
         self.value = value
+        # Kernel time of the event (ms)
+        self.timestamp = timestamp
 
     def __repr__(self):
-        return "JEvent(type={}, number={}, value={})".format(
-            self.type, self.number, self.value)
+        return "JEvent(type={}, number={}, value={}, timestamp={})".format(
+            self.type, self.number, self.value, self.timestamp)
 
 
 # Constants
@@ -99,12 +112,25 @@ class _JS():
         self.axes = []
         self._prev_pressed = {}
 
+        # Kernel time (ms) of the last event read
+        self.timestamp = None
+        # Called with the timestamp from the reader thread when events have
+        # been read
+        self.event_callback = None
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wake = None
+        self._pending = b""
+        self._error = None
+
     def open(self):
         if self._f:
             raise Exception("{} at {} is already "
                             "opened".format(self.name, self._f_name))
 
-        self._f = open("/dev/input/js{}".format(self.num), "rb")
+        # Unbuffered, the events are read in bulk from the file descriptor
+        self._f = open("/dev/input/js{}".format(self.num), "rb", buffering=0)
         fcntl.fcntl(self._f.fileno(), fcntl.F_SETFL, os.O_NONBLOCK)
 
         # Get number of axis and button
@@ -121,8 +147,17 @@ class _JS():
             raise Exception("Failed to read number of axes")
 
         self.buttons = list(0 for i in range(val.value))
+        self._pending = b""
+        self._error = None
         self.__initvalues()
 
+        self._wake = os.pipe()
+        self._thread = threading.Thread(target=self._read_events,
+                                        args=(self._f.fileno(), self._wake[0]),
+                                        name="linuxjsdev-{}".format(self.num),
+                                        daemon=True)
+        self._thread.start()
+
     def close(self):
         """Open the joystick device"""
         if not self._f:
@@ -130,66 +165,106 @@ class _JS():
 
         logger.info("Closed {} ({})".format(self.name, self.num))
 
+        if self._thread:
+            os.write(self._wake[1], b"\0")
+            self._thread.join()
+            self._thread = None
+            os.close(self._wake[0])
+            os.close(self._wake[1])
+            self._wake = None
+
         self._f.close()
         self._f = None
 
     def __initvalues(self):
         """Read the buttons and axes initial values from the js device"""
-        for _ in range(len(self.axes) + len(self.buttons)):
-            data = self._f.read(struct.calcsize(JS_EVENT_FMT))
-            jsdata = struct.unpack(JS_EVENT_FMT, data)
-            self.__updatestate(jsdata)
+        size = struct.calcsize(JS_EVENT_FMT)
+        try:
+            data = os.read(self._f.fileno(),
+                           size * (len(self.axes) + len(self.buttons)))
+        except BlockingIOError:
+            return
+        self.__updatestate(data)
 
-    def __updatestate(self, jsdata):
-        """Update the internal absolute state of buttons and axes"""
-        if jsdata[JE_TYPE] & JS_EVENT_AXIS != 0:
-            self.axes[jsdata[JE_NUMBER]] = jsdata[JE_VALUE] / 32768.0
-        elif jsdata[JE_TYPE] & JS_EVENT_BUTTON != 0:
-            self.buttons[jsdata[JE_NUMBER]] = jsdata[JE_VALUE]
+    def __updatestate(self, data):
+        """
+        Update the internal absolute state of buttons and axes from the
+        events in data, returns the time of the last one or None
+        """
+        data = self._pending + data
+        end = len(data) - len(data) % struct.calcsize(JS_EVENT_FMT)
+        self._pending = data[end:]
+        timestamp = None
+        with self._lock:
+            for timestamp, value, evt_type, number in \
+                    struct.iter_unpack(JS_EVENT_FMT, data[:end]):
+                if evt_type & JS_EVENT_AXIS != 0:
+                    self.axes[number] = value / 32768.0
+                elif evt_type & JS_EVENT_BUTTON != 0:
+                    self.buttons[number] = value
+            if timestamp is not None:
+                self.timestamp = timestamp
+        return timestamp
 
     def __decode_event(self, jsdata):
         """ Decode a jsdev event into a dict """
-        # TODO: Add timestamp?
         if jsdata[JE_TYPE] & JS_EVENT_AXIS != 0:
             return JEvent(evt_type=TYPE_AXIS,
                           number=jsdata[JE_NUMBER],
-                          value=jsdata[JE_VALUE] / 32768.0)
+                          value=jsdata[JE_VALUE] / 32768.0,
+                          timestamp=jsdata[JE_TIME])
         if jsdata[JE_TYPE] & JS_EVENT_BUTTON != 0:
             return JEvent(evt_type=TYPE_BUTTON,
                           number=jsdata[JE_NUMBER],
-                          value=jsdata[JE_VALUE] / 32768.0)
+                          value=jsdata[JE_VALUE] / 32768.0,
+                          timestamp=jsdata[JE_TIME])
 
-    def _read_all_events(self):
-        """Consume all the events queued up in the JS device"""
+    def _read_events(self, fd, wake_fd):
+        """
+        Reader thread, waits for events and reads all the queued ones at
+        once until the device is closed or disconnected
+        """
+        size = struct.calcsize(JS_EVENT_FMT)
+        poller = select.epoll()
+        poller.register(fd, select.EPOLLIN)
+        poller.register(wake_fd, select.EPOLLIN)
         try:
             while True:
-                data = self._f.read(struct.calcsize(JS_EVENT_FMT))
-                jsdata = struct.unpack(JS_EVENT_FMT, data)
-                self.__updatestate(jsdata)
-        except IOError as e:
-            if e.errno != 11:
-                logger.info(str(e))
-                self._f.close()
-                self._f = None
-                raise IOError("Device has been disconnected")
-        except TypeError:
-            pass
-        except ValueError:
-            # This will happen if I/O operations are done on a closed device,
-            # which is the case when you first close and then open the device
-            # while switching device. But, in order for SDL2 to work on Linux
-            # (for debugging) the device needs to be closed before it's opened.
-            # This is the workaround to make both cases work.
-            pass
+                ready = poller.poll()
+                if any(ready_fd == wake_fd for ready_fd, _ in ready):
+                    return
+                try:
+                    data = os.read(fd, size * READ_EVENTS)
+                except BlockingIOError:
+                    continue
+                except OSError as e:
+                    self._error = e
+                    return
+                if not data:
+                    self._error = IOError("End of file")
+                    return
+                timestamp = self.__updatestate(data)
+                callback = self.event_callback
+                if timestamp is not None and callback:
+                    try:
+                        callback(timestamp)
+                    except Exception:
+                        logger.exception("Error in joystick event callback")
+        finally:
+            poller.close()
 
     def read(self):
         """ Returns a list of all joystick event since the last call """
         if not self._f:
             raise Exception("Joystick device not opened")
 
-        self._read_all_events()
+        if self._error is not None:
+            logger.info(str(self._error))
+            self.close()
+            raise IOError("Device has been disconnected")
 
-        return [self.axes, self.buttons]
+        with self._lock:
+            return [list(self.axes), list(self.buttons)]
 
 
 class Joystick():
@@ -234,3 +309,11 @@ class Joystick():
     def read(self, device_id):
         """ Returns a list of all joystick event since the last call """
         return self._js[device_id].read()
+
+    def set_event_callback(self, device_id, callback):
+        """
+        Set the function called with the kernel timestamp (ms) of the last
+        event when events are read from the device, None to remove it. It is
+        called from the reader thread of the device.
+        """
+        self._js[device_id].event_callback = callback
@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+"""
+Central broker for log data from the Crazyflie.
+
+Consumers subscribe to a set of log variables at a minimum rate instead of
+adding log blocks of their own. The broker merges the subscriptions into as
+few log blocks as possible, runs each block at the fastest rate any of its
+subscribers needs and fans the received samples out to the subscribers. The
+variables are reference counted and a log block is removed from the Crazyflie
+when no subscription needs any of its variables anymore.
+
+Subscriptions live across connections, when the Crazyflie is connected the
+log blocks are created from the current subscriptions.
+"""
+
+import logging
+import threading
+
+from cflib.crazyflie.log import LogConfig
+from cflib.crazyflie.log import LogTocElement
+from cflib.utils.callbacks import Caller
+
+__author__ = 'Bitcraze AB'
+__all__ = ['LogBroker', 'LogSubscription']
+
+logger = logging.getLogger(__name__)
+
+
+class LogSubscription:
+    """
+    A set of log variables a consumer wants to receive. The callbacks have
+    the same signature as the ones in a LogConfig, data_received_cb is called
+    with (timestamp, data, subscription) and error_cb with
+    (subscription, msg).
+    """
+
+    def __init__(self, name, variables, period_in_ms):
+        self.name = name
+        self.period_in_ms = period_in_ms
+        # List of (complete name, fetch_as), a fetch_as of None means the
+        # type used in the Crazyflie
+        self.variables = variables
+
+        self.data_received_cb = Caller()
+        self.error_cb = Caller()
+
+        # Variables that could be added to a log block for the current
+        # connection
+        self._available = []
+
+    @property
+    def variable_names(self):
+        return [name for name, _ in self.variables]
+
+
+class _Block:
+    """A log block on the Crazyflie shared by one or more subscriptions"""
+
+    def __init__(self, logconf, names):
+        self.logconf = logconf
+        self.names = names
+
+
+class LogBroker:
+    """Shares log blocks between the consumers of log data"""
+
+    # Limits of the log block period in the Crazyflie (in 10 ms steps)
+    MIN_PERIOD_MS = 10
+    MAX_PERIOD_MS = 2540
+
+    def __init__(self, cf):
+        self._cf = cf
+        self._lock = threading.RLock()
+
+        self._subscriptions = []
+        # Number of subscriptions for each variable and the type to fetch
+        # it as
+        self._refs = {}
+        self._fetch_as = {}
+
+        self._blocks = []
+        self._block_of = {}
+        # Subscriptions to deliver data to when a block is received. A
+        # subscription is delivered on the block holding most of its
+        # variables, the other variables are taken from the latest values.
+        self._deliveries = {}
+        self._latest = {}
+        self._is_connected = False
+
+        cf.connected.add_callback(self._connected)
+        cf.disconnected.add_callback(self._disconnected)
+
+    def subscribe(self, name, variables, period_in_ms, data_cb=None,
+                  error_cb=None):
+        """
+        Subscribe to log variables. Variables is a list of complete
+        variable names or (name, fetch_as) tuples. The data is received at
+        least every period_in_ms, more often if other subscribers share the
+        same log block. Returns the subscription that is used to
+        unsubscribe.
+        """
+        normalized = []
+        for variable in variables:
+            if isinstance(variable, str):
+                normalized.append((variable, None))
+            else:
+                normalized.append((variable[0], variable[1]))
+
+        period_in_ms = max(self.MIN_PERIOD_MS,
+                           min(self.MAX_PERIOD_MS, int(period_in_ms)))
+        subscription = LogSubscription(name, normalized, period_in_ms)
+        if data_cb is not None:
+            subscription.data_received_cb.add_callback(data_cb)
+        if error_cb is not None:
+            subscription.error_cb.add_callback(error_cb)
+
+        errors = []
+        with self._lock:
+            self._subscriptions.append(subscription)
+            for var_name, fetch_as in normalized:
+                self._refs[var_name] = self._refs.get(var_name, 0) + 1
+                if self._fetch_as.get(var_name) is None:
+                    self._fetch_as[var_name] = fetch_as
+            if self._is_connected:
+                errors = self._allocate([subscription])
+
+        self._report_errors(errors)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop receiving data for a subscription"""
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.remove(subscription)
+
+            for var_name in subscription.variable_names:
+                self._refs[var_name] -= 1
+                if self._refs[var_name] == 0:
+                    del self._refs[var_name]
+                    del self._fetch_as[var_name]
+                    self._latest.pop(var_name, None)
+
+            if self._is_connected:
+                self._release()
+
+    def blocks(self):
+        """Return the log configurations currently used by the broker"""
+        with self._lock:
+            return [block.logconf for block in self._blocks]
+
+    def _size_and_type(self, var_name):
+        """Return the size and type of a variable, None if not in the TOC"""
+        element = self._cf.log.toc.get_element_by_complete_name(var_name)
+        if element is None:
+            return None
+        fetch_as = self._fetch_as.get(var_name) or element.ctype
+        type_id = LogTocElement.get_id_from_cstring(fetch_as)
+        return LogTocElement.get_size_from_id(type_id), fetch_as
+
+    def _allocate(self, subscriptions):
+        """
+        Add log blocks for the variables of the subscriptions that are not
+        logged yet. The fastest subscriptions are packed first so the
+        variables that need a high rate share blocks. Returns a list of
+        (subscription, msg) errors to report once the lock is released.
+        """
+        errors = []
+        pending = []
+        size = 0
+        for subscription in sorted(subscriptions,
+                                   key=lambda s: s.period_in_ms):
+            subscription._available = []
+            for var_name in subscription.variable_names:
+                if var_name in self._block_of or any(
+                        var_name in names for names, _, _ in pending):
+                    subscription._available.append(var_name)
+                    continue
+
+                size_and_type = self._size_and_type(var_name)
+                if size_and_type is None:
+                    errors.append((subscription,
+                                   'Variable {} not in TOC'.format(var_name)))
+                    continue
+                var_size, fetch_as = size_and_type
+                subscription._available.append(var_name)
+
+                if not pending or size + var_size > LogConfig.MAX_LEN:
+                    pending.append(([], [], []))
+                    size = 0
+                names, types, subscribers = pending[-1]
+                names.append(var_name)
+                types.append(fetch_as)
+                if subscription.name not in subscribers:
+                    subscribers.append(subscription.name)
+                size += var_size
+
+        for names, types, subscribers in pending:
+            logconf = LogConfig('+'.join(subscribers),
+                                self._required_period(names))
+            for var_name, fetch_as in zip(names, types):
+                logconf.add_variable(var_name, fetch_as)
+
+            try:
+                self._cf.log.add_config(logconf)
+            except (KeyError, AttributeError) as e:
+                logger.warning(str(e))
+                for subscription in self._subscribers(names):
+                    subscription._available = [
+                        n for n in subscription._available if n not in names]
+                    errors.append((subscription, str(e)))
+                continue
+
+            block = _Block(logconf, names)
+            self._blocks.append(block)
+            for var_name in names:
+                self._block_of[var_name] = block
+            logconf.data_received_cb.add_callback(self._block_data)
+            logconf.error_cb.add_callback(self._block_error)
+            logconf.start()
+
+        self._update_periods()
+        self._update_deliveries()
+        return errors
+
+    def _release(self):
+        """Remove blocks that no one needs and slow down the others"""
+        for block in list(self._blocks):
+            if any(var_name in self._refs for var_name in block.names):
+                continue
+            logger.debug('Removing log block %s', block.logconf.name)
+            self._blocks.remove(block)
+            for var_name in block.names:
+                del self._block_of[var_name]
+            block.logconf.delete()
+
+        self._update_periods()
+        self._update_deliveries()
+
+    def _subscribers(self, names):
+        return [s for s in self._subscriptions
+                if any(var_name in names for var_name in s.variable_names)]
+
+    def _required_period(self, names):
+        periods = [s.period_in_ms for s in self._subscribers(names)]
+        return min(periods) if periods else self.MAX_PERIOD_MS
+
+    def _update_periods(self):
+        for block in self._blocks:
+            period_in_ms = self._required_period(block.names)
+            if period_in_ms != block.logconf.period_in_ms:
+                logger.debug('Changing period of log block %s to %d ms',
+                             block.logconf.name, period_in_ms)
+                block.logconf.period_in_ms = period_in_ms
+                block.logconf.period = int(period_in_ms / 10)
+                # Starting a block that is already running sets the period,
+                # blocks still being created are started with the new period
+                if block.logconf.added:
+                    block.logconf.start()
+
+    def _update_deliveries(self):
+        deliveries = {}
+        for subscription in self._subscriptions:
+            counts = {}
+            for var_name in subscription._available:
+                block = self._block_of.get(var_name)
+                if block is not None:
+                    counts[block] = counts.get(block, 0) + 1
+            if not counts:
+                continue
+            block = max(counts, key=lambda b: (counts[b],
+                                               -b.logconf.period_in_ms))
+            deliveries.setdefault(block.logconf, []).append(subscription)
+        self._deliveries = deliveries
+
+    def _block_data(self, timestamp, data, logconf):
+        to_call = []
+        with self._lock:
+            self._latest.update(data)
+            for subscription in self._deliveries.get(logconf, []):
+                try:
+                    values = dict((var_name, self._latest[var_name])
+                                  for var_name in subscription._available)
+                except KeyError:
+                    # Not all blocks of the subscription received yet
+                    continue
+                to_call.append((subscription, values))
+
+        for subscription, values in to_call:
+            subscription.data_received_cb.call(timestamp, values,
+                                               subscription)
+
+    def _block_error(self, logconf, msg):
+        with self._lock:
+            names = [v.name for v in logconf.variables]
+            errors = [(s, msg) for s in self._subscribers(names)]
+        self._report_errors(errors)
+
+    def _report_errors(self, errors):
+        for subscription, msg in errors:
+            subscription.error_cb.call(subscription, msg)
+
+    def _connected(self, link_uri):
+        with self._lock:
+            self._is_connected = True
+            self._blocks = []
+            self._block_of = {}
+            self._latest = {}
+            errors = self._allocate(list(self._subscriptions))
+
+        self._report_errors(errors)
+
+    def _disconnected(self, link_uri):
+        with self._lock:
+            self._is_connected = False
+            self._blocks = []
+            self._block_of = {}
+            self._deliveries = {}
+            self._latest = {}
@@ -61,6 +61,9 @@ class LogConfigReader():
 
         self._log_configs = {}
         self.dsList = []
+        # Parsed logblocks indexed on file path, together with the mtime and
+        # size of the file when it was parsed
+        self._index = {}
         # Check if user config exists, otherwise copy files
         if (not os.path.exists(cfclient.config_path + "/log")):
             logger.info("No user config found, copying dist files")
@@ -193,38 +196,6 @@ class LogConfigReader():
         else:
             return DEFAULT_CATEGORY_NAME + '1'
 
-    def _read_config_categories(self):
-        """Read and parse log configurations"""
-
-        self._log_configs = {'Default': []}
-        log_path = os.path.join(cfclient.config_path, 'log')
-
-        for category in os.listdir(log_path):
-
-            category_path = os.path.join(log_path, category)
-
-            try:
-                if (os.path.isdir(category_path)):
-                    # create a new cathegory
-                    self._log_configs[category] = []
-                    for conf in os.listdir(category_path):
-                        if conf.endswith('.json'):
-                            conf_path = os.path.join(category_path, conf)
-                            log_conf = self._get_conf(conf_path)
-
-                        # add the log configuration to the cathegory
-                        self._log_configs[category].append(log_conf)
-
-                else:
-                    # if it's not a directory, the log config is placed
-                    # in the 'Default' cathegory
-                    if category_path.endswith('.json'):
-                        log_conf = self._get_conf(category_path)
-                        self._log_configs['Default'].append(log_conf)
-
-            except Exception as e:
-                logger.warning("Failed to open log config %s", e)
-
     def _get_default_conf_name(self, log_path):
         config_nbrs = re.findall(r'(?<=%s)\d*(?!=\.json)' % DEFAULT_CONF_NAME,
                                  ' '.join(os.listdir(log_path)))
@@ -236,76 +207,105 @@ class LogConfigReader():
         else:
             return DEFAULT_CONF_NAME + '1'
 
-    def _get_conf(self, conf_path):
-        with open(conf_path) as f:
-            data = json.load(f)
-            infoNode = data["logconfig"]["logblock"]
-
-            logConf = LogConfig(infoNode["name"],
-                                int(infoNode["period"]))
-            for v in data["logconfig"]["logblock"]["variables"]:
-                if v["type"] == "TOC":
-                    logConf.add_variable(str(v["name"]), v["fetch_as"])
-                else:
-                    logConf.add_variable("Mem", v["fetch_as"],
-                                         v["stored_as"],
-                                         int(v["address"], 16))
-            return logConf
-
-    def _get_configpaths_recursively(self):
-        """ Reads all configuration files from the log path and
-            returns a list of tuples with format:
-            (category/conf-name, absolute path).
+    def _create_log_conf(self, name, logblock):
+        """ Creates a new LogConfig from a parsed logblock. A new instance is
+            created every time since cflib and the tabs keep state and
+            callbacks in the LogConfig once it has been added.
         """
-        logpath = os.path.join(cfclient.config_path, 'log')
-        filepaths = []
-
-        for files in os.listdir(logpath):
-            abspath = os.path.join(logpath, files)
-            if os.path.isdir(abspath):
-                for config in os.listdir(abspath):
-                    if config.endswith('.json'):
-                        filepaths.append(('/'.join([files, config]),
-                                         os.path.join(abspath, config)))
+        logConf = LogConfig(name, int(logblock["period"]))
+        for v in logblock["variables"]:
+            if v["type"] == "TOC":
+                logConf.add_variable(str(v["name"]), v["fetch_as"])
             else:
-                if files.endswith('.json'):
-                    filepaths.append((files, os.path.join(abspath)))
+                logConf.add_variable("Mem", v["fetch_as"],
+                                     v["stored_as"],
+                                     int(v["address"], 16))
+        return logConf
+
+    def _get_logblock(self, conf_path):
+        """ Returns the parsed logblock of a configuration file. The file is
+            only read and parsed if it has changed (mtime or size) since the
+            last time it was read, otherwise the cached logblock is used.
+        """
+        stat = os.stat(conf_path)
+        key = (stat.st_mtime_ns, stat.st_size)
 
-        return filepaths
+        cached = self._index.get(conf_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
 
-    def _read_config_files(self):
-        """Read and parse log configurations"""
+        with open(conf_path) as f:
+            data = json.load(f)
+        logblock = data["logconfig"]["logblock"]
+        self._index[conf_path] = (key, logblock)
+        return logblock
+
+    def _scan_config_files(self):
+        """ Walks the log path once and returns a tuple with the list of
+            categories found and a list of tuples with format
+            (category, conf-name, absolute path). Configurations placed
+            directly in the log path belong to the 'Default' category.
+        """
+        log_path = os.path.join(cfclient.config_path, 'log')
+        categories = ['Default']
+        filepaths = []
 
-        configsfound = self._get_configpaths_recursively()
+        for entry in os.scandir(log_path):
+            if entry.is_dir():
+                categories.append(entry.name)
+                for config in os.scandir(entry.path):
+                    if config.name.endswith('.json') and config.is_file():
+                        filepaths.append((entry.name,
+                                          config.name[:-len('.json')],
+                                          config.path))
+            elif entry.name.endswith('.json'):
+                filepaths.append(('Default', entry.name[:-len('.json')],
+                                  entry.path))
+
+        # Forget files that have been removed since the last scan
+        found = set(path for _, _, path in filepaths)
+        for path in list(self._index):
+            if path not in found:
+                del self._index[path]
+
+        return categories, filepaths
+
+    def _read_configs(self, categories=True):
+        """ Read and parse log configurations. Builds the list of log
+            configurations added to the Crazyflie and, if categories is set,
+            the per category configurations used by the log config dialog.
+        """
+        found_categories, configsfound = self._scan_config_files()
 
         new_dsList = []
-        for conf in configsfound:
+        log_configs = dict((category, []) for category in found_categories)
+        for category, conf_name, conf_path in configsfound:
             try:
-                logger.info("Parsing [%s]", conf[0])
-                json_data = open(conf[1])
-                self.data = json.load(json_data)
-                infoNode = self.data["logconfig"]["logblock"]
-                logConfName = conf[0].replace('.json', '')
-
-                logConf = LogConfig(logConfName, int(infoNode["period"]))
-                for v in self.data["logconfig"]["logblock"]["variables"]:
-                    if v["type"] == "TOC":
-                        logConf.add_variable(str(v["name"]), v["fetch_as"])
-                    else:
-                        logConf.add_variable("Mem", v["fetch_as"],
-                                             v["stored_as"],
-                                             int(v["address"], 16))
-                new_dsList.append(logConf)
-                json_data.close()
+                logblock = self._get_logblock(conf_path)
+                if category == 'Default':
+                    logConfName = conf_name
+                else:
+                    logConfName = '/'.join([category, conf_name])
+                new_dsList.append(
+                    self._create_log_conf(logConfName, logblock))
+                log_configs[category].append(
+                    self._create_log_conf(logblock["name"], logblock))
             except Exception as e:
-                logger.warning("Exception while parsing logconfig file: %s", e)
+                logger.warning("Exception while parsing logconfig file "
+                               "%s: %s", conf_path, e)
+
         self.dsList = new_dsList
+        if categories:
+            self._log_configs = log_configs
+
+    def _read_config_files(self):
+        """Read and parse log configurations"""
+        self._read_configs(categories=False)
 
     def _connected(self, link_uri):
         """Callback that is called once Crazyflie is connected"""
 
-        self._read_config_files()
-        self._read_config_categories()
+        self._read_configs()
         # Just add all the configurations. Via callbacks other parts of the
         # application will pick up these configurations and use them
         for d in self.dsList:
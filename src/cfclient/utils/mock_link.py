@@ -0,0 +1,517 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+"""
+An in-process CRTP link to an emulated Crazyflie, used to run the client
+libraries without any hardware.
+
+The emulated Crazyflie answers the connection setup (platform and protocol
+version, log and param TOCs, memories and param values) with synthetic TOCs,
+creates and runs log blocks, stores param writes and records the setpoints
+it receives. The link is opened with URIs like
+
+    mock://<name>?log_vars=100&params=100&rate=500
+
+where the options set the number of log variables and params in the TOCs
+and, if rate is set, the rate (Hz) at which every started log block is sent
+instead of its period.
+"""
+
+import errno
+import logging
+import math
+import queue
+import struct
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl
+from urllib.parse import urlparse
+
+import cflib.crtp
+from cflib.crtp.crtpdriver import CRTPDriver
+from cflib.crtp.crtpstack import CRTPPacket
+from cflib.crtp.crtpstack import CRTPPort
+from cflib.crtp.exceptions import WrongUriType
+from cflib.utils.callbacks import Caller
+
+__author__ = 'Bitcraze AB'
+__all__ = ['MockCrazyflie', 'MockLinkDriver', 'register_driver']
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_VARS = 100
+DEFAULT_PARAMS = 100
+
+# Protocol version reported, 4 and above use the V2 TOC and log commands
+PROTOCOL_VERSION = 6
+
+# Variables in each group of the synthetic TOCs
+_GROUP_SIZE = 10
+
+# Log types: TOC type id and struct format of each C type
+_LOG_TYPES = {'uint8_t': (1, 'B'), 'uint16_t': (2, 'H'), 'uint32_t': (3, 'L'),
+              'int8_t': (4, 'b'), 'int16_t': (5, 'h'), 'int32_t': (6, 'i'),
+              'float': (7, 'f'), 'FP16': (8, 'e')}
+_LOG_FORMATS = dict(_LOG_TYPES.values())
+
+# Param types: TOC type id and struct format of each C type
+_PARAM_TYPES = {'uint8_t': (0x08, 'B'), 'uint16_t': (0x09, 'H'),
+                'uint32_t': (0x0A, 'L'), 'int8_t': (0x00, 'b'),
+                'int16_t': (0x01, 'h'), 'int32_t': (0x02, 'i'),
+                'float': (0x06, 'f')}
+
+# Types used in turn by the synthetic TOCs
+_SYNTHETIC_TYPES = ['float', 'int16_t', 'uint8_t', 'int32_t', 'uint16_t',
+                    'int8_t', 'uint32_t']
+
+_PARAM_RO = 0x40
+
+# CRTP channels and commands used by the emulation, see cflib
+_LINK_ECHO = 0
+_LINK_SOURCE = 1
+_PLATFORM_VERSION = 1
+_VERSION_GET_PROTOCOL = 0
+_TOC_CHANNEL = 0
+_CMD_TOC_ITEM_V2 = 2
+_CMD_TOC_INFO_V2 = 3
+_LOG_SETTINGS = 1
+_LOG_DATA = 2
+_LOG_CREATE = 6
+_LOG_APPEND = 7
+_LOG_DELETE = 2
+_LOG_START = 3
+_LOG_STOP = 4
+_LOG_RESET = 5
+_PARAM_READ = 1
+_PARAM_WRITE = 2
+_PARAM_MISC = 3
+_MEM_INFO = 0
+_MEM_INFO_NBR = 1
+
+# Largest payload of a CRTP packet and of the data in a log packet
+_MAX_PAYLOAD = 30
+_MAX_LOG_DATA = _MAX_PAYLOAD - 4
+_MAX_LOG_BLOCKS = 16
+
+
+class _TocEntry:
+    """A log variable or a param of the emulated Crazyflie"""
+
+    def __init__(self, ident, group, name, type_id, fmt, metadata=None,
+                 value=0):
+        self.ident = ident
+        self.group = group
+        self.name = name
+        self.type_id = type_id
+        self.fmt = fmt
+        # Byte describing the entry in the TOC, the type id with flags
+        self.metadata = type_id if metadata is None else metadata
+        self.value = value
+
+    def toc_data(self):
+        """Return the TOC item payload describing the entry"""
+        return (struct.pack('<HB', self.ident, self.metadata) +
+                self.group.encode() + b'\0' + self.name.encode() + b'\0')
+
+    def pack(self, value):
+        return _pack(self.fmt, value)
+
+
+class _LogBlock:
+    """A log block created by the client"""
+
+    def __init__(self, ident):
+        self.ident = ident
+        # Variables as (TOC entry, fetch format) in the order they are sent
+        self.variables = []
+        self.size = 0
+        self.period = 0
+        self.started = False
+        self.next_send = 0
+
+
+class MockCrazyflie:
+    """
+    Emulates the CRTP services of a Crazyflie. Packets sent by the client are
+    handled in the thread sending them and the answers are queued until the
+    link receives them.
+    """
+
+    def __init__(self, log_vars=DEFAULT_LOG_VARS, params=DEFAULT_PARAMS,
+                 rate=0):
+        self._queue = queue.Queue()
+        self._rate = rate
+        self._start = time.monotonic()
+
+        self._log_toc = self._create_log_toc(log_vars)
+        self._param_toc = self._create_param_toc(params)
+        self._log_crc = self._toc_crc(self._log_toc)
+        self._param_crc = self._toc_crc(self._param_toc)
+
+        self._blocks = {}
+        self._blocks_changed = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        # Number of log packets sent
+        self.log_packets = 0
+        # Called with roll, pitch, yaw and thrust for every setpoint received
+        self.setpoint_received = Caller()
+
+        self._handlers = {
+            CRTPPort.LINKCTRL: self._handle_linkctrl,
+            CRTPPort.PLATFORM: self._handle_platform,
+            CRTPPort.LOGGING: self._handle_log,
+            CRTPPort.PARAM: self._handle_param,
+            CRTPPort.MEM: self._handle_mem,
+            CRTPPort.COMMANDER: self._handle_commander,
+        }
+
+    def _create_log_toc(self, count):
+        """Return the log TOC, a list of entries indexed on their id"""
+        return [self._log_variable(i, 'bench{}'.format(i // _GROUP_SIZE),
+                                   'var{}'.format(i % _GROUP_SIZE),
+                                   _SYNTHETIC_TYPES[i % len(_SYNTHETIC_TYPES)])
+                for i in range(count)]
+
+    def _create_param_toc(self, count):
+        """Return the param TOC, a list of entries indexed on their id"""
+        # Every eighth param is read-only
+        return [self._param(i, 'bench{}'.format(i // _GROUP_SIZE),
+                            'param{}'.format(i % _GROUP_SIZE),
+                            _SYNTHETIC_TYPES[i % len(_SYNTHETIC_TYPES)],
+                            read_only=(i % 8 == 7))
+                for i in range(count)]
+
+    @staticmethod
+    def _log_variable(ident, group, name, ctype):
+        type_id, fmt = _LOG_TYPES[ctype]
+        return _TocEntry(ident, group, name, type_id, fmt)
+
+    @staticmethod
+    def _param(ident, group, name, ctype, read_only=False, value=0):
+        type_id, fmt = _PARAM_TYPES[ctype]
+        metadata = type_id | _PARAM_RO if read_only else type_id
+        return _TocEntry(ident, group, name, type_id, fmt, metadata, value)
+
+    def _toc_crc(self, toc):
+        # The client caches the TOCs on the CRC, it only has to change when
+        # the content does
+        return zlib.crc32(b''.join(entry.toc_data() for entry in toc))
+
+    def open(self):
+        """Start sending log data"""
+        self._running = True
+        self._thread = threading.Thread(target=self._log_loop, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop sending log data"""
+        with self._blocks_changed:
+            self._running = False
+            self._blocks_changed.notify()
+
+    def receive(self, wait):
+        """Return the next packet from the Crazyflie, or None on timeout"""
+        try:
+            if wait == 0:
+                return self._queue.get(False)
+            elif wait < 0:
+                return self._queue.get(True)
+            else:
+                return self._queue.get(True, wait)
+        except queue.Empty:
+            return None
+
+    def handle(self, pk):
+        """Handle a packet sent to the Crazyflie"""
+        handler = self._handlers.get(pk.port)
+        if handler is not None:
+            handler(pk.channel, bytes(pk.data))
+
+    def _send(self, port, channel, data):
+        pk = CRTPPacket()
+        pk.set_header(port, channel)
+        pk.data = data
+        self._queue.put(pk)
+
+    def _timestamp(self):
+        return int((time.monotonic() - self._start) * 1000)
+
+    def _handle_linkctrl(self, channel, data):
+        if channel == _LINK_ECHO:
+            self._send(CRTPPort.LINKCTRL, channel, data)
+        elif channel == _LINK_SOURCE:
+            self._send(CRTPPort.LINKCTRL, channel,
+                       b'Bitcraze Crazyflie'.ljust(_MAX_PAYLOAD, b'\0'))
+
+    def _handle_platform(self, channel, data):
+        if channel == _PLATFORM_VERSION and data[:1] == bytes(
+                (_VERSION_GET_PROTOCOL,)):
+            self._send(CRTPPort.PLATFORM, channel,
+                       bytes((_VERSION_GET_PROTOCOL, PROTOCOL_VERSION)))
+
+    def _handle_toc(self, port, toc, crc, data):
+        if data[0] == _CMD_TOC_INFO_V2:
+            self._send(port, _TOC_CHANNEL,
+                       struct.pack('<BHI', _CMD_TOC_INFO_V2, len(toc), crc))
+        elif data[0] == _CMD_TOC_ITEM_V2:
+            ident = struct.unpack_from('<H', data, 1)[0]
+            if ident < len(toc):
+                self._send(port, _TOC_CHANNEL, bytes((_CMD_TOC_ITEM_V2,)) +
+                           toc[ident].toc_data())
+
+    def _handle_mem(self, channel, data):
+        if channel == _MEM_INFO and data[:1] == bytes((_MEM_INFO_NBR,)):
+            # No memories
+            self._send(CRTPPort.MEM, channel, bytes((_MEM_INFO_NBR, 0)))
+
+    def _handle_commander(self, channel, data):
+        roll, pitch, yaw, thrust = struct.unpack('<fffH', data[:14])
+        self._setpoint(roll, -pitch, yaw, thrust)
+
+    def _setpoint(self, roll, pitch, yaw, thrust):
+        """Called for every setpoint received from the commander"""
+        self.setpoint_received.call(roll, pitch, yaw, thrust)
+
+    def _handle_param(self, channel, data):
+        if channel == _TOC_CHANNEL:
+            self._handle_toc(CRTPPort.PARAM, self._param_toc,
+                             self._param_crc, data)
+            return
+
+        if channel == _PARAM_MISC:
+            # Only the commands for persistent params are answered, none of
+            # the params are persistent
+            if len(data) >= 3 and data[0] > 2:
+                self._send(CRTPPort.PARAM, channel,
+                           data[:3] + bytes((errno.ENOENT,)))
+            return
+
+        ident = struct.unpack_from('<H', data)[0]
+        if ident >= len(self._param_toc):
+            return
+        param = self._param_toc[ident]
+        if channel == _PARAM_WRITE:
+            if not param.metadata & _PARAM_RO:
+                param.value = struct.unpack_from('<' + param.fmt, data, 2)[0]
+            self._send(CRTPPort.PARAM, channel,
+                       data[:2] + param.pack(param.value))
+        elif channel == _PARAM_READ:
+            self._send(CRTPPort.PARAM, channel,
+                       data[:2] + b'\0' + param.pack(param.value))
+
+    def _handle_log(self, channel, data):
+        if channel == _TOC_CHANNEL:
+            self._handle_toc(CRTPPort.LOGGING, self._log_toc, self._log_crc,
+                             data)
+        elif channel == _LOG_SETTINGS:
+            with self._blocks_changed:
+                error = self._log_command(data)
+                self._blocks_changed.notify()
+            if data[0] == _LOG_RESET:
+                self._send(CRTPPort.LOGGING, channel, bytes((data[0], 0, 0)))
+            else:
+                self._send(CRTPPort.LOGGING, channel,
+                           bytes((data[0], data[1], error)))
+
+    def _log_command(self, data):
+        """Run a log block command, returns the error code"""
+        cmd = data[0]
+        if cmd == _LOG_RESET:
+            self._blocks = {}
+            return 0
+
+        ident = data[1]
+        block = self._blocks.get(ident)
+        if cmd == _LOG_CREATE:
+            if block is not None:
+                return errno.EEXIST
+            if len(self._blocks) >= _MAX_LOG_BLOCKS:
+                return errno.ENOMEM
+            block = _LogBlock(ident)
+            error = self._append_variables(block, data[2:])
+            if not error:
+                self._blocks[ident] = block
+            return error
+
+        if block is None:
+            return errno.ENOENT
+        if cmd == _LOG_APPEND:
+            return self._append_variables(block, data[2:])
+        elif cmd == _LOG_DELETE:
+            del self._blocks[ident]
+        elif cmd == _LOG_START:
+            block.period = data[2] * 10
+            block.started = True
+            block.next_send = time.monotonic()
+        elif cmd == _LOG_STOP:
+            block.started = False
+        return 0
+
+    def _append_variables(self, block, data):
+        variables = []
+        size = block.size
+        for i in range(0, len(data) - 2, 3):
+            fetch_as = data[i] & 0x0F
+            ident = struct.unpack_from('<H', data, i + 1)[0]
+            if ident >= len(self._log_toc) or fetch_as not in _LOG_FORMATS:
+                return errno.ENOENT
+            fmt = _LOG_FORMATS[fetch_as]
+            size += struct.calcsize('<' + fmt)
+            variables.append((self._log_toc[ident], fmt))
+        if size > _MAX_LOG_DATA:
+            return errno.E2BIG
+        block.variables += variables
+        block.size = size
+        return 0
+
+    def _log_values(self, block, t):
+        """Return the packed values of the variables in a block at time t"""
+        return b''.join(_pack(fmt, self._log_value(entry, fmt, t))
+                        for entry, fmt in block.variables)
+
+    def _log_value(self, entry, fmt, t):
+        """Return the value of a log variable at time t"""
+        # Every variable is a sine with its own phase
+        value = math.sin(t + entry.ident)
+        if fmt not in 'fe':
+            value *= 100
+        return value
+
+    def _log_loop(self):
+        with self._blocks_changed:
+            while self._running:
+                now = time.monotonic()
+                next_send = None
+                for block in self._blocks.values():
+                    if not block.started:
+                        continue
+                    period = 1.0 / self._rate if self._rate else \
+                        max(block.period, 10) / 1000.0
+                    if now >= block.next_send:
+                        self._send(CRTPPort.LOGGING, _LOG_DATA,
+                                   struct.pack('<B', block.ident) +
+                                   self._timestamp().to_bytes(
+                                       4, 'little')[:3] +
+                                   self._log_values(block, now))
+                        self.log_packets += 1
+                        block.next_send += period
+                        if block.next_send < now:
+                            # Fallen behind, skip the missed periods
+                            block.next_send = now + period
+                    if next_send is None or block.next_send < next_send:
+                        next_send = block.next_send
+
+                if next_send is None:
+                    self._blocks_changed.wait()
+                else:
+                    self._blocks_changed.wait(max(0, next_send -
+                                                  time.monotonic()))
+
+
+class MockLinkDriver(CRTPDriver):
+    """CRTP driver for links to emulated Crazyflies"""
+
+    SCHEME = 'mock'
+
+    # Option in the URI and its type
+    OPTIONS = {'log_vars': int, 'params': int, 'rate': float}
+
+    # The last emulated Crazyflie opened for each name
+    _crazyflies = {}
+
+    def __init__(self):
+        super().__init__()
+        # No packets are lost in the emulation
+        self.needs_resending = False
+        self._cf = None
+
+    @classmethod
+    def crazyflie(cls, name):
+        """Return the emulated Crazyflie last opened with a name"""
+        return cls._crazyflies.get(name)
+
+    def connect(self, uri, link_quality_callback, link_error_callback):
+        if not uri.startswith(self.SCHEME + '://'):
+            raise WrongUriType('Not a {} URI'.format(self.SCHEME))
+
+        parsed = urlparse(uri)
+        options = {}
+        for key, value in parse_qsl(parsed.query):
+            if key not in self.OPTIONS:
+                raise Exception('Unknown option {} in {}'.format(key, uri))
+            options[key] = self.OPTIONS[key](value)
+
+        self._cf = self._create_crazyflie(options)
+        self._crazyflies[parsed.netloc] = self._cf
+        self._cf.open()
+
+    def _create_crazyflie(self, options):
+        return MockCrazyflie(**options)
+
+    def send_packet(self, pk):
+        self._cf.handle(pk)
+
+    def receive_packet(self, wait=0):
+        return self._cf.receive(wait)
+
+    def get_status(self):
+        return 'Ok'
+
+    def get_name(self):
+        return self.SCHEME
+
+    def scan_interface(self, address=None):
+        return []
+
+    def enum(self):
+        return []
+
+    def get_help(self):
+        return '{}://<name>[?option=value&...] with the options {}'.format(
+            self.SCHEME, ', '.join(self.OPTIONS))
+
+    def close(self):
+        if self._cf is not None:
+            self._cf.close()
+            self._cf = None
+
+
+def _pack(fmt, value):
+    if fmt in 'fe':
+        return struct.pack('<' + fmt, value)
+    # Wrap integers into the range of the type
+    size = struct.calcsize('<' + fmt)
+    return (int(value) & ((1 << (8 * size)) - 1)).to_bytes(size, 'little')
+
+
+def register_driver(driver=MockLinkDriver):
+    """Make cflib open links with the driver"""
+    if driver not in cflib.crtp.CLASSES:
+        cflib.crtp.CLASSES.append(driver)
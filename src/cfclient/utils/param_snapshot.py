@@ -0,0 +1,414 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+"""
+Bulk access to the parameters of a Crazyflie.
+
+A ParamSnapshot holds the values of all parameters at one point in time and
+can be saved to and loaded from file. Diffing a snapshot against the values
+in a connected Crazyflie gives the parameters that have to be written to
+restore it.
+
+The BulkParamEngine writes values and reads persistent parameter states with
+several requests in flight at the same time instead of waiting for the
+answer to one request before sending the next one.
+"""
+
+import errno
+import logging
+import struct
+import threading
+import time
+from collections import deque
+from collections import namedtuple
+
+from cflib.crazyflie.param import MISC_CHANNEL
+from cflib.crazyflie.param import MISC_PERSISTENT_GET_STATE
+from cflib.crazyflie.param import ParamTocElement
+from cflib.crazyflie.param import PersistentParamState
+from cflib.crazyflie.param import WRITE_CHANNEL
+from cflib.crtp.crtpstack import CRTPPacket
+from cflib.crtp.crtpstack import CRTPPort
+
+__author__ = 'Bitcraze AB'
+__all__ = ['ParamChange', 'ParamSnapshot', 'BulkParamResult',
+           'BulkParamEngine']
+
+logger = logging.getLogger(__name__)
+
+# A parameter that differs between a snapshot and the Crazyflie
+ParamChange = namedtuple('ParamChange', ['name', 'current', 'target'])
+
+
+def _to_number(element, value):
+    """Convert a value to the python type of a parameter"""
+    if element.pytype in ('<f', '<d'):
+        return float(value)
+    return int(float(value))
+
+
+def _is_same_value(element, a, b):
+    """Compare two values the way they are stored in the Crazyflie"""
+    try:
+        return (struct.pack(element.pytype, _to_number(element, a)) ==
+                struct.pack(element.pytype, _to_number(element, b)))
+    except (ValueError, struct.error):
+        return str(a) == str(b)
+
+
+class ParamSnapshot:
+    """The values of all parameters in a Crazyflie at one point in time"""
+
+    FILE_TYPE = 'param_snapshot'
+    FILE_VERSION = 1
+
+    def __init__(self, values, uri=None, created=None):
+        # Values indexed on complete name, as strings like in cflib
+        self.values = values
+        self.uri = uri
+        self.created = created if created is not None else time.time()
+
+    @classmethod
+    def capture(cls, cf, uri=None):
+        """Take a snapshot of the parameter values of a connected Crazyflie"""
+        values = {}
+        for group, params in cf.param.values.items():
+            for name, value in params.items():
+                values['{}.{}'.format(group, name)] = value
+        return cls(values, uri if uri is not None else cf.link_uri)
+
+    def save(self, path):
+        """Save the snapshot to a YAML file"""
+        import yaml
+
+        data = {
+            'type': self.FILE_TYPE,
+            'version': self.FILE_VERSION,
+            'uri': self.uri,
+            'created': self.created,
+            'params': dict(sorted(self.values.items())),
+        }
+        with open(path, 'w') as f:
+            yaml.dump(data, f, default_flow_style=False)
+
+    @classmethod
+    def load(cls, path):
+        """Load a snapshot from a YAML file"""
+        import yaml
+
+        with open(path) as f:
+            data = yaml.safe_load(f)
+
+        if not isinstance(data, dict) or data.get('type') != cls.FILE_TYPE:
+            raise ValueError('{} is not a parameter snapshot'.format(path))
+        if data.get('version') != cls.FILE_VERSION:
+            raise ValueError('Unsupported parameter snapshot version {}'
+                             .format(data.get('version')))
+
+        values = dict((name, str(value))
+                      for name, value in data['params'].items())
+        return cls(values, data.get('uri'), data.get('created'))
+
+    def diff(self, cf):
+        """
+        Return a list of ParamChange for the writable parameters that have
+        another value in the Crazyflie than in the snapshot. Parameters that
+        are not in the TOC of the Crazyflie are ignored.
+        """
+        changes = []
+        for complete_name, target in sorted(self.values.items()):
+            element = cf.param.toc.get_element_by_complete_name(complete_name)
+            if element is None:
+                logger.info('%s is not in the param TOC, ignoring it',
+                            complete_name)
+                continue
+            if element.access == ParamTocElement.RO_ACCESS:
+                continue
+
+            group, name = complete_name.split('.', 1)
+            current = cf.param.values.get(group, {}).get(name)
+            if current is None or not _is_same_value(element, current,
+                                                     target):
+                changes.append(ParamChange(complete_name, current, target))
+        return changes
+
+
+class BulkParamResult:
+    """The outcome of a bulk parameter operation"""
+
+    def __init__(self):
+        # Names of the parameters the request succeeded for
+        self.succeeded = []
+        # Reason of failure indexed on the name of the parameter
+        self.failed = {}
+        # Values received for the parameters (for reads)
+        self.values = {}
+        # Total time of the operation in seconds
+        self.duration = 0.0
+
+    @property
+    def ok(self):
+        return len(self.failed) == 0
+
+    def summary(self):
+        """Return a one line description of the result"""
+        text = '{} of {} parameters done in {:.2f} s'.format(
+            len(self.succeeded), len(self.succeeded) + len(self.failed),
+            self.duration)
+        if self.failed:
+            text += ', failed: ' + ', '.join(
+                '{} ({})'.format(name, reason)
+                for name, reason in sorted(self.failed.items()))
+        return text
+
+
+class _Request:
+    def __init__(self, name, pk, handle_reply):
+        self.name = name
+        self.pk = pk
+        self.key = None
+        self.handle_reply = handle_reply
+        self.timer = None
+
+
+class _Pipeline:
+    """Sends requests with a bounded number of requests in flight"""
+
+    def __init__(self, cf, requests, pattern_len, result, max_in_flight,
+                 timeout, finished_cb):
+        self._cf = cf
+        # The answers are matched on the channel and the first pattern_len
+        # bytes of the request
+        self._pattern_len = pattern_len
+        for request in requests:
+            request.key = (request.pk.channel,
+                           bytes(request.pk.data[:pattern_len]))
+        self._pending = deque(requests)
+        self._in_flight = {}
+        self._result = result
+        self._max_in_flight = max_in_flight
+        self._timeout = timeout
+        self._finished_cb = finished_cb
+        self._lock = threading.Lock()
+        self._start = None
+        self._done = False
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._cf.add_port_callback(CRTPPort.PARAM, self._packet_received)
+        self._fill()
+        self._check_done()
+
+    def _fill(self):
+        to_send = []
+        with self._lock:
+            while self._pending and len(self._in_flight) < self._max_in_flight:
+                request = self._pending.popleft()
+                request.timer = threading.Timer(self._timeout,
+                                                self._timed_out, [request])
+                request.timer.daemon = True
+                self._in_flight[request.key] = request
+                to_send.append(request)
+
+        for request in to_send:
+            request.timer.start()
+            # cflib resends the packet until the answer is received
+            self._cf.send_packet(request.pk, expected_reply=tuple(request.key[1]))
+
+    def _packet_received(self, pk):
+        key = (pk.channel, bytes(pk.data[:self._pattern_len]))
+        with self._lock:
+            request = self._in_flight.pop(key, None)
+        if request is None:
+            return
+
+        request.timer.cancel()
+        try:
+            error, value = request.handle_reply(pk)
+        except Exception as e:
+            error, value = str(e), None
+        self._complete(request, error, value)
+
+    def _timed_out(self, request):
+        with self._lock:
+            if self._in_flight.get(request.key) is not request:
+                return
+            del self._in_flight[request.key]
+        self._complete(request, 'timeout', None)
+
+    def _complete(self, request, error, value):
+        with self._lock:
+            if error is None:
+                self._result.succeeded.append(request.name)
+                self._result.values[request.name] = value
+            else:
+                self._result.failed[request.name] = error
+        self._fill()
+        self._check_done()
+
+    def _check_done(self):
+        with self._lock:
+            if self._done or self._pending or self._in_flight:
+                return
+            self._done = True
+            self._result.duration = time.perf_counter() - self._start
+
+        self._cf.remove_port_callback(CRTPPort.PARAM, self._packet_received)
+        logger.info('Bulk param request: %s', self._result.summary())
+        if self._finished_cb is not None:
+            self._finished_cb(self._result)
+
+
+class BulkParamEngine:
+    """Writes and reads many parameters with pipelined requests"""
+
+    # Number of requests sent to the Crazyflie without having an answer
+    MAX_IN_FLIGHT = 8
+    # Time in seconds before a request without answer is failed
+    TIMEOUT = 2.0
+
+    def __init__(self, cf, max_in_flight=MAX_IN_FLIGHT, timeout=TIMEOUT):
+        self._cf = cf
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+
+    def _use_v2(self):
+        return self._cf.platform.get_protocol_version() >= 4
+
+    def _run(self, requests, pattern_len, result, finished_cb):
+        pipeline = _Pipeline(self._cf, requests, pattern_len, result,
+                             self.max_in_flight, self.timeout, finished_cb)
+        pipeline.start()
+
+    def _run_sync(self, start, *args):
+        if self._cf.is_called_by_incoming_handler_thread():
+            raise Exception('Can not wait for parameters from a callback')
+
+        done = threading.Event()
+        results = []
+
+        def finished(result):
+            results.append(result)
+            done.set()
+
+        start(*args, finished_cb=finished)
+        done.wait()
+        return results[0]
+
+    def write_values(self, values, finished_cb=None):
+        """
+        Write parameter values. Values is a dict or a list of
+        (complete name, value). The finished_cb is called with a
+        BulkParamResult when all the writes are acknowledged or have failed.
+        """
+        if isinstance(values, dict):
+            values = values.items()
+        # The last value wins if a parameter is in the list more than once
+        values = dict(values)
+
+        result = BulkParamResult()
+        requests = []
+        use_v2 = self._use_v2()
+        for complete_name, value in values.items():
+            element = self._cf.param.toc.get_element_by_complete_name(
+                complete_name)
+            if element is None:
+                result.failed[complete_name] = 'not in TOC'
+                continue
+            if element.access == ParamTocElement.RO_ACCESS:
+                result.failed[complete_name] = 'read only'
+                continue
+
+            pk = CRTPPacket()
+            pk.set_header(CRTPPort.PARAM, WRITE_CHANNEL)
+            pk.data = struct.pack('<H' if use_v2 else '<B', element.ident)
+            try:
+                pk.data += struct.pack(element.pytype,
+                                       _to_number(element, value))
+            except (ValueError, struct.error) as e:
+                result.failed[complete_name] = str(e)
+                continue
+
+            requests.append(_Request(complete_name, pk, self._write_reply))
+
+        self._run(requests, 2 if use_v2 else 1, result, finished_cb)
+
+    def write_values_sync(self, values):
+        """Write parameter values and wait until done, returns the result"""
+        return self._run_sync(self.write_values, values)
+
+    def _write_reply(self, pk):
+        # The Crazyflie answers with the new value, let cflib update the
+        # cached value and call the param update callbacks
+        self._cf.param._param_updated(pk)
+        return None, None
+
+    def get_persistent_states(self, names, finished_cb=None):
+        """
+        Read the persistent state of parameters. The finished_cb is called
+        with a BulkParamResult where values holds a PersistentParamState
+        for each parameter.
+        """
+        result = BulkParamResult()
+        requests = []
+        for complete_name in names:
+            element = self._cf.param.toc.get_element_by_complete_name(
+                complete_name)
+            if element is None or not element.is_persistent():
+                result.failed[complete_name] = 'not persistent'
+                continue
+
+            pk = CRTPPacket()
+            pk.set_header(CRTPPort.PARAM, MISC_CHANNEL)
+            pk.data = struct.pack('<BH', MISC_PERSISTENT_GET_STATE,
+                                  element.ident)
+
+            def reply(pk, element=element):
+                return self._persistent_state_reply(pk, element)
+
+            requests.append(_Request(complete_name, pk, reply))
+
+        self._run(requests, 3, result, finished_cb)
+
+    def get_persistent_states_sync(self, names):
+        """Read persistent states and wait until done, returns the result"""
+        return self._run_sync(self.get_persistent_states, names)
+
+    def _persistent_state_reply(self, pk, element):
+        if pk.data[3] == errno.ENOENT:
+            return 'not persistent', None
+
+        is_stored = pk.data[3] == 1
+        just_type = element.pytype[1:]
+        if is_stored:
+            default_value, stored_value = struct.unpack(
+                '<' + just_type * 2, pk.data[4:])
+        else:
+            default_value, = struct.unpack(element.pytype, pk.data[4:])
+            stored_value = None
+        return None, PersistentParamState(is_stored, default_value,
+                                          stored_value)
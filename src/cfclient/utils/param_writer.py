@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+"""
+Queue for parameter writes where only the last value written to a parameter
+is sent.
+
+Widgets such as sliders can write a parameter many times per second. Instead
+of sending every value, the queue keeps at most one write per parameter in
+flight and replaces any waiting value with the newest one. A write is
+acknowledged when the Crazyflie reports the new value of the parameter, which
+is when the update callbacks of the param module are called. Writes that are
+not acknowledged in time are sent again, unless a newer value is waiting, and
+dropped after a few attempts.
+
+The param module sends its requests one at a time, so a write can wait in its
+queue behind the writes of other users for longer than the timeout. The
+timeout only counts once the param module does not hold a request for the
+parameter anymore, a write still queued or waiting for its answer there is
+not sent again.
+"""
+
+import logging
+import struct
+import threading
+from collections import OrderedDict
+
+from cflib.crazyflie.param import WRITE_CHANNEL
+from cflib.utils.callbacks import Caller
+
+__author__ = 'Bitcraze AB'
+__all__ = ['ParamWriter']
+
+logger = logging.getLogger(__name__)
+
+
+class _Write:
+    """A value sent to a parameter and not yet acknowledged"""
+
+    def __init__(self, complete_name, value, attempts):
+        self.complete_name = complete_name
+        self.value = value
+        self.attempts = attempts
+        self.timer = None
+
+
+class ParamWriter:
+    """Writes parameters, coalescing writes to the same parameter"""
+
+    MAX_IN_FLIGHT = 4
+    # Time in seconds before a write without acknowledgement is sent again
+    TIMEOUT = 2.0
+    # Number of times a write is sent before it is dropped
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, cf, max_in_flight=MAX_IN_FLIGHT, timeout=TIMEOUT,
+                 max_attempts=MAX_ATTEMPTS):
+        self._cf = cf
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        # Writes sent but not yet acknowledged, by parameter
+        self._in_flight = {}
+        # Values waiting to be written, in the order the parameters were
+        # first written
+        self._pending = OrderedDict()
+        # Number of times the waiting values that timed out were sent
+        self._attempts = {}
+
+        # Number of values passed to write(), number of values sent and
+        # number of writes dropped without acknowledgement
+        self.requested = 0
+        self.sent = 0
+        self.dropped = 0
+
+        # Called with the complete name and value when a write is acknowledged
+        self.written = Caller()
+
+        cf.param.all_update_callback.add_callback(self._param_updated)
+        cf.disconnected.add_callback(self._disconnected)
+
+    def write(self, complete_name, value):
+        """
+        Write a value to a parameter. If a write to the same parameter is
+        waiting to be sent, the value replaces it.
+        """
+        with self._lock:
+            self.requested += 1
+            self._pending[complete_name] = value
+            self._attempts.pop(complete_name, None)
+        self._send_pending()
+
+    def is_pending(self, complete_name):
+        """Return True if a write to the parameter is queued or in flight"""
+        with self._lock:
+            return complete_name in self._in_flight or complete_name in self._pending
+
+    def _next(self):
+        with self._lock:
+            if len(self._in_flight) >= self.max_in_flight:
+                return None
+            for complete_name in self._pending:
+                if complete_name not in self._in_flight:
+                    value = self._pending.pop(complete_name)
+                    attempts = self._attempts.pop(complete_name, 0) + 1
+                    write = _Write(complete_name, value, attempts)
+                    write.timer = threading.Timer(self.timeout,
+                                                  self._timed_out, [write])
+                    write.timer.daemon = True
+                    self._in_flight[complete_name] = write
+                    self.sent += 1
+                    return write
+        return None
+
+    def _send_pending(self):
+        write = self._next()
+        while write is not None:
+            write.timer.start()
+            try:
+                self._cf.param.set_value(write.complete_name, write.value)
+            except Exception as e:
+                logger.warning('Failed to write %s: %s',
+                               write.complete_name, e)
+                write.timer.cancel()
+                with self._lock:
+                    if self._in_flight.get(write.complete_name) is write:
+                        del self._in_flight[write.complete_name]
+            write = self._next()
+
+    def _param_updated(self, complete_name, value):
+        with self._lock:
+            write = self._in_flight.pop(complete_name, None)
+        if write is None:
+            return
+        write.timer.cancel()
+        self.written.call(complete_name, value)
+        self._send_pending()
+
+    def _is_held_by_param(self, complete_name):
+        # True if the param module has not sent the write yet or is still
+        # waiting for its answer
+        updater = getattr(self._cf.param, 'param_updater', None)
+        if updater is None:
+            return False
+        element = self._cf.param.toc.get_element_by_complete_name(complete_name)
+        if element is None:
+            return False
+        pattern = struct.pack('<H' if updater._useV2 else '<B', element.ident)
+        if updater._lock_pattern is not None and \
+                bytes(updater._lock_pattern) == pattern:
+            return True
+        with updater.request_queue.mutex:
+            queued = list(updater.request_queue.queue)
+        return any(pk.channel == WRITE_CHANNEL and
+                   bytes(pk.data[:len(pattern)]) == pattern for pk in queued)
+
+    def _restart_timer(self, write):
+        write.timer = threading.Timer(self.timeout, self._timed_out, [write])
+        write.timer.daemon = True
+        write.timer.start()
+
+    def _timed_out(self, write):
+        complete_name = write.complete_name
+        with self._lock:
+            if self._in_flight.get(complete_name) is not write:
+                return
+            if self._is_held_by_param(complete_name):
+                # Not lost, the param module has not finished sending it
+                self._restart_timer(write)
+                return
+            del self._in_flight[complete_name]
+            if complete_name in self._pending:
+                # A newer value replaces the lost one
+                pass
+            elif write.attempts < self.max_attempts:
+                # Sent again before the other waiting values
+                self._pending[complete_name] = write.value
+                self._pending.move_to_end(complete_name, last=False)
+                self._attempts[complete_name] = write.attempts
+            else:
+                self.dropped += 1
+                logger.warning('Dropped write of %s to %s, not acknowledged '
+                               'after %d attempts', write.value,
+                               complete_name, write.attempts)
+        self._send_pending()
+
+    def _disconnected(self, link_uri):
+        with self._lock:
+            for write in self._in_flight.values():
+                write.timer.cancel()
+            self._in_flight.clear()
+            self._pending.clear()
+            self._attempts.clear()
@@ -28,35 +28,97 @@
 """
 Implementation of a periodic timer that will call a callback every time
 the timer expires once started.
+
+The callbacks are scheduled against deadlines on time.monotonic(), one
+period apart from the start of the timer, so the time taken by the
+callbacks does not add to the period and the timer does not drift. When
+the callbacks overrun one or more deadlines the timer either skips the
+missed calls and waits for the next deadline (SKIP, the default), or makes
+them at once to catch up (CATCH_UP), at most max_catch_up of them. The
+statistics of the timer (achieved rate, jitter, overruns...) are available
+from stats().
 """
 
+import copy
 import logging
+import math
+import threading
 from threading import Thread
 from cflib.utils.callbacks import Caller
 import time
 
 __author__ = 'Bitcraze AB'
-__all__ = ['PeriodicTimer']
+__all__ = ['PeriodicTimer', 'PeriodicTimerStats']
 
 logger = logging.getLogger(__name__)
 
+# What to do with the calls missed when the callbacks overrun the period
+SKIP = 'skip'
+CATCH_UP = 'catch_up'
+
+
+class PeriodicTimerStats:
+    """
+    Statistics of a periodic timer since it was started. Times are in
+    seconds. The lateness of a call is the time between its deadline and
+    the call, the jitter is the standard deviation of the time between
+    calls. overruns counts the calls that ended after the next deadline and
+    skipped the calls missed because of them.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.calls = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.elapsed = 0.0
+        self.mean_lateness = 0.0
+        self.max_lateness = 0.0
+        self.mean_callback_time = 0.0
+        self.max_callback_time = 0.0
+        self.mean_interval = 0.0
+        self.jitter = 0.0
+
+    @property
+    def rate(self):
+        """Achieved rate of the calls (Hz)"""
+        return 1.0 / self.mean_interval if self.mean_interval > 0 else 0.0
+
+    def __str__(self):
+        return ('{} calls at {:.2f} Hz (period {:.2f} ms), jitter {:.3f} ms, '
+                'lateness {:.3f}/{:.3f} ms, callbacks {:.3f}/{:.3f} ms, '
+                '{} overruns, {} skipped').format(
+            self.calls, self.rate, self.period * 1000, self.jitter * 1000,
+            self.mean_lateness * 1000, self.max_lateness * 1000,
+            self.mean_callback_time * 1000, self.max_callback_time * 1000,
+            self.overruns, self.skipped)
+
 
 class PeriodicTimer:
     """Create a periodic timer that will periodically call a callback"""
 
-    def __init__(self, period, callback):
+    SKIP = SKIP
+    CATCH_UP = CATCH_UP
+
+    def __init__(self, period, callback, policy=SKIP, max_catch_up=10):
+        if policy not in (SKIP, CATCH_UP):
+            raise ValueError('Unknown policy {}'.format(policy))
         self._callbacks = Caller()
         self._callbacks.add_callback(callback)
         self._started = False
         self._period = period
+        self._policy = policy
+        self._max_catch_up = max_catch_up
         self._thread = None
+        self._last_stats = PeriodicTimerStats(period)
 
     def start(self):
         """Start the timer"""
         if self._thread:
             logger.warning("Timer already started, not restarting")
             return
-        self._thread = _PeriodicTimerThread(self._period, self._callbacks)
+        self._thread = _PeriodicTimerThread(self._period, self._callbacks,
+                                            self._policy, self._max_catch_up)
         self._thread.daemon = True
         self._thread.start()
 
@@ -64,23 +126,99 @@ class PeriodicTimer:
         """Stop the timer"""
         if self._thread:
             self._thread.stop()
+            self._last_stats = self._thread.stats()
             self._thread = None
 
+    def stats(self):
+        """
+        Return the PeriodicTimerStats since the timer was started, or of
+        the last run if it is stopped
+        """
+        if self._thread:
+            return self._thread.stats()
+        return self._last_stats
+
 
 class _PeriodicTimerThread(Thread):
 
-    def __init__(self, period, caller):
+    def __init__(self, period, caller, policy=SKIP, max_catch_up=10):
         super(_PeriodicTimerThread, self).__init__()
         self._period = period
         self._callbacks = caller
-        self._stop = False
+        self._policy = policy
+        self._max_catch_up = max_catch_up
+        self._stop_event = threading.Event()
+
+        self._lock = threading.Lock()
+        self._start_time = None
+        self._last_call = None
+        self._stats = PeriodicTimerStats(period)
+        # Sums of the intervals between calls and of their squares
+        self._intervals = 0.0
+        self._intervals_squared = 0.0
+        self._lateness = 0.0
+        self._callback_time = 0.0
 
     def stop(self):
-        self._stop = True
+        self._stop_event.set()
+
+    def stats(self):
+        with self._lock:
+            stats = copy.copy(self._stats)
+        if self._start_time is not None:
+            stats.elapsed = time.monotonic() - self._start_time
+        return stats
+
+    def _record(self, deadline, called, returned):
+        with self._lock:
+            stats = self._stats
+            stats.calls += 1
+            lateness = called - deadline
+            self._lateness += lateness
+            stats.max_lateness = max(stats.max_lateness, lateness)
+            stats.mean_lateness = self._lateness / stats.calls
+            callback_time = returned - called
+            self._callback_time += callback_time
+            stats.max_callback_time = max(stats.max_callback_time,
+                                          callback_time)
+            stats.mean_callback_time = self._callback_time / stats.calls
+            if self._last_call is not None:
+                interval = called - self._last_call
+                self._intervals += interval
+                self._intervals_squared += interval * interval
+                n = stats.calls - 1
+                stats.mean_interval = self._intervals / n
+                variance = self._intervals_squared / n - \
+                    stats.mean_interval ** 2
+                stats.jitter = math.sqrt(max(variance, 0.0))
+            self._last_call = called
 
     def run(self):
-        while not self._stop:
-            time.sleep(self._period)
-            if self._stop:
+        self._start_time = time.monotonic()
+        deadline = self._start_time + self._period
+        while not self._stop_event.is_set():
+            delay = deadline - time.monotonic()
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+            if self._stop_event.is_set():
                 break
+            called = time.monotonic()
             self._callbacks.call()
+            returned = time.monotonic()
+            self._record(deadline, called, returned)
+
+            deadline += self._period
+            if returned < deadline:
+                continue
+            # The callbacks overran the next deadline
+            missed = int((returned - deadline) // self._period) + 1
+            if self._policy == CATCH_UP:
+                # The missed calls are made at once, up to max_catch_up
+                skipped = max(missed - self._max_catch_up, 0)
+            else:
+                # Wait for the first deadline after now
+                skipped = missed
+            deadline += skipped * self._period
+            with self._lock:
+                self._stats.overruns += 1
+                self._stats.skipped += skipped
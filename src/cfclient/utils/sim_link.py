@@ -0,0 +1,419 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+"""
+A simulated Crazyflie link (sim://) for running the client without a radio.
+
+The simulated Crazyflie has the log and param TOC of a Crazyflie 2.1 with the
+variables used by the client, sends log blocks at the requested periods,
+stores param writes and answers app channel packets. It flies a simple model
+of the dynamics driven by the setpoints of the commander, the state estimate,
+attitude, motors and battery voltage follow the setpoints sent to it.
+
+The link is opened with URIs like
+
+    sim://<name>?x=1.0&y=0.5
+
+where the optional x and y set the starting position. App channel packets
+are echoed unless an app handler is set, see SimCrazyflie.app_handler, and
+the dynamics can be replaced by setting SimCrazyflie.controller.
+"""
+
+import math
+import threading
+import time
+
+from cflib.crtp.crtpstack import CRTPPort
+
+from cfclient.utils.mock_link import MockCrazyflie
+from cfclient.utils.mock_link import MockLinkDriver
+from cfclient.utils.mock_link import register_driver
+
+__author__ = 'Bitcraze AB'
+__all__ = ['SimCrazyflie', 'SimLinkDriver', 'init_driver']
+
+APP_CHANNEL = 2
+# Largest payload of an app channel packet
+APP_MAX_PAYLOAD = 30
+
+GRAVITY = 9.81
+# Thrust that keeps the Crazyflie hovering
+HOVER_THRUST = 36000
+MAX_THRUST = 0xFFFF
+# Time constant of the attitude controller (s)
+ATTITUDE_TAU = 0.1
+# Velocity damping (1/s)
+DRAG = 0.5
+# Time without setpoints before the motors are stopped (s)
+SETPOINT_TIMEOUT = 0.5
+# Battery voltage when full and when empty (V), and flight time (s)
+VBAT_FULL = 4.2
+VBAT_EMPTY = 3.0
+FLIGHT_TIME = 7 * 60
+
+# Positions of the ranging anchors (m)
+ANCHORS = [(0, 0, 0), (4, 0, 0), (4, 4, 0), (0, 4, 0),
+           (0, 0, 3), (4, 0, 3), (4, 4, 3), (0, 4, 3)]
+
+
+class _State:
+    """Simulated state of the Crazyflie, SI units and degrees"""
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.z = 0.0
+        self.vx = 0.0
+        self.vy = 0.0
+        self.vz = 0.0
+        self.ax = 0.0
+        self.ay = 0.0
+        self.az = 0.0
+        self.roll = 0.0
+        self.pitch = 0.0
+        self.yaw = 0.0
+        self.roll_rate = 0.0
+        self.pitch_rate = 0.0
+        self.yaw_rate = 0.0
+        self.thrust = 0
+        self.used = 0.0
+
+        # Latest setpoint, roll, pitch, yaw rate and thrust
+        self.setpoint = (0.0, 0.0, 0.0, 0)
+        self.setpoint_time = 0.0
+
+    def vbat(self):
+        return VBAT_FULL - (VBAT_FULL - VBAT_EMPTY) * min(1.0, self.used)
+
+    def distance(self, anchor):
+        return math.sqrt((self.x - anchor[0]) ** 2 +
+                         (self.y - anchor[1]) ** 2 +
+                         (self.z - anchor[2]) ** 2)
+
+
+def _mm(value):
+    return value * 1000
+
+
+def _mrad(degrees):
+    return math.radians(degrees) * 1000
+
+
+# Log variables, their type and how they are computed from the state
+_LOG_VARIABLES = [
+    ('stabilizer', 'roll', 'float', lambda s: s.roll),
+    ('stabilizer', 'pitch', 'float', lambda s: s.pitch),
+    ('stabilizer', 'yaw', 'float', lambda s: s.yaw),
+    ('stabilizer', 'thrust', 'float', lambda s: s.thrust),
+    ('stateEstimate', 'x', 'float', lambda s: s.x),
+    ('stateEstimate', 'y', 'float', lambda s: s.y),
+    ('stateEstimate', 'z', 'float', lambda s: s.z),
+    ('stateEstimate', 'vx', 'float', lambda s: s.vx),
+    ('stateEstimate', 'vy', 'float', lambda s: s.vy),
+    ('stateEstimate', 'vz', 'float', lambda s: s.vz),
+    ('stateEstimate', 'ax', 'float', lambda s: s.ax / GRAVITY),
+    ('stateEstimate', 'ay', 'float', lambda s: s.ay / GRAVITY),
+    ('stateEstimate', 'az', 'float', lambda s: s.az / GRAVITY),
+    ('stateEstimate', 'roll', 'float', lambda s: s.roll),
+    ('stateEstimate', 'pitch', 'float', lambda s: s.pitch),
+    ('stateEstimate', 'yaw', 'float', lambda s: s.yaw),
+    ('stateEstimateZ', 'x', 'int16_t', lambda s: _mm(s.x)),
+    ('stateEstimateZ', 'y', 'int16_t', lambda s: _mm(s.y)),
+    ('stateEstimateZ', 'z', 'int16_t', lambda s: _mm(s.z)),
+    ('stateEstimateZ', 'vx', 'int16_t', lambda s: _mm(s.vx)),
+    ('stateEstimateZ', 'vy', 'int16_t', lambda s: _mm(s.vy)),
+    ('stateEstimateZ', 'vz', 'int16_t', lambda s: _mm(s.vz)),
+    ('stateEstimateZ', 'rateRoll', 'int16_t', lambda s: _mrad(s.roll_rate)),
+    ('stateEstimateZ', 'ratePitch', 'int16_t',
+     lambda s: _mrad(s.pitch_rate)),
+    ('stateEstimateZ', 'rateYaw', 'int16_t', lambda s: _mrad(s.yaw_rate)),
+    ('ctrltarget', 'roll', 'float', lambda s: s.setpoint[0]),
+    ('ctrltarget', 'pitch', 'float', lambda s: s.setpoint[1]),
+    ('ctrltarget', 'yaw', 'float', lambda s: s.setpoint[2]),
+    ('ctrltargetZ', 'x', 'int16_t', lambda s: _mm(s.x)),
+    ('ctrltargetZ', 'y', 'int16_t', lambda s: _mm(s.y)),
+    ('ctrltargetZ', 'z', 'int16_t', lambda s: _mm(s.z)),
+    ('ctrltargetZ', 'vx', 'int16_t', lambda s: _mm(s.vx)),
+    ('ctrltargetZ', 'vy', 'int16_t', lambda s: _mm(s.vy)),
+    ('ctrltargetZ', 'vz', 'int16_t', lambda s: _mm(s.vz)),
+    ('ctrltargetZ', 'ax', 'int16_t', lambda s: _mm(s.ax)),
+    ('ctrltargetZ', 'ay', 'int16_t', lambda s: _mm(s.ay)),
+    ('ctrltargetZ', 'az', 'int16_t', lambda s: _mm(s.az)),
+    ('controller', 'roll', 'float', lambda s: s.setpoint[0]),
+    ('controller', 'pitch', 'float', lambda s: s.setpoint[1]),
+    ('controller', 'yaw', 'float', lambda s: s.yaw),
+    ('controller', 'rollRate', 'float', lambda s: s.roll_rate),
+    ('controller', 'pitchRate', 'float', lambda s: s.pitch_rate),
+    ('controller', 'yawRate', 'float', lambda s: s.setpoint[2]),
+    ('posCtl', 'targetX', 'float', lambda s: s.x),
+    ('posCtl', 'targetY', 'float', lambda s: s.y),
+    ('posCtl', 'targetZ', 'float', lambda s: s.z),
+    ('posCtl', 'targetVX', 'float', lambda s: s.vx),
+    ('posCtl', 'targetVY', 'float', lambda s: s.vy),
+    ('posCtl', 'targetVZ', 'float', lambda s: s.vz),
+    ('acc', 'x', 'float', lambda s: s.ax / GRAVITY),
+    ('acc', 'y', 'float', lambda s: s.ay / GRAVITY),
+    ('acc', 'z', 'float', lambda s: s.az / GRAVITY + 1),
+    ('gyro', 'x', 'float', lambda s: s.roll_rate),
+    ('gyro', 'y', 'float', lambda s: s.pitch_rate),
+    ('gyro', 'z', 'float', lambda s: s.yaw_rate),
+    ('baro', 'asl', 'float', lambda s: s.z),
+    ('baro', 'temp', 'float', lambda s: 25.0),
+    ('baro', 'pressure', 'float', lambda s: 1013.25 - s.z * 0.12),
+    ('motor', 'm1', 'uint32_t', lambda s: s.thrust),
+    ('motor', 'm2', 'uint32_t', lambda s: s.thrust),
+    ('motor', 'm3', 'uint32_t', lambda s: s.thrust),
+    ('motor', 'm4', 'uint32_t', lambda s: s.thrust),
+    ('pm', 'vbat', 'float', lambda s: s.vbat()),
+    ('pm', 'state', 'int8_t', lambda s: 0),
+    ('pm', 'batteryLevel', 'uint8_t',
+     lambda s: 100 * (s.vbat() - VBAT_EMPTY) / (VBAT_FULL - VBAT_EMPTY)),
+    ('sys', 'canfly', 'uint8_t', lambda s: 1),
+    ('sys', 'isFlying', 'uint8_t', lambda s: s.z > 0),
+    ('supervisor', 'info', 'uint16_t', lambda s: 0x03 if s.z > 0 else 0x01),
+    ('radio', 'rssi', 'uint8_t', lambda s: 40),
+    ('gps', 'lat', 'int32_t', lambda s: 0),
+    ('gps', 'lon', 'int32_t', lambda s: 0),
+    ('gps', 'hMSL', 'float', lambda s: 0.0),
+    ('gps', 'hAcc', 'float', lambda s: 0.0),
+    ('gps', 'nsat', 'uint8_t', lambda s: 0),
+] + [('ranging', 'distance{}'.format(i), 'float',
+      lambda s, anchor=anchor: s.distance(anchor))
+     for i, anchor in enumerate(ANCHORS)]
+
+# Params, their type, if they are read-only and their default value
+_PARAMS = [
+    ('firmware', 'revision0', 'uint32_t', True, 0),
+    ('firmware', 'revision1', 'uint16_t', True, 0),
+    ('firmware', 'modified', 'uint8_t', True, 0),
+    ('imu_sensors', 'BMP388', 'uint8_t', True, 1),
+    ('imu_sensors', 'AK8963', 'uint8_t', True, 0),
+    ('imu_tests', 'BMI088', 'uint8_t', True, 1),
+    ('deck', 'bcLighthouse4', 'uint8_t', True, 0),
+    ('deck', 'bcLoco', 'uint8_t', True, 0),
+    ('deck', 'bcFlow', 'uint8_t', True, 0),
+    ('deck', 'bcFlow2', 'uint8_t', True, 0),
+    ('deck', 'bcZRanger', 'uint8_t', True, 0),
+    ('deck', 'bcZRanger2', 'uint8_t', True, 0),
+    ('deck', 'bcLedRing', 'uint8_t', True, 0),
+    ('ring', 'effect', 'uint8_t', False, 6),
+    ('ring', 'neffect', 'uint8_t', True, 20),
+    ('ring', 'headlightEnable', 'uint8_t', False, 0),
+    ('flightmode', 'althold', 'uint8_t', False, 0),
+    ('flightmode', 'stabModeRoll', 'uint8_t', False, 1),
+    ('flightmode', 'stabModePitch', 'uint8_t', False, 1),
+    ('flightmode', 'stabModeYaw', 'uint8_t', False, 0),
+    ('commander', 'enHighLevel', 'uint8_t', False, 0),
+    ('stabilizer', 'estimator', 'uint8_t', False, 2),
+    ('stabilizer', 'controller', 'uint8_t', False, 1),
+    ('stabilizer', 'stop', 'uint8_t', False, 0),
+    ('kalman', 'resetEstimation', 'uint8_t', False, 0),
+    ('pm', 'lowVoltage', 'float', False, 3.2),
+    ('pm', 'criticalLowVoltage', 'float', False, 3.0),
+    ('health', 'startPropTest', 'uint8_t', False, 0),
+    ('health', 'startBatTest', 'uint8_t', False, 0),
+    ('system', 'taskDump', 'uint8_t', False, 0),
+    ('system', 'assertInfo', 'uint8_t', False, 0),
+    ('system', 'storageStats', 'uint8_t', False, 0),
+    ('pid_attitude', 'roll_kp', 'float', False, 6.0),
+    ('pid_attitude', 'roll_ki', 'float', False, 3.0),
+    ('pid_attitude', 'roll_kd', 'float', False, 0.0),
+    ('pid_attitude', 'pitch_kp', 'float', False, 6.0),
+    ('pid_attitude', 'pitch_ki', 'float', False, 3.0),
+    ('pid_attitude', 'pitch_kd', 'float', False, 0.0),
+    ('pid_attitude', 'yaw_kp', 'float', False, 6.0),
+    ('pid_attitude', 'yaw_ki', 'float', False, 1.0),
+    ('pid_attitude', 'yaw_kd', 'float', False, 0.35),
+    ('pid_rate', 'roll_kp', 'float', False, 250.0),
+    ('pid_rate', 'roll_ki', 'float', False, 500.0),
+    ('pid_rate', 'roll_kd', 'float', False, 2.5),
+    ('pid_rate', 'pitch_kp', 'float', False, 250.0),
+    ('pid_rate', 'pitch_ki', 'float', False, 500.0),
+    ('pid_rate', 'pitch_kd', 'float', False, 2.5),
+    ('pid_rate', 'yaw_kp', 'float', False, 120.0),
+    ('pid_rate', 'yaw_ki', 'float', False, 16.7),
+    ('pid_rate', 'yaw_kd', 'float', False, 0.0),
+    ('posCtlPid', 'xKp', 'float', False, 2.0),
+    ('posCtlPid', 'xKi', 'float', False, 0.0),
+    ('posCtlPid', 'xKd', 'float', False, 0.0),
+    ('posCtlPid', 'yKp', 'float', False, 2.0),
+    ('posCtlPid', 'yKi', 'float', False, 0.0),
+    ('posCtlPid', 'yKd', 'float', False, 0.0),
+    ('posCtlPid', 'zKp', 'float', False, 2.0),
+    ('posCtlPid', 'zKi', 'float', False, 0.5),
+    ('posCtlPid', 'zKd', 'float', False, 0.0),
+    ('velCtlPid', 'vxKp', 'float', False, 25.0),
+    ('velCtlPid', 'vxKi', 'float', False, 1.0),
+    ('velCtlPid', 'vxKd', 'float', False, 0.0),
+    ('velCtlPid', 'vxKFF', 'float', False, 0.0),
+    ('velCtlPid', 'vyKp', 'float', False, 25.0),
+    ('velCtlPid', 'vyKi', 'float', False, 1.0),
+    ('velCtlPid', 'vyKd', 'float', False, 0.0),
+    ('velCtlPid', 'vyKFF', 'float', False, 0.0),
+]
+
+
+class SimCrazyflie(MockCrazyflie):
+    """
+    A simulated Crazyflie. The state is advanced when log data is sent and
+    when setpoints are received.
+    """
+
+    def __init__(self, x=0.0, y=0.0):
+        self._state = _State(x, y)
+        self._state_lock = threading.Lock()
+        self._last_step = time.monotonic()
+        self._values = [var[3] for var in _LOG_VARIABLES]
+
+        # Called with the payload of app channel packets, returns a list of
+        # payloads to answer with. Packets are echoed if not set.
+        self.app_handler = None
+        # Called with the state and the time step (s) to advance the state
+        # instead of flying on the setpoints of the commander, for instance to
+        # fly a mission run on board
+        self.controller = None
+
+        super().__init__()
+
+    def _create_log_toc(self, count):
+        return [self._log_variable(i, group, name, ctype)
+                for i, (group, name, ctype, _) in enumerate(_LOG_VARIABLES)]
+
+    def _create_param_toc(self, count):
+        return [self._param(i, group, name, ctype, read_only, value)
+                for i, (group, name, ctype, read_only, value)
+                in enumerate(_PARAMS)]
+
+    def send_app_packet(self, data):
+        """Send an app channel packet to the client"""
+        self._send(CRTPPort.PLATFORM, APP_CHANNEL,
+                   bytes(data[:APP_MAX_PAYLOAD]))
+
+    def _handle_platform(self, channel, data):
+        if channel != APP_CHANNEL:
+            super()._handle_platform(channel, data)
+            return
+
+        if self.app_handler is None:
+            self.send_app_packet(data)
+            return
+        # Let the handler answer with an up to date state
+        with self._state_lock:
+            self._step(time.monotonic())
+        for answer in self.app_handler(data) or []:
+            self.send_app_packet(answer)
+
+    def _setpoint(self, roll, pitch, yaw, thrust):
+        with self._state_lock:
+            now = time.monotonic()
+            self._step(now)
+            self._state.setpoint = (roll, pitch, yaw, thrust)
+            self._state.setpoint_time = now
+        super()._setpoint(roll, pitch, yaw, thrust)
+
+    def _log_values(self, block, t):
+        with self._state_lock:
+            self._step(t)
+            return super()._log_values(block, t)
+
+    def _log_value(self, entry, fmt, t):
+        value = self._values[entry.ident](self._state)
+        if fmt not in 'fe':
+            value = round(value)
+        return value
+
+    def _step(self, now):
+        """Advance the simulation to now"""
+        dt = now - self._last_step
+        if dt <= 0:
+            return
+        self._last_step = now
+        s = self._state
+
+        if self.controller is not None:
+            self.controller(s, dt)
+            return
+
+        roll, pitch, yaw_rate, thrust = s.setpoint
+        if now - s.setpoint_time > SETPOINT_TIMEOUT:
+            roll, pitch, yaw_rate, thrust = 0.0, 0.0, 0.0, 0
+
+        # The attitude follows the setpoint with a first order lag
+        k = min(1.0, dt / ATTITUDE_TAU)
+        s.roll_rate = (roll - s.roll) * k / dt
+        s.pitch_rate = (pitch - s.pitch) * k / dt
+        s.yaw_rate = yaw_rate
+        s.roll += s.roll_rate * dt
+        s.pitch += s.pitch_rate * dt
+        s.yaw = (s.yaw + yaw_rate * dt + 180) % 360 - 180
+        s.thrust = thrust
+
+        # Thrust along the body z axis, pitch forward is positive x
+        lift = GRAVITY * thrust / HOVER_THRUST
+        r = math.radians(s.roll)
+        p = math.radians(s.pitch)
+        y = math.radians(s.yaw)
+        fx = lift * math.sin(p)
+        fy = -lift * math.sin(r)
+        s.ax = fx * math.cos(y) - fy * math.sin(y) - DRAG * s.vx
+        s.ay = fx * math.sin(y) + fy * math.cos(y) - DRAG * s.vy
+        s.az = lift * math.cos(r) * math.cos(p) - GRAVITY - DRAG * s.vz
+
+        s.vx += s.ax * dt
+        s.vy += s.ay * dt
+        s.vz += s.az * dt
+        s.x += s.vx * dt
+        s.y += s.vy * dt
+        s.z += s.vz * dt
+        if s.z <= 0:
+            # On the ground
+            s.z = 0.0
+            s.vx = s.vy = s.vz = 0.0
+            s.ax = s.ay = s.az = 0.0
+
+        s.used += dt * thrust / HOVER_THRUST / FLIGHT_TIME
+
+
+class SimLinkDriver(MockLinkDriver):
+    """CRTP driver for links to simulated Crazyflies"""
+
+    SCHEME = 'sim'
+
+    OPTIONS = {'x': float, 'y': float}
+
+    _crazyflies = {}
+
+    def _create_crazyflie(self, options):
+        return SimCrazyflie(**options)
+
+    def scan_interface(self, address=None):
+        return [['{}://0'.format(self.SCHEME), '']]
+
+
+def init_driver():
+    """Make cflib open sim:// links"""
+    register_driver(SimLinkDriver)
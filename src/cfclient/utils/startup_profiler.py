@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+"""
+Profiles the startup of the client. The client is started in a child process
+with the Python import time tracing enabled (-X importtime), when the main
+window has been shown the child reports back and exits. The import times are
+parsed into a per module tree together with the time it took from starting
+the process until the window was shown.
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import time
+
+__author__ = 'Bitcraze AB'
+__all__ = ['ImportNode', 'parse_importtime', 'format_import_tree',
+           'slowest_imports', 'is_profiling', 'notify_window_shown',
+           'profile_startup']
+
+logger = logging.getLogger(__name__)
+
+# Set in the environment of the child process that is profiled
+ENV_PROFILE_STARTUP = 'CFCLIENT_PROFILE_STARTUP'
+
+# Written to stderr by the child process when the main window is shown
+WINDOW_SHOWN_MARKER = 'cfclient-startup: window shown'
+
+_IMPORTTIME_PREFIX = 'import time:'
+
+
+class ImportNode:
+    """A module in the import tree, times are in seconds"""
+
+    def __init__(self, name, self_time, cumulative_time, children=None):
+        self.name = name
+        self.self_time = self_time
+        self.cumulative_time = cumulative_time
+        self.children = children if children is not None else []
+
+    def walk(self, depth=0):
+        """Iterate over the node and its children as (depth, node) tuples"""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+
+def parse_importtime(lines):
+    """
+    Parse the output of python -X importtime into a list of import trees,
+    one for each top level import. Lines that are not part of the import
+    time output are ignored.
+    """
+    # Modules are reported after the modules they import, keep the finished
+    # nodes of each level until the parent shows up
+    pending = {}
+    for line in lines:
+        if not line.startswith(_IMPORTTIME_PREFIX):
+            continue
+        fields = line[len(_IMPORTTIME_PREFIX):].split('|')
+        if len(fields) != 3:
+            continue
+        try:
+            self_us = int(fields[0])
+            cumulative_us = int(fields[1])
+        except ValueError:
+            # The header line
+            continue
+
+        name = fields[2].rstrip()
+        level = (len(name) - len(name.lstrip())) // 2
+        node = ImportNode(name.strip(), self_us / 1e6, cumulative_us / 1e6,
+                          pending.pop(level + 1, []))
+        pending.setdefault(level, []).append(node)
+
+    return pending.get(0, [])
+
+
+def format_import_tree(roots, min_time=0.001):
+    """
+    Format the import trees as text, one module per line with cumulative
+    and self time in ms. Modules (and their children) that took less than
+    min_time seconds to import are left out.
+    """
+    lines = ['{:>10} {:>10}  {}'.format('cumul [ms]', 'self [ms]', 'module')]
+    for root in roots:
+        lines += _format_node(root, 0, min_time)
+    return '\n'.join(lines)
+
+
+def _format_node(node, depth, min_time):
+    if node.cumulative_time < min_time:
+        return []
+    lines = ['{:>10.1f} {:>10.1f}  {}{}'.format(
+        node.cumulative_time * 1000, node.self_time * 1000,
+        '  ' * depth, node.name)]
+    for child in node.children:
+        lines += _format_node(child, depth + 1, min_time)
+    return lines
+
+
+def slowest_imports(roots, count=15):
+    """Return the count modules with the highest self time"""
+    nodes = [node for root in roots for _, node in root.walk()]
+    return sorted(nodes, key=lambda n: n.self_time, reverse=True)[:count]
+
+
+def is_profiling():
+    """Return True if this process is a client started to be profiled"""
+    return ENV_PROFILE_STARTUP in os.environ
+
+
+def notify_window_shown():
+    """Tell the profiling process that the main window is shown"""
+    sys.stderr.write(WINDOW_SHOWN_MARKER + '\n')
+    sys.stderr.flush()
+
+
+def profile_startup(args=None, min_time=0.001, budget=None, out=None):
+    """
+    Start the client in a child process and report the import tree and
+    the time to window. If budget (in seconds) is set and the window was not
+    shown within the budget 1 is returned, otherwise 0.
+    """
+    if args is None:
+        args = []
+    if out is None:
+        out = sys.stdout
+
+    env = dict(os.environ)
+    env[ENV_PROFILE_STARTUP] = '1'
+    cmd = [sys.executable, '-X', 'importtime', '-m', 'cfclient.gui'] + args
+
+    logger.info('Profiling startup: %s', ' '.join(cmd))
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env, stderr=subprocess.PIPE,
+                            universal_newlines=True)
+
+    importtime = []
+    time_to_window = None
+    for line in proc.stderr:
+        if line.startswith(_IMPORTTIME_PREFIX):
+            importtime.append(line)
+        elif line.strip() == WINDOW_SHOWN_MARKER:
+            time_to_window = time.perf_counter() - start
+        else:
+            # Log output from the client
+            sys.stderr.write(line)
+    proc.wait()
+
+    roots = parse_importtime(importtime)
+    out.write(format_import_tree(roots, min_time) + '\n\n')
+
+    out.write('Slowest imports (self time):\n')
+    for node in slowest_imports(roots):
+        out.write('{:>10.1f}  {}\n'.format(node.self_time * 1000, node.name))
+    out.write('\n')
+
+    total_imports = sum(root.cumulative_time for root in roots)
+    out.write('Total import time: {:.3f} s\n'.format(total_imports))
+
+    if time_to_window is None:
+        out.write('The main window was never shown (exit code {})\n'.format(
+            proc.returncode))
+        return 1
+
+    out.write('Time to window: {:.3f} s\n'.format(time_to_window))
+    if budget is not None and time_to_window > budget:
+        out.write('Startup budget of {:.3f} s exceeded!\n'.format(budget))
+        return 1
+
+    return 0
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#  02110-1301, USA.
+"""
+Cache of compiled Qt Designer .ui files.
+
+Loading a .ui file with uic.loadUiType() parses the XML and generates Python
+code every time the application is started. Instead the generated code is
+stored as a Python module in the user cache dir, keyed on a hash of the .ui
+file, and imported the next time. If the .ui file changes the hash changes
+and the file is compiled again. If anything goes wrong the .ui file is loaded
+with uic.loadUiType() as before.
+
+The cache can be filled in advance by running
+python -m cfclient.utils.uicache
+"""
+
+import hashlib
+import importlib.util
+import io
+import logging
+import os
+import sys
+
+from appdirs import AppDirs
+from PyQt6 import QtWidgets
+from PyQt6.QtCore import PYQT_VERSION_STR
+
+__author__ = 'Bitcraze AB'
+__all__ = ['load_ui_type']
+
+logger = logging.getLogger(__name__)
+
+# Bump if the layout of the cached modules changes
+CACHE_VERSION = '1'
+
+cache_path = os.path.join(AppDirs("cfclient", "Bitcraze").user_cache_dir,
+                          'ui')
+
+
+def load_ui_type(ui_path):
+    """
+    Drop in replacement for uic.loadUiType(), returns the generated form
+    class and the Qt base class for the .ui file.
+    """
+    try:
+        return _load_cached(ui_path)
+    except Exception as e:
+        logger.warning('Failed to use ui cache for %s: %s', ui_path, e)
+        from PyQt6 import uic
+        return uic.loadUiType(ui_path)
+
+
+def _cache_file(ui_path, ui_data):
+    key = hashlib.sha1()
+    key.update(CACHE_VERSION.encode())
+    key.update(PYQT_VERSION_STR.encode())
+    key.update(ui_data)
+    stem = os.path.splitext(os.path.basename(ui_path))[0]
+    return os.path.join(cache_path,
+                        '{}_{}.py'.format(stem, key.hexdigest()[:16]))
+
+
+def _load_cached(ui_path):
+    with open(ui_path, 'rb') as f:
+        ui_data = f.read()
+
+    module_path = _cache_file(ui_path, ui_data)
+    if not os.path.exists(module_path):
+        _compile(ui_data, module_path)
+
+    name = 'cfclient_ui_cache.' + os.path.basename(module_path)[:-3]
+    spec = importlib.util.spec_from_file_location(name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    # Same lookup of the base class as uic.loadUiType()
+    ui_base = getattr(module, module.UI_BASE_CLASS, None)
+    if ui_base is None:
+        ui_base = getattr(QtWidgets, module.UI_BASE_CLASS)
+
+    return getattr(module, module.UI_CLASS), ui_base
+
+
+def _compile(ui_data, module_path):
+    # The compiler is only needed when the cache is updated, do not import it
+    # at startup
+    from PyQt6.uic.Compiler import compiler
+
+    code = io.StringIO()
+    winfo = compiler.UICompiler().compileUi(io.BytesIO(ui_data), code)
+    code.write('\nUI_CLASS = {!r}\n'.format(winfo['uiclass']))
+    code.write('UI_BASE_CLASS = {!r}\n'.format(winfo['baseclass']))
+
+    os.makedirs(cache_path, exist_ok=True)
+
+    # Write to a temporary file first so that a module is never half written
+    # if several clients are started at the same time
+    tmp_path = '{}.{}.tmp'.format(module_path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        f.write(code.getvalue())
+    os.replace(tmp_path, module_path)
+    logger.info('Compiled ui file to %s', module_path)
+
+
+def main():
+    """Compile all .ui files in the client to the cache"""
+    import cfclient
+
+    roots = [cfclient.module_path] + sys.argv[1:]
+    lis_spec = importlib.util.find_spec('lis')
+    if lis_spec is not None:
+        roots += lis_spec.submodule_search_locations
+    for root in roots:
+        for dir_path, _, files in os.walk(root):
+            for name in files:
+                if name.endswith('.ui'):
+                    ui_path = os.path.join(dir_path, name)
+                    load_ui_type(ui_path)
+                    print(ui_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -31,16 +31,26 @@ Server used to connect to a Crazyflie using ZMQ.
 
 import sys
 import os
+import json
 import logging
 import signal
+import struct
+import threading
+import time
 import zmq
-import queue
+from functools import partial
 from threading import Thread
 import cflib.crtp
 from cflib.crazyflie import Crazyflie
 from cflib.crazyflie.log import LogConfig
+from cflib.utils.callbacks import Caller
 
 import cfclient
+from cfclient.utils.connection_profiler import ConnectionProfiler
+from cfclient.utils import sim_link
+from cfzmq.logstream import BinaryLogStream
+from cfzmq.logstream import DEFAULT_BATCH_MS
+from cfzmq.logstream import DEFAULT_BATCH_SAMPLES
 
 if os.name == 'posix':
     print('Disabling standard output for libraries!')
@@ -52,7 +62,7 @@ if os.name == 'posix':
 #   so it doesn't need a windowing system.
 os.environ["SDL_VIDEODRIVER"] = "dummy"
 
-# Main command socket for control (ping/pong)
+# Main command socket for control (router, answers requests in any order)
 ZMQ_SRV_PORT = 0
 # Log data socket (publish)
 ZMQ_LOG_PORT = 1
@@ -65,73 +75,270 @@ ZMQ_CTRL_PORT = 4
 
 # Timeout before giving up when verifying param write
 PARAM_TIMEOUT = 2
-# Timeout before giving up connection
-CONNECT_TIMEOUT = 5
+# Timeout before giving up connection, including downloading the TOCs
+CONNECT_TIMEOUT = 30
 # Timeout before giving up adding/starting log config
 LOG_TIMEOUT = 10
 
+# Alias of the Crazyflie when only serving one
+DEFAULT_ALIAS = "cf"
+
+# Time without setpoints before the motors are stopped, when forwarding
+# setpoints at a fixed rate
+CTRL_TIMEOUT = 0.5
+# Interval for publishing setpoint statistics
+CTRL_STATS_INTERVAL = 1.0
+
+# Binary setpoint: magic, version, length of the target, roll, pitch, yaw,
+# thrust and the time (time.time()) the client sent it. Followed by the
+# target encoded as UTF-8.
+SETPOINT = struct.Struct('<2sBBfffHd')
+SETPOINT_MAGIC = b'SP'
+
+# Topics of the events on the connection socket
+TOPIC_CONN = "conn"
+TOPIC_CTRL = "ctrl"
+
 logger = logging.getLogger(__name__)
 
 
+class _LockedSocket:
+    """
+    Wraps a socket that is sent to from several threads. ZMQ sockets are not
+    thread safe, the sends are serialized with a lock.
+    """
+
+    def __init__(self, socket):
+        self._socket = socket
+        self._lock = threading.Lock()
+
+    def send(self, data, *args, **kwargs):
+        with self._lock:
+            self._socket.send(data, *args, **kwargs)
+
+    def send_json(self, obj, *args, **kwargs):
+        with self._lock:
+            self._socket.send_json(obj, *args, **kwargs)
+
+    def send_multipart(self, frames, *args, **kwargs):
+        with self._lock:
+            self._socket.send_multipart(frames, *args, **kwargs)
+
+
+class _Request:
+    """A command from a client waiting for its response"""
+
+    def __init__(self, envelope, cmd):
+        # Routing frames of the ROUTER socket, including the empty delimiter
+        self.envelope = envelope
+        self.cmd = cmd
+        self.timer = None
+
+
+class _Drone:
+    """A Crazyflie served by the server"""
+
+    def __init__(self, alias, cf):
+        self.alias = alias
+        self.uri = None
+        self.cf = cf
+        # Prefix of the topic frame of events for this Crazyflie
+        self.topic = "{}/".format(alias).encode()
+
+        self.logging_configs = {}
+        # Binary streams for the log configurations not using JSON
+        self.log_streams = {}
+
+
+class _DronePool:
+    """
+    The Crazyflies served by the server. Without multi there is only one
+    Crazyflie, that is used for every connection. With multi a Crazyflie is
+    added for every URI that is connected to, and commands select the
+    Crazyflie with a target that is either the alias or the URI.
+    """
+
+    def __init__(self, create_cf, multi):
+        self.multi = multi
+        self._create_cf = create_cf
+        self._drones = []
+        self._lock = threading.Lock()
+        # Called with every new drone
+        self.added = Caller()
+
+    def start(self):
+        if not self.multi:
+            self._add(DEFAULT_ALIAS)
+
+    def _add(self, alias):
+        drone = _Drone(alias, self._create_cf(alias))
+        with self._lock:
+            self._drones.append(drone)
+        self.added.call(drone)
+        return drone
+
+    def drones(self):
+        with self._lock:
+            return list(self._drones)
+
+    def find(self, target):
+        """
+        Return the drone with target as alias or URI. If there is only one
+        drone, target can be left out.
+        """
+        with self._lock:
+            if not self.multi or (target is None and len(self._drones) == 1):
+                return self._drones[0] if self._drones else None
+            for drone in self._drones:
+                if target in (drone.alias, drone.uri):
+                    return drone
+        return None
+
+    def get(self, uri, alias=None):
+        """Return the drone to connect to uri, adding it if needed"""
+        drone = self.find(alias if alias else uri)
+        if drone is None:
+            drone = self.find(uri)
+        if drone is None:
+            drone = self._add(alias if alias else uri)
+        return drone
+
+
 class _SrvThread(Thread):
 
-    def __init__(self, socket, log_socket, param_socket, conn_socket, cf,
-                 *args):
+    def __init__(self, socket, log_socket, param_socket, conn_socket, pool,
+                 topics=False, *args):
         super(_SrvThread, self).__init__(*args)
+        self._topics = topics
         self._socket = socket
         self._log_socket = log_socket
         self._param_socket = param_socket
         self._conn_socket = conn_socket
-        self._cf = cf
-
-        self._cf.connected.add_callback(self._connected)
-        self._cf.connection_failed.add_callback(self._connection_failed)
-        self._cf.connection_lost.add_callback(self._connection_lost)
-        self._cf.disconnected.add_callback(self._disconnected)
-        self._cf.connection_requested.add_callback(self._connection_requested)
-        self._cf.param.all_updated.add_callback(self._tocs_updated)
-        self._cf.param.all_update_callback.add_callback(self._all_param_update)
-
-        self._conn_queue = queue.Queue(1)
-        self._param_queue = queue.Queue(1)
-        self._log_started_queue = queue.Queue(1)
-        self._log_added_queue = queue.Queue(1)
-
-        self._logging_configs = {}
-
-    def _connection_requested(self, uri):
+        self._pool = pool
+        self._pool.added.add_callback(self._drone_added)
+
+        # Responses are created in other threads (cflib callbacks, timeouts
+        # and workers) and passed to the server thread, that owns the
+        # command socket, through an inproc pipe
+        pipe_addr = "inproc://cfzmq-responses-{}".format(id(self))
+        self._responses = socket.context.socket(zmq.PULL)
+        self._responses.bind(pipe_addr)
+        push = socket.context.socket(zmq.PUSH)
+        push.connect(pipe_addr)
+        self._response_pipe = _LockedSocket(push)
+
+        # Requests waiting for an event, indexed on a key for the event
+        self._waiting = {}
+        self._waiting_lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+
+        self._next_stream_id = 0
+
+    def _drone_added(self, drone):
+        cf = drone.cf
+        cf.connected.add_callback(partial(self._connected, drone))
+        cf.connection_failed.add_callback(
+            partial(self._connection_failed, drone))
+        cf.connection_lost.add_callback(partial(self._connection_lost, drone))
+        cf.disconnected.add_callback(partial(self._disconnected, drone))
+        cf.connection_requested.add_callback(
+            partial(self._connection_requested, drone))
+        cf.param.all_updated.add_callback(partial(self._tocs_updated, drone))
+        cf.param.all_update_callback.add_callback(
+            partial(self._all_param_update, drone))
+
+    def _publish(self, socket, drone, topic, msg):
+        """
+        Publish an event or log frame. With topics, or with several
+        Crazyflies, the message is preceded by a topic frame so subscribers
+        can filter on the topic. With several Crazyflies the topic starts
+        with the alias of the Crazyflie.
+        """
+        data = msg if isinstance(msg, bytes) else json.dumps(msg).encode()
+        if self._pool.multi:
+            socket.send_multipart([drone.topic + topic.encode(), data])
+        elif self._topics:
+            socket.send_multipart([topic.encode(), data])
+        else:
+            socket.send(data)
+
+    def _respond(self, request, response):
+        """Send the response to a request, can be called from any thread"""
+        if "id" in request.cmd:
+            response["id"] = request.cmd["id"]
+        self._response_pipe.send_multipart(
+            request.envelope + [json.dumps(response).encode()])
+
+    def _wait(self, key, request, timeout, timeout_response):
+        """
+        Respond to the request when the event identified by key happens, or
+        with timeout_response after timeout seconds
+        """
+        request.timer = threading.Timer(
+            timeout, self._timed_out, (key, request, timeout_response))
+        request.timer.daemon = True
+        with self._waiting_lock:
+            self._waiting.setdefault(key, []).append(request)
+        request.timer.start()
+
+    def _cancel(self, key, request):
+        """Stop waiting, returns False if the request was already handled"""
+        with self._waiting_lock:
+            requests = self._waiting.get(key, [])
+            if request not in requests:
+                return False
+            requests.remove(request)
+            if not requests:
+                del self._waiting[key]
+        request.timer.cancel()
+        return True
+
+    def _timed_out(self, key, request, response):
+        if self._cancel(key, request):
+            self._respond(request, response)
+
+    def _complete(self, key, response):
+        """Respond to all the requests waiting for the event"""
+        with self._waiting_lock:
+            requests = self._waiting.pop(key, [])
+        for request in requests:
+            request.timer.cancel()
+            self._respond(request, dict(response))
+
+    def _connection_requested(self, drone, uri):
         conn_ev = {"version": 1, "event": "requested", "uri": uri}
-        self._conn_socket.send_json(conn_ev)
+        self._publish(self._conn_socket, drone, TOPIC_CONN, conn_ev)
 
-    def _connected(self, uri):
+    def _connected(self, drone, uri):
         conn_ev = {"version": 1, "event": "connected", "uri": uri}
-        self._conn_socket.send_json(conn_ev)
+        self._publish(self._conn_socket, drone, TOPIC_CONN, conn_ev)
 
-    def _connection_failed(self, uri, msg):
+    def _connection_failed(self, drone, uri, msg):
         logger.info("Connection failed to {}: {}".format(uri, msg))
         resp = {"version": 1, "status": 1, "msg": msg}
-        self._conn_queue.put_nowait(resp)
+        self._complete((drone.alias, "connect"), resp)
         conn_ev = {"version": 1, "event": "failed", "uri": uri, "msg": msg}
-        self._conn_socket.send_json(conn_ev)
+        self._publish(self._conn_socket, drone, TOPIC_CONN, conn_ev)
 
-    def _connection_lost(self, uri, msg):
+    def _connection_lost(self, drone, uri, msg):
         conn_ev = {"version": 1, "event": "lost", "uri": uri, "msg": msg}
-        self._conn_socket.send_json(conn_ev)
+        self._publish(self._conn_socket, drone, TOPIC_CONN, conn_ev)
 
-    def _disconnected(self, uri):
+    def _disconnected(self, drone, uri):
         conn_ev = {"version": 1, "event": "disconnected", "uri": uri}
-        self._conn_socket.send_json(conn_ev)
+        self._publish(self._conn_socket, drone, TOPIC_CONN, conn_ev)
 
-    def _tocs_updated(self):
+    def _tocs_updated(self, drone):
+        cf = drone.cf
         # First do the log
-        log_toc = self._cf.log.toc.toc
+        log_toc = cf.log.toc.toc
         log = {}
         for group in log_toc:
             log[group] = {}
             for name in log_toc[group]:
                 log[group][name] = {"type": log_toc[group][name].ctype}
         # The the params
-        param_toc = self._cf.param.toc.toc
+        param_toc = cf.param.toc.toc
         param = {}
         for group in param_toc:
             param[group] = {}
@@ -140,214 +347,523 @@ class _SrvThread(Thread):
                     "type": param_toc[group][name].ctype,
                     "access": "RW" if param_toc[group][
                         name].access == 0 else "RO",
-                    "value": self._cf.param.values[group][name]}
+                    "value": cf.param.values[group][name]}
 
         resp = {"version": 1, "status": 0, "log": log, "param": param}
-        self._conn_queue.put_nowait(resp)
-
-    def _handle_scanning(self):
-        resp = {"version": 1}
-        interfaces = cflib.crtp.scan_interfaces()
-        resp["interfaces"] = []
-        for i in interfaces:
-            resp["interfaces"].append({"uri": i[0], "info": i[1]})
-        return resp
-
-    def _handle_connect(self, uri):
-        self._cf.open_link(uri)
-        return self._conn_queue.get(block=True)
-
-    def _logging_started(self, conf, started):
+        if self._pool.multi:
+            resp["target"] = drone.alias
+        self._complete((drone.alias, "connect"), resp)
+
+    def _handle_scanning(self, request):
+        # Scanning takes a while, do it in a worker to not block the other
+        # clients
+        def scan():
+            resp = {"version": 1, "status": 0}
+            with self._scan_lock:
+                interfaces = cflib.crtp.scan_interfaces()
+            resp["interfaces"] = []
+            for i in interfaces:
+                resp["interfaces"].append({"uri": i[0], "info": i[1]})
+            self._respond(request, resp)
+
+        Thread(target=scan, daemon=True).start()
+
+    def _handle_connect(self, request):
+        uri = request.cmd["uri"]
+        drone = self._pool.get(uri, request.cmd.get("alias"))
+        key = (drone.alias, "connect")
+        with self._waiting_lock:
+            connecting = key in self._waiting
+        self._wait(key, request, CONNECT_TIMEOUT,
+                   {"version": 1, "status": 1,
+                    "msg": "Timeout when connecting to {}".format(uri)})
+        # Clients asking to connect while a connection is being set up get
+        # the result of that connection
+        if not connecting:
+            drone.uri = uri
+            drone.cf.open_link(uri)
+
+    def _handle_drones(self, request):
+        drones = []
+        for drone in self._pool.drones():
+            drones.append({"alias": drone.alias, "uri": drone.uri,
+                           "connected": drone.cf.is_connected()})
+        return {"version": 1, "status": 0, "drones": drones}
+
+    def _logging_started(self, drone, conf, started):
         out = {"version": 1, "name": conf.name}
         if started:
             out["event"] = "started"
         else:
             out["event"] = "stopped"
-        self._log_socket.send_json(out)
-        self._log_started_queue.put_nowait(started)
+            self._flush_log_stream(drone, conf.name)
+        self._publish(self._log_socket, drone, _log_topic(conf.name), out)
+        if started:
+            # Subscribers that were not around when the config was created
+            # need the schema to decode the data
+            self._send_log_schema(drone, conf.name)
+        self._complete((drone.alias, "log-started", conf.name),
+                       {"version": 1, "status": 0})
 
-    def _logging_added(self, conf, added):
+    def _logging_added(self, drone, conf, added):
         out = {"version": 1, "name": conf.name}
         if added:
             out["event"] = "created"
         else:
             out["event"] = "deleted"
-        self._log_socket.send_json(out)
-        self._log_added_queue.put_nowait(added)
-
-    def _handle_logging(self, data):
+        self._publish(self._log_socket, drone, _log_topic(conf.name), out)
+        resp = {"version": 1, "status": 0}
+        stream = drone.log_streams.get(conf.name)
+        if added and stream is not None:
+            resp["schema"] = stream.schema()
+            self._send_log_schema(drone, conf.name)
+        self._complete((drone.alias, "log-added", conf.name), resp)
+
+    def _send_log_schema(self, drone, name):
+        stream = drone.log_streams.get(name)
+        if stream is not None:
+            out = {"version": 1, "name": name, "event": "schema",
+                   "schema": stream.schema()}
+            self._publish(self._log_socket, drone, _log_topic(name), out)
+
+    def _flush_log_stream(self, drone, name):
+        stream = drone.log_streams.get(name)
+        if stream is not None:
+            frame = stream.flush()
+            if frame is not None:
+                self._publish(self._log_socket, drone, _log_topic(name), frame)
+
+    def _log_flush_timeout(self):
+        # Time (ms) until a binary log stream may be due, None to wait for
+        # commands only. Samples arrive from the cflib thread while polling,
+        # so empty streams are checked again batch_ms later: a sample added
+        # meanwhile is due at the earliest then.
+        now = time.monotonic()
+        timeouts = []
+        for drone in self._pool.drones():
+            for stream in list(drone.log_streams.values()):
+                deadline = stream.deadline()
+                if deadline is None:
+                    timeouts.append(stream.batch_ms)
+                else:
+                    timeouts.append((deadline - now) * 1000)
+        if not timeouts:
+            return None
+        return max(0, min(timeouts))
+
+    def _flush_due_log_streams(self):
+        # Samples arrive at the period of their log configuration, the ones
+        # that have waited for batch_ms are published without waiting for
+        # the next one
+        now = time.monotonic()
+        for drone in self._pool.drones():
+            for name, stream in list(drone.log_streams.items()):
+                frame = stream.flush_due(now)
+                if frame is not None:
+                    self._publish(self._log_socket, drone, _log_topic(name), frame)
+
+    def _handle_logging(self, request, drone):
+        data = request.cmd
         resp = {"version": 1}
         if data["action"] == "create":
+            log_format = data.get("format", "json")
+            if log_format not in ("json", "binary"):
+                resp["status"] = 4
+                resp["msg"] = "Unknown log format {}".format(log_format)
+                return resp
             lg = LogConfig(data["name"], data["period"])
             for v in data["variables"]:
                 lg.add_variable(v)
-            lg.started_cb.add_callback(self._logging_started)
-            lg.added_cb.add_callback(self._logging_added)
+            lg.started_cb.add_callback(partial(self._logging_started, drone))
+            lg.added_cb.add_callback(partial(self._logging_added, drone))
             try:
-                lg.data_received_cb.add_callback(self._logdata_callback)
-                self._logging_configs[data["name"]] = lg
-                self._cf.log.add_config(lg)
+                lg.data_received_cb.add_callback(
+                    partial(self._logdata_callback, drone))
+                drone.logging_configs[data["name"]] = lg
+                drone.cf.log.add_config(lg)
+                drone.log_streams.pop(data["name"], None)
+                if log_format == "binary":
+                    stream = BinaryLogStream(
+                        self._next_stream_id, lg,
+                        data.get("batch", DEFAULT_BATCH_SAMPLES),
+                        data.get("batch_ms", DEFAULT_BATCH_MS))
+                    self._next_stream_id = (self._next_stream_id + 1) & 0xFFFF
+                    drone.log_streams[data["name"]] = stream
+                self._wait((drone.alias, "log-added", data["name"]), request,
+                           LOG_TIMEOUT,
+                           {"version": 1, "status": 3,
+                            "msg": "Log configuration did not start"})
                 lg.create()
-                self._log_added_queue.get(block=True, timeout=LOG_TIMEOUT)
-                resp["status"] = 0
+                return None
             except KeyError as e:
                 resp["status"] = 1
                 resp["msg"] = str(e)
             except AttributeError as e:
                 resp["status"] = 2
                 resp["msg"] = str(e)
-            except queue.Empty:
-                resp["status"] = 3
-                resp["msg"] = "Log configuration did not start"
-        if data["action"] == "start":
-            try:
-                self._logging_configs[data["name"]].start()
-                self._log_started_queue.get(block=True, timeout=LOG_TIMEOUT)
-                resp["status"] = 0
-            except KeyError as e:
-                resp["status"] = 1
-                resp["msg"] = "{} config not found".format(str(e))
-            except queue.Empty:
-                resp["status"] = 2
-                resp["msg"] = "Log configuration did not stop"
-        if data["action"] == "stop":
-            try:
-                self._logging_configs[data["name"]].stop()
-                self._log_started_queue.get(block=True, timeout=LOG_TIMEOUT)
-                resp["status"] = 0
-            except KeyError as e:
-                resp["status"] = 1
-                resp["msg"] = "{} config not found".format(str(e))
-            except queue.Empty:
-                resp["status"] = 2
-                resp["msg"] = "Log configuration did not stop"
-        if data["action"] == "delete":
-            try:
-                self._logging_configs[data["name"]].delete()
-                self._log_added_queue.get(block=True, timeout=LOG_TIMEOUT)
-                resp["status"] = 0
-            except KeyError as e:
-                resp["status"] = 1
-                resp["msg"] = "{} config not found".format(str(e))
-            except queue.Empty:
-                resp["status"] = 2
-                resp["msg"] = "Log configuration did not stop"
+            return resp
+
+        if data["action"] in ("start", "stop"):
+            key = (drone.alias, "log-started", data["name"])
+        elif data["action"] == "delete":
+            key = (drone.alias, "log-added", data["name"])
+        else:
+            resp["status"] = 0xFF
+            resp["msg"] = "Unknown log action {}".format(data["action"])
+            return resp
 
-        return resp
+        if data["name"] not in drone.logging_configs:
+            resp["status"] = 1
+            resp["msg"] = "'{}' config not found".format(data["name"])
+            return resp
+
+        lg = drone.logging_configs[data["name"]]
+        self._wait(key, request, LOG_TIMEOUT,
+                   {"version": 1, "status": 2,
+                    "msg": "Log configuration did not {}".format(
+                        data["action"])})
+        if data["action"] == "start":
+            lg.start()
+        elif data["action"] == "stop":
+            lg.stop()
+        else:
+            self._flush_log_stream(drone, data["name"])
+            lg.delete()
+        return None
 
-    def _handle_param(self, data):
+    def _handle_param(self, request, drone):
+        data = request.cmd
         resp = {"version": 1}
-        group = data["name"].split(".")[0]
-        name = data["name"].split(".")[1]
-        self._cf.param.add_update_callback(group=group, name=name,
-                                           cb=self._param_callback)
+        key = (drone.alias, "param", data["name"])
+        self._wait(key, request, PARAM_TIMEOUT,
+                   {"version": 1, "status": 3,
+                    "msg": "Timeout when setting parameter "
+                           "{}".format(data["name"])})
         try:
-            self._cf.param.set_value(data["name"], str(data["value"]))
-            answer = self._param_queue.get(block=True, timeout=PARAM_TIMEOUT)
-            resp["name"] = answer["name"]
-            resp["value"] = answer["value"]
-            resp["status"] = 0
+            drone.cf.param.set_value(data["name"], str(data["value"]))
+            return None
         except KeyError as e:
             resp["status"] = 1
             resp["msg"] = str(e)
         except AttributeError as e:
             resp["status"] = 2
             resp["msg"] = str(e)
-        except queue.Empty:
-            resp["status"] = 3
-            resp["msg"] = "Timeout when setting parameter" \
-                          "{}".format(data["name"])
-        return resp
+        if self._cancel(key, request):
+            return resp
+        return None
 
-    def _all_param_update(self, name, value):
+    def _all_param_update(self, drone, name, value):
         resp = {"version": 1, "name": name, "value": value}
-        self._param_socket.send_json(resp)
+        self._publish(self._param_socket, drone, _param_topic(name), resp)
+        self._complete((drone.alias, "param", name),
+                       {"version": 1, "status": 0, "name": name,
+                        "value": value})
+
+    def _logdata_callback(self, drone, ts, data, conf):
+        stream = drone.log_streams.get(conf.name)
+        if stream is not None:
+            frame = stream.add(ts, data)
+            if frame is not None:
+                self._publish(self._log_socket, drone, _log_topic(conf.name), frame)
+            return
 
-    def _param_callback(self, name, value):
-        group = name.split(".")[0]
-        name_short = name.split(".")[1]
-        self._cf.param.remove_update_callback(group=group, name=name_short)
-        self._param_queue.put_nowait({"name": name, "value": value})
-
-    def _logdata_callback(self, ts, data, conf):
         out = {"version": 1, "name": conf.name, "event": "data",
                "timestamp": ts, "variables": {}}
         for d in data:
             out["variables"][d] = data[d]
-        self._log_socket.send_json(out)
+        self._publish(self._log_socket, drone, _log_topic(conf.name), out)
+
+    def _handle_command(self, request):
+        """
+        Handle a command. Returns the response, or None if the response will
+        be sent later when the command is done.
+        """
+        cmd = request.cmd
+        response = {"version": 1}
+        logger.info("Got command {}".format(cmd))
+        if cmd["cmd"] == "scan":
+            return self._handle_scanning(request)
+        elif cmd["cmd"] == "connect":
+            return self._handle_connect(request)
+        elif cmd["cmd"] == "drones":
+            return self._handle_drones(request)
+        elif cmd["cmd"] not in ("disconnect", "log", "param"):
+            response["status"] = 0xFF
+            response["msg"] = "Unknown command {}".format(cmd["cmd"])
+            return response
+
+        drone = self._pool.find(cmd.get("target"))
+        if drone is None:
+            response["status"] = 0xFE
+            response["msg"] = "Unknown target {}".format(cmd.get("target"))
+        elif cmd["cmd"] == "disconnect":
+            drone.cf.close_link()
+            response["status"] = 0
+        elif cmd["cmd"] == "log":
+            response = self._handle_logging(request, drone)
+        elif cmd["cmd"] == "param":
+            response = self._handle_param(request, drone)
+        return response
+
+    def _receive_command(self):
+        frames = self._socket.recv_multipart()
+        envelope, payload = frames[:-1], frames[-1]
+        try:
+            request = _Request(envelope, json.loads(payload))
+            response = self._handle_command(request)
+        except Exception as e:
+            logger.warning("Failed to handle command: {}".format(e))
+            request = _Request(envelope, {})
+            response = {"version": 1, "status": 0xFF,
+                        "msg": "Bad command: {}".format(e)}
+        if response is not None:
+            self._respond(request, response)
 
     def run(self):
         logger.info("Starting server thread")
+        poller = zmq.Poller()
+        poller.register(self._socket, zmq.POLLIN)
+        poller.register(self._responses, zmq.POLLIN)
         while True:
-            # Wait for the command
-            cmd = self._socket.recv_json()
-            response = {"version": 1}
-            logger.info("Got command {}".format(cmd))
-            if cmd["cmd"] == "scan":
-                response = self._handle_scanning()
-            elif cmd["cmd"] == "connect":
-                response = self._handle_connect(cmd["uri"])
-            elif cmd["cmd"] == "disconnect":
-                self._cf.close_link()
-                response["status"] = 0
-            elif cmd["cmd"] == "log":
-                response = self._handle_logging(cmd)
-            elif cmd["cmd"] == "param":
-                response = self._handle_param(cmd)
-            else:
-                response["status"] = 0xFF
-                response["msg"] = "Unknown command {}".format(cmd["cmd"])
-            self._socket.send_json(response)
+            events = dict(poller.poll(self._log_flush_timeout()))
+            self._flush_due_log_streams()
+            if self._responses in events:
+                while True:
+                    try:
+                        frames = self._responses.recv_multipart(zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    self._socket.send_multipart(frames)
+            if self._socket in events:
+                self._receive_command()
+
+
+class _Setpoint:
+    """The latest setpoint received for a Crazyflie"""
+
+    def __init__(self, roll, pitch, yaw, thrust, sent):
+        self.values = (roll, pitch, yaw, thrust)
+        # Time (time.time()) the client sent the setpoint, if known
+        self.sent = sent
+        self.received = time.monotonic()
+        self.forwarded = False
+
+
+class _CtrlStats:
+    """Statistics of the setpoints of one Crazyflie"""
+
+    def __init__(self):
+        self.received = 0
+        self.forwarded = 0
+        self.dropped = 0
+        self.latencies = []
+
+    def to_dict(self):
+        out = {"received": self.received, "forwarded": self.forwarded,
+               "dropped": self.dropped}
+        if self.latencies:
+            out["latency_ms"] = {
+                "min": min(self.latencies) * 1000,
+                "mean": sum(self.latencies) / len(self.latencies) * 1000,
+                "max": max(self.latencies) * 1000,
+            }
+        return out
 
 
 class _CtrlThread(Thread):
-
-    def __init__(self, socket, cf, *args):
+    """
+    Forwards setpoints to the Crazyflies. Only the latest setpoint of each
+    Crazyflie is kept, setpoints that are replaced before they are sent are
+    dropped. Without a rate setpoints are sent when received. With a rate the
+    latest setpoint is sent at a fixed rate, and if no new setpoint is
+    received for timeout seconds a zero thrust setpoint is sent and
+    forwarding stops until a new setpoint is received.
+    """
+
+    def __init__(self, socket, pool, conn_socket, publish, rate=0,
+                 timeout=CTRL_TIMEOUT, *args):
         super(_CtrlThread, self).__init__(*args)
         self._socket = socket
-        self._cf = cf
+        self._pool = pool
+        self._conn_socket = conn_socket
+        self._publish = publish
+        self._period = 1.0 / rate if rate else 0
+        self._timeout = timeout
+
+        self._setpoints = {}
+        self._stats = {}
+
+    def _decode(self, msg):
+        """Return the target and the setpoint in a message"""
+        if msg[:len(SETPOINT_MAGIC)] == SETPOINT_MAGIC:
+            (_, _, target_len, roll, pitch, yaw, thrust,
+             sent) = SETPOINT.unpack_from(msg)
+            target = msg[SETPOINT.size:SETPOINT.size + target_len]
+            return (target.decode() if target_len else None,
+                    _Setpoint(roll, pitch, yaw, thrust, sent))
+        cmd = json.loads(msg)
+        return (cmd.get("target"),
+                _Setpoint(cmd["roll"], cmd["pitch"], cmd["yaw"],
+                          cmd["thrust"], cmd.get("time")))
+
+    def _receive(self):
+        """Receive all the setpoints waiting in the socket"""
+        while True:
+            try:
+                msg = self._socket.recv(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+            try:
+                target, setpoint = self._decode(msg)
+            except Exception as e:
+                logger.warning("Bad setpoint: {}".format(e))
+                continue
+            drone = self._pool.find(target)
+            if drone is None:
+                logger.debug("Setpoint for unknown target {}".format(target))
+                continue
+
+            stats = self._stats.setdefault(drone, _CtrlStats())
+            stats.received += 1
+            previous = self._setpoints.get(drone)
+            if previous is not None and not previous.forwarded:
+                stats.dropped += 1
+            self._setpoints[drone] = setpoint
+
+    def _forward(self, drone, setpoint):
+        drone.cf.commander.send_setpoint(*setpoint.values)
+        stats = self._stats[drone]
+        stats.forwarded += 1
+        if not setpoint.forwarded and setpoint.sent is not None:
+            stats.latencies.append(time.time() - setpoint.sent)
+        setpoint.forwarded = True
+
+    def _forward_all(self):
+        now = time.monotonic()
+        for drone, setpoint in list(self._setpoints.items()):
+            if not self._period:
+                if not setpoint.forwarded:
+                    self._forward(drone, setpoint)
+            elif now - setpoint.received > self._timeout:
+                # The client has stopped sending, stop the motors
+                logger.info("No setpoints for {} in {} s, stopping".format(
+                    drone.alias, self._timeout))
+                drone.cf.commander.send_setpoint(0, 0, 0, 0)
+                del self._setpoints[drone]
+                self._publish(self._conn_socket, drone, TOPIC_CTRL,
+                              {"version": 1, "event": "watchdog",
+                               "uri": drone.uri,
+                               "msg": "No setpoints in {} s".format(
+                                   self._timeout)})
+            else:
+                self._forward(drone, setpoint)
+
+    def _publish_stats(self):
+        for drone, stats in self._stats.items():
+            if stats.received:
+                out = {"version": 1, "event": "ctrl", "uri": drone.uri}
+                out.update(stats.to_dict())
+                self._publish(self._conn_socket, drone, TOPIC_CTRL, out)
+        self._stats = dict((drone, _CtrlStats()) for drone in self._stats)
 
     def run(self):
+        poller = zmq.Poller()
+        poller.register(self._socket, zmq.POLLIN)
+
+        now = time.monotonic()
+        next_forward = now + self._period
+        next_stats = now + CTRL_STATS_INTERVAL
         while True:
-            cmd = self._socket.recv_json()
-            self._cf.commander.send_setpoint(cmd["roll"], cmd["pitch"],
-                                             cmd["yaw"], cmd["thrust"])
+            deadline = next_stats
+            if self._period:
+                deadline = min(deadline, next_forward)
+            timeout = max(0.0, deadline - time.monotonic())
+            if poller.poll(timeout * 1000):
+                self._receive()
+
+            now = time.monotonic()
+            if not self._period:
+                self._forward_all()
+            elif now >= next_forward:
+                self._forward_all()
+                next_forward += self._period
+                if next_forward < now:
+                    # Fallen behind, skip the missed periods
+                    next_forward = now + self._period
+
+            if now >= next_stats:
+                self._publish_stats()
+                next_stats = now + CTRL_STATS_INTERVAL
 
 
 class ZMQServer():
     """Crazyflie ZMQ server"""
 
-    def __init__(self, base_url, base_port):
+    def __init__(self, base_url, base_port, profile_connection=None,
+                 multi=False, ctrl_rate=0, ctrl_timeout=CTRL_TIMEOUT,
+                 topics=False):
         """Start threads and bind ports"""
         cflib.crtp.init_drivers()
-        self._cf = Crazyflie(ro_cache=None,
-                             rw_cache=cfclient.config_path + "/cache")
+        sim_link.init_driver()
+        self._profile_connection = profile_connection
+        self._profilers = []
 
         signal.signal(signal.SIGINT, signal.SIG_DFL)
 
         self._base_url = base_url
         self._context = zmq.Context()
 
-        cmd_srv = self._bind_zmq_socket(zmq.REP, "cmd",
+        cmd_srv = self._bind_zmq_socket(zmq.ROUTER, "cmd",
                                         base_port + ZMQ_SRV_PORT)
         log_srv = self._bind_zmq_socket(zmq.PUB, "log",
                                         base_port + ZMQ_LOG_PORT)
         param_srv = self._bind_zmq_socket(zmq.PUB, "param",
                                           base_port + ZMQ_PARAM_PORT)
+        # With one Crazyflie ZMQ only has to keep the latest setpoint, with
+        # several the control thread drops the old ones
+        ctrl_options = {} if multi else {zmq.CONFLATE: 1}
         ctrl_srv = self._bind_zmq_socket(zmq.PULL, "ctrl",
-                                         base_port + ZMQ_CTRL_PORT)
+                                         base_port + ZMQ_CTRL_PORT,
+                                         ctrl_options)
         conn_srv = self._bind_zmq_socket(zmq.PUB, "conn",
                                          base_port + ZMQ_CONN_PORT)
 
-        self._scan_thread = _SrvThread(cmd_srv, log_srv, param_srv, conn_srv,
-                                       self._cf)
+        self._pool = _DronePool(self._create_cf, multi)
+
+        # Events are published both from the server thread and from cflib
+        conn_srv = _LockedSocket(conn_srv)
+        self._scan_thread = _SrvThread(cmd_srv, _LockedSocket(log_srv),
+                                       _LockedSocket(param_srv),
+                                       conn_srv, self._pool, topics)
+        self._pool.start()
         self._scan_thread.start()
 
-        self._ctrl_thread = _CtrlThread(ctrl_srv, self._cf)
+        self._ctrl_thread = _CtrlThread(ctrl_srv, self._pool, conn_srv,
+                                        self._scan_thread._publish,
+                                        ctrl_rate, ctrl_timeout)
         self._ctrl_thread.start()
 
-    def _bind_zmq_socket(self, pattern, name, port):
+    def _create_cf(self, alias):
+        cf = Crazyflie(ro_cache=None,
+                       rw_cache=cfclient.config_path + "/cache")
+
+        if self._profile_connection:
+            # Write a timeline for every connection that is made
+            path = self._profile_connection
+            if alias != DEFAULT_ALIAS:
+                root, ext = os.path.splitext(path)
+                path = "{}-{}{}".format(root, _safe_file_name(alias), ext)
+            profiler = ConnectionProfiler(cf)
+            profiler.finished.add_callback(
+                lambda profiler: profiler.dump(path))
+            self._profilers.append(profiler)
+
+        return cf
+
+    def _bind_zmq_socket(self, pattern, name, port, options=None):
         srv = self._context.socket(pattern)
+        for option, value in (options or {}).items():
+            srv.setsockopt(option, value)
         srv_addr = "{}:{}".format(self._base_url, port)
         srv.bind(srv_addr)
         logger.info("Biding ZMQ {} server"
@@ -355,6 +871,18 @@ class ZMQServer():
         return srv
 
 
+def _log_topic(config_name):
+    return "log/{}".format(config_name)
+
+
+def _param_topic(complete_name):
+    return "param/{}".format(complete_name)
+
+
+def _safe_file_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
 def main():
     """Main Crazyflie ZMQ application"""
     import argparse
@@ -368,6 +896,29 @@ def main():
     parser.add_argument("-p", "--port", action="store", dest="port", type=int,
                         default=2000,
                         help="Base port to used for ZMQ sockets")
+    parser.add_argument("--profile-connection", action="store",
+                        dest="profile_connection", type=str, default=None,
+                        metavar="FILE",
+                        help="Write a timeline of the connection phases to"
+                             " FILE as JSON")
+    parser.add_argument("-m", "--multi", action="store_true", dest="multi",
+                        help="Serve several Crazyflies, commands and"
+                             " setpoints select the Crazyflie with a target"
+                             " and events are published with a topic")
+    parser.add_argument("--ctrl-rate", action="store", dest="ctrl_rate",
+                        type=float, default=0, metavar="HZ",
+                        help="Send the latest setpoint at a fixed rate"
+                             " instead of when it is received")
+    parser.add_argument("--ctrl-timeout", action="store",
+                        dest="ctrl_timeout", type=float,
+                        default=CTRL_TIMEOUT, metavar="SECONDS",
+                        help="With --ctrl-rate, stop the motors if no"
+                             " setpoint is received for SECONDS")
+    parser.add_argument("-t", "--topics", action="store_true",
+                        dest="topics",
+                        help="Publish events with a topic frame (log/<config>,"
+                             " param/<group>.<name>, conn and ctrl), always"
+                             " done with --multi")
     (args, _) = parser.parse_known_args()
 
     if args.debug:
@@ -375,7 +926,8 @@ def main():
     else:
         logging.basicConfig(level=logging.INFO)
 
-    ZMQServer(args.url, args.port)
+    ZMQServer(args.url, args.port, args.profile_connection, args.multi,
+              args.ctrl_rate, args.ctrl_timeout, args.topics)
 
     # CRTL-C to exit
 
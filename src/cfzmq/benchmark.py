@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA  02110-1301, USA.
+
+"""
+Benchmarks of the ZMQ server.
+
+The server is started in this process against an emulated Crazyflie (the
+mock:// link) that sends synthetic TOCs and log data at a configurable rate.
+A client in the same process connects to the server and measures:
+
+  * log: the rate of log samples published, with the JSON and the binary
+    log format, compared to the rate the emulated Crazyflie sends them
+  * param: the time from sending a param command until the response arrives
+  * ctrl: the time from sending a setpoint on the control socket until the
+    emulated Crazyflie receives it
+
+The results are written as JSON, to be compared between releases:
+
+    python -m cfzmq.benchmark -o results.json
+
+The client shares the interpreter with the server, the numbers are a lower
+bound of what the server does with the client in another process.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+
+from importlib import metadata
+
+import zmq
+
+import cfclient
+from cfclient.utils.mock_link import MockLinkDriver
+from cfclient.utils.mock_link import register_driver
+from cfzmq import SETPOINT
+from cfzmq import SETPOINT_MAGIC
+from cfzmq import ZMQ_CTRL_PORT
+from cfzmq import ZMQ_LOG_PORT
+from cfzmq import ZMQ_SRV_PORT
+from cfzmq import ZMQServer
+from cfzmq.logstream import FRAME_HEADER
+from cfzmq.logstream import FRAME_MAGIC
+
+__author__ = 'Bitcraze AB'
+__all__ = ['run', 'main']
+
+# Version of the results format
+RESULTS_VERSION = 1
+
+MOCK_NAME = "bench"
+
+# Time to wait for the server to answer a command
+COMMAND_TIMEOUT = 10
+# Time to let log data settle before and after measuring
+SETTLE_TIME = 0.5
+
+
+class _Client:
+    """Client of the ZMQ server"""
+
+    def __init__(self, url, port):
+        self._context = zmq.Context()
+        self._cmd = self._context.socket(zmq.REQ)
+        self._cmd.setsockopt(zmq.RCVTIMEO, COMMAND_TIMEOUT * 1000)
+        self._cmd.connect("{}:{}".format(url, port + ZMQ_SRV_PORT))
+        self.log = self._context.socket(zmq.SUB)
+        self.log.setsockopt(zmq.SUBSCRIBE, b"")
+        self.log.connect("{}:{}".format(url, port + ZMQ_LOG_PORT))
+        self.ctrl = self._context.socket(zmq.PUSH)
+        self.ctrl.connect("{}:{}".format(url, port + ZMQ_CTRL_PORT))
+
+    def command(self, cmd):
+        """Send a command and return the response"""
+        cmd["version"] = 1
+        self._cmd.send_json(cmd)
+        return self._cmd.recv_json()
+
+    def checked_command(self, cmd):
+        resp = self.command(cmd)
+        if resp["status"] != 0:
+            raise Exception("Command {} failed: {}".format(
+                cmd["cmd"], resp.get("msg")))
+        return resp
+
+    def drain_log(self):
+        while self.log.poll(0):
+            self.log.recv()
+
+
+def _package_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _stats(values):
+    """Return statistics, in ms, of a list of times in seconds"""
+    if not values:
+        return None
+    values = sorted(values)
+
+    def percentile(p):
+        return values[min(len(values) - 1, int(p / 100.0 * len(values)))]
+
+    return {
+        "samples": len(values),
+        "min": values[0] * 1000,
+        "mean": sum(values) / len(values) * 1000,
+        "p50": percentile(50) * 1000,
+        "p90": percentile(90) * 1000,
+        "p99": percentile(99) * 1000,
+        "max": values[-1] * 1000,
+    }
+
+
+def _float_variables(toc, count):
+    """Return the names of count float log variables of a TOC"""
+    names = []
+    for group in sorted(toc):
+        for name in sorted(toc[group]):
+            if toc[group][name]["type"] == "float":
+                names.append("{}.{}".format(group, name))
+    if len(names) < count:
+        raise Exception("Only {} float log variables in the TOC".format(
+            len(names)))
+    return names[:count]
+
+
+def _writable_param(toc):
+    """Return the name of a float param that can be written"""
+    for group in sorted(toc):
+        for name in sorted(toc[group]):
+            param = toc[group][name]
+            if param["type"] == "float" and param["access"] == "RW":
+                return "{}.{}".format(group, name)
+    raise Exception("No writable float param in the TOC")
+
+
+def _bench_log(client, mock, variables, log_format, blocks, duration):
+    """Measure the rate of log samples published"""
+    names = ["bench{}".format(i) for i in range(blocks)]
+    for name in names:
+        client.checked_command({"cmd": "log", "action": "create",
+                                "name": name, "period": 10,
+                                "format": log_format,
+                                "variables": variables})
+    time.sleep(SETTLE_TIME)
+    client.drain_log()
+
+    samples = 0
+    frames = 0
+    size = 0
+    sent = mock.log_packets
+    start = time.perf_counter()
+    end = start + duration
+    while True:
+        remaining = end - time.perf_counter()
+        if remaining <= 0:
+            break
+        if not client.log.poll(remaining * 1000):
+            continue
+        msg = client.log.recv()
+        if msg[:len(FRAME_MAGIC)] == FRAME_MAGIC:
+            samples += FRAME_HEADER.unpack_from(msg)[4]
+        elif b'"data"' in msg:
+            samples += 1
+        else:
+            continue
+        frames += 1
+        size += len(msg)
+    elapsed = time.perf_counter() - start
+    sent = mock.log_packets - sent
+
+    for name in names:
+        client.checked_command({"cmd": "log", "action": "delete",
+                                "name": name})
+    time.sleep(SETTLE_TIME)
+    client.drain_log()
+
+    return {
+        "format": log_format,
+        "blocks": blocks,
+        "variables": len(variables),
+        "duration": elapsed,
+        "sent_per_s": sent / elapsed,
+        "samples_per_s": samples / elapsed,
+        "messages_per_s": frames / elapsed,
+        "bytes_per_s": size / elapsed,
+        # Binary frames waiting for more samples when the time is up are
+        # not counted
+        "delivered": samples / sent if sent else 0.0,
+    }
+
+
+def _bench_param(client, name, count):
+    """Measure the round trip time of param commands"""
+    times = []
+    failed = 0
+    for i in range(count):
+        start = time.perf_counter()
+        resp = client.command({"cmd": "param", "name": name,
+                               "value": (i % 100) + 0.5})
+        if resp["status"] == 0:
+            times.append(time.perf_counter() - start)
+        else:
+            failed += 1
+    result = {"param": name, "failed": failed}
+    result["round_trip_ms"] = _stats(times)
+    return result
+
+
+def _bench_ctrl(client, mock, count, rate):
+    """Measure the time from sending a setpoint until it is sent to the
+    Crazyflie"""
+    received = {}
+
+    def setpoint_received(roll, pitch, yaw, thrust):
+        received.setdefault(thrust, time.perf_counter())
+
+    sent = {}
+    mock.setpoint_received.add_callback(setpoint_received)
+    period = 1.0 / rate
+    next_send = time.perf_counter()
+    # The thrust identifies the setpoint
+    for thrust in range(1, count + 1):
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        next_send += period
+        sent[thrust] = time.perf_counter()
+        client.ctrl.send(SETPOINT.pack(SETPOINT_MAGIC, 1, 0, 0.0, 0.0, 0.0,
+                                       thrust, time.time()))
+    time.sleep(SETTLE_TIME)
+    mock.setpoint_received.remove_callback(setpoint_received)
+
+    latencies = [received[thrust] - sent[thrust] for thrust in sent
+                 if thrust in received]
+    return {
+        "sent": count,
+        "rate": rate,
+        "forwarded": len(latencies),
+        "latency_ms": _stats(latencies),
+    }
+
+
+def run(url="tcp://127.0.0.1", port=2100, rate=1000, log_vars=100,
+        params=100, variables=6, blocks=1, duration=5,
+        formats=("json", "binary"), param_samples=200, ctrl_samples=500,
+        ctrl_rate=100):
+    """Start a server against an emulated Crazyflie, run the benchmarks and
+    return the results as a dict"""
+    register_driver()
+    ZMQServer(url, port)
+    client = _Client(url, port)
+
+    uri = "mock://{}?log_vars={}&params={}&rate={}".format(
+        MOCK_NAME, log_vars, params, rate)
+    start = time.perf_counter()
+    toc = client.checked_command({"cmd": "connect", "uri": uri})
+    connect_time = time.perf_counter() - start
+    mock = MockLinkDriver.crazyflie(MOCK_NAME)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "time": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cfclient": cfclient.VERSION,
+        "cflib": _package_version("cflib"),
+        "config": {"rate": rate, "log_vars": log_vars, "params": params,
+                   "variables": variables, "blocks": blocks,
+                   "duration": duration, "param_samples": param_samples,
+                   "ctrl_samples": ctrl_samples, "ctrl_rate": ctrl_rate},
+        "connect_s": connect_time,
+        "log": [],
+    }
+
+    names = _float_variables(toc["log"], variables)
+    for log_format in formats:
+        results["log"].append(_bench_log(client, mock, names, log_format,
+                                         blocks, duration))
+    results["param"] = _bench_param(client, _writable_param(toc["param"]),
+                                    param_samples)
+    results["ctrl"] = _bench_ctrl(client, mock, ctrl_samples, ctrl_rate)
+
+    client.checked_command({"cmd": "disconnect"})
+    return results
+
+
+def main():
+    """Run the benchmarks from the command line"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="cfzmq.benchmark")
+    parser.add_argument("-u", "--url", action="store", dest="url", type=str,
+                        default="tcp://127.0.0.1",
+                        help="URL where the server accepts connections")
+    parser.add_argument("-p", "--port", action="store", dest="port",
+                        type=int, default=2100,
+                        help="Base port of the server")
+    parser.add_argument("-r", "--rate", action="store", dest="rate",
+                        type=float, default=1000, metavar="HZ",
+                        help="Rate of every log block sent by the Crazyflie")
+    parser.add_argument("--log-vars", action="store", dest="log_vars",
+                        type=int, default=100,
+                        help="Number of variables in the log TOC")
+    parser.add_argument("--params", action="store", dest="params", type=int,
+                        default=100,
+                        help="Number of params in the param TOC")
+    parser.add_argument("--variables", action="store", dest="variables",
+                        type=int, default=6,
+                        help="Number of float variables in each log block,"
+                             " at most 6")
+    parser.add_argument("--blocks", action="store", dest="blocks", type=int,
+                        default=1, help="Number of log blocks")
+    parser.add_argument("--duration", action="store", dest="duration",
+                        type=float, default=5, metavar="SECONDS",
+                        help="Time to measure each log format")
+    parser.add_argument("--formats", action="store", dest="formats",
+                        type=str, default="json,binary",
+                        help="Comma separated log formats to measure")
+    parser.add_argument("--param-samples", action="store",
+                        dest="param_samples", type=int, default=200,
+                        help="Number of param commands")
+    parser.add_argument("--ctrl-samples", action="store",
+                        dest="ctrl_samples", type=int, default=500,
+                        help="Number of setpoints")
+    parser.add_argument("--ctrl-rate", action="store", dest="ctrl_rate",
+                        type=float, default=100, metavar="HZ",
+                        help="Rate setpoints are sent at")
+    parser.add_argument("-o", "--output", action="store", dest="output",
+                        type=str, default=None, metavar="FILE",
+                        help="Write the results to FILE instead of stdout")
+    args = parser.parse_args()
+
+    results = run(args.url, args.port, args.rate, args.log_vars, args.params,
+                  args.variables, args.blocks, args.duration,
+                  args.formats.split(","), args.param_samples,
+                  args.ctrl_samples, args.ctrl_rate)
+
+    out = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out)
+    else:
+        print(out)
+    sys.stdout.flush()
+    # The server threads run forever
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
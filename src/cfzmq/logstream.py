@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#
+#     ||          ____  _ __
+#  +------+      / __ )(_) /_______________ _____  ___
+#  | 0xBC |     / __  / / __/ ___/ ___/ __ `/_  / / _ \
+#  +------+    / /_/ / / /_/ /__/ /  / /_/ / / /_/  __/
+#   ||  ||    /_____/_/\__/\___/_/   \__,_/ /___/\___/
+#
+#  Copyright (C) 2024 Bitcraze AB
+#
+#  Crazyflie Nano Quadcopter Client
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA  02110-1301, USA.
+
+
+"""
+Binary encoding of log data published by the ZMQ server.
+
+Log configurations created with the binary format publish their data as
+packed little-endian frames instead of one JSON message per sample. Samples
+are batched, a frame is published when it holds a number of samples or when
+the oldest sample in it has waited for a maximum time, checked when samples
+arrive and by the server loop in between. The layout of the
+samples is described by a schema that is returned when the configuration is
+created and published as a JSON event.
+
+A frame starts with a header followed by the samples:
+
+    magic        4 bytes  b'CFLB'
+    version      uint8    1
+    reserved     uint8    0
+    stream id    uint16   id of the log configuration, from the schema
+    sample count uint16
+    samples      sample count * sample size bytes
+
+Each sample is a uint32 timestamp (ms) followed by the variables, in the
+order of the schema, packed with the type they are fetched as.
+"""
+
+import struct
+import threading
+import time
+
+from cflib.crazyflie.log import LogTocElement
+
+__author__ = 'Bitcraze AB'
+__all__ = ['BinaryLogStream', 'FRAME_MAGIC', 'FRAME_HEADER']
+
+FRAME_MAGIC = b'CFLB'
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct('<4sBBHH')
+
+# Struct format character to NumPy dtype for the log variable types
+_DTYPES = {
+    'B': 'u1',
+    'H': '<u2',
+    'L': '<u4',
+    'b': 'i1',
+    'h': '<i2',
+    'i': '<i4',
+    'e': '<f2',
+    'f': '<f4',
+}
+
+DEFAULT_BATCH_SAMPLES = 10
+DEFAULT_BATCH_MS = 100
+
+
+class BinaryLogStream:
+    """Packs the samples of one log configuration into batched frames"""
+
+    def __init__(self, stream_id, logconf, batch_samples=DEFAULT_BATCH_SAMPLES,
+                 batch_ms=DEFAULT_BATCH_MS):
+        self.stream_id = stream_id
+        self.name = logconf.name
+        self.batch_samples = max(1, min(int(batch_samples), 0xFFFF))
+        self.batch_ms = batch_ms
+
+        self._names = [var.name for var in logconf.variables]
+        codes = [LogTocElement.types[var.fetch_as][1][1]
+                 for var in logconf.variables]
+        self._types = [LogTocElement.types[var.fetch_as][0]
+                       for var in logconf.variables]
+        self._dtypes = [_DTYPES[code] for code in codes]
+        self._sample = struct.Struct('<L' + ''.join(codes))
+
+        # Samples are added from the cflib thread and flushed from the
+        # server thread too
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._count = 0
+        self._first_sample_time = 0.0
+
+    def schema(self):
+        """Return the description of the samples as a dict"""
+        return {
+            "stream": self.stream_id,
+            "format": "binary",
+            "variables": list(self._names),
+            "types": list(self._types),
+            "dtypes": ['<u4'] + self._dtypes,
+            "struct": self._sample.format,
+            "sample_size": self._sample.size,
+            "batch": self.batch_samples,
+            "batch_ms": self.batch_ms,
+        }
+
+    def add(self, timestamp, data):
+        """
+        Add a sample. Returns a frame when the batch is full or the oldest
+        sample has waited for batch_ms, otherwise None.
+        """
+        sample = self._sample.pack(
+            timestamp & 0xFFFFFFFF, *[data[name] for name in self._names])
+        now = time.monotonic()
+        with self._lock:
+            if self._count == 0:
+                self._first_sample_time = now
+            self._buffer += sample
+            self._count += 1
+
+            if (self._count >= self.batch_samples or
+                    (now - self._first_sample_time) * 1000 >= self.batch_ms):
+                return self._take_frame()
+        return None
+
+    def deadline(self):
+        """
+        Return the time (time.monotonic()) when the buffered samples are
+        due, None if there are none
+        """
+        with self._lock:
+            if self._count == 0:
+                return None
+            return self._first_sample_time + self.batch_ms / 1000.0
+
+    def flush_due(self, now=None):
+        """
+        Return a frame if the oldest buffered sample has waited for
+        batch_ms, otherwise None
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            if (self._count == 0 or
+                    (now - self._first_sample_time) * 1000 < self.batch_ms):
+                return None
+            return self._take_frame()
+
+    def flush(self):
+        """Return a frame with the buffered samples, None if there are none"""
+        with self._lock:
+            return self._take_frame()
+
+    def _take_frame(self):
+        if self._count == 0:
+            return None
+        frame = FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, 0,
+                                  self.stream_id, self._count) + self._buffer
+        self._buffer = bytearray()
+        self._count = 0
+        return frame
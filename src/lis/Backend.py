@@ -5,10 +5,12 @@ import threading
 
 from PyQt6.QtCore import pyqtSignal, QTimer, QObject
 
-from cflib.crazyflie.log import LogConfig
 import cflib.crazyflie as Crazyflie
 
+from cfclient.utils.log_broker import LogBroker
+
 from lis import Waypoint, Protocol
+from lis.MissionFile import WAYPOINT_DTYPE, waypoints_to_stream
 
 import numpy as np
 _silent = False
@@ -103,6 +105,12 @@ class Backend(QObject):
     _connected_signal = pyqtSignal(str)
     _disconnected_signal = pyqtSignal(str)
     _appchannel_received_signal = pyqtSignal(bytearray)
+    # Time taken (s) by upload_missions, and the errors by p2p address of the
+    # missions that could not be sent
+    missions_uploaded_signal = pyqtSignal(float, object)
+
+    # 0xFF is the broadcast address, missions go to single drones
+    MAX_P2P_ADDRESS = 0xFE
 
     def __init__(self):
         super().__init__()
@@ -121,8 +129,12 @@ class Backend(QObject):
         # self.timer = QTimer(parent=None, timeout=self.poll)
 
         self.running_logs = []
+        self.log_broker = None
+        # Subscriptions of the default logs while connected, by log key
+        self.log_subscriptions = dict()
         self.is_p2p_system = False
         self.p2p_address = 0xE2
+        self._mission_upload = None
 
         self.poll_callbacks = []
         self.polling_timer = QTimer(parent=self)
@@ -135,6 +147,9 @@ class Backend(QObject):
     def add_callback_to_log(self, log_key: str, callback):
         if log_key in default_log_configs:
             default_log_configs[log_key]['callbacks'] += [callback]
+            # Tabs created after connecting get the data of the running log
+            if log_key in self.log_subscriptions:
+                self.log_subscriptions[log_key].data_received_cb.add_callback(callback)
     
     def on_start(self):
         if self.is_p2p_system:
@@ -191,6 +206,49 @@ class Backend(QObject):
         else:
             self.send_packet(packet)
     
+    def upload_missions(self, missions: dict):
+        """
+        Send missions to several drones at once, missions maps p2p addresses
+        to lists of waypoints. The upload runs in the background, every drone
+        being sent its waypoints from its own thread so the missions go out
+        interleaved instead of one drone after the other, and
+        missions_uploaded_signal is emitted once they are all sent. Returns
+        False if not connected or an upload is already running. Raises
+        ValueError for addresses other than 0 to MAX_P2P_ADDRESS, and
+        MissionFileError for waypoints that can not be encoded, before
+        sending anything.
+        """
+        invalid = [address for address in missions if not 0 <= address <= self.MAX_P2P_ADDRESS]
+        if invalid:
+            raise ValueError("Invalid p2p addresses {}".format(", ".join("0x{:X}".format(a) for a in invalid)))
+        streams = dict((address, waypoints_to_stream(waypoints)) for address, waypoints in missions.items())
+        if not self.is_connected or (self._mission_upload is not None and self._mission_upload.is_alive()):
+            return False
+        self._mission_upload = threading.Thread(target=self._upload_streams, args=(streams,), daemon=True)
+        self._mission_upload.start()
+        return True
+
+    def _upload_streams(self, streams):
+        errors = dict()
+        start = time.perf_counter()
+        threads = [threading.Thread(target=self._send_mission, args=(address, stream, errors), daemon=True)
+                   for address, stream in streams.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.missions_uploaded_signal.emit(time.perf_counter() - start, errors)
+
+    def _send_mission(self, p2p_address, stream, errors):
+        # Each packet is a header and one waypoint of the stream
+        try:
+            header = bytes((Protocol.GS_PACKET_TYPE.GS_PACKET_TYPE_COMMAND, p2p_address))
+            size = WAYPOINT_DTYPE.itemsize
+            for i in range(0, len(stream), size):
+                self.cf.appchannel.send_packet(header + stream[i:i + size])
+        except Exception as e:
+            errors[p2p_address] = str(e)
+
     def send_message(self, message: str, silent=_silent, p2p_address=None):
         if self.is_connected:
             packet = Protocol.GS_Packet()
@@ -212,8 +270,11 @@ class Backend(QObject):
             if not silent:
                 print(pkt_bytes)
     
-    def attach_cf(self, cf: Crazyflie):
+    def attach_cf(self, cf: Crazyflie, log_broker: LogBroker = None):
         self.cf = cf
+        if log_broker is None:
+            log_broker = LogBroker(cf)
+        self.log_broker = log_broker
 
         self.cf.connected.add_callback(self._connected_signal.emit)
         self.cf.disconnected.add_callback(self._disconnected_signal.emit)
@@ -257,18 +318,14 @@ class Backend(QObject):
             return
     
     def start_logs(self):
-        newlogs = []
-        for log in default_log_configs.values():
-            newlog = LogConfig(name=log['name'],period_in_ms=log['period_in_ms'])
-            for key in log['variables'].keys():
-                newlog.add_variable(key, log['variables'][key])
+        # The variables are shared with the other tabs through the log broker,
+        # the state estimate is for instance also logged by the pose logger
+        for key, log in default_log_configs.items():
+            subscription = self.log_broker.subscribe(
+                log['name'], list(log['variables'].items()), log['period_in_ms'])
             for callback in log['callbacks']:
-                newlog.data_received_cb.add_callback(callback)
-            newlogs += [newlog]
-        for newlog in newlogs:
-            self.running_logs += [newlog]
-            self.cf.log.add_config(newlog)
-            newlog.start()
+                subscription.data_received_cb.add_callback(callback)
+            self.log_subscriptions[key] = subscription
     
     def start_new_log(self, newlog):
         self.running_logs += [newlog]
@@ -279,6 +336,9 @@ class Backend(QObject):
         for log in self.running_logs:
             if log.started:
                 log.stop()
+        for subscription in self.log_subscriptions.values():
+            self.log_broker.unsubscribe(subscription)
+        self.log_subscriptions = dict()
     
     def simulate_data_collection(self):
         sqrt_var = np.sqrt(0.1)
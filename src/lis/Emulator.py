@@ -0,0 +1,232 @@
+"""
+Emulator of the LIS application running on the Crazyflie.
+
+The emulator decodes the packets sent by the ground station (see Protocol),
+stores the uploaded waypoints and flies them with a WaypointExecutor when
+the mission is started. It answers pings and polls like the application on
+the drone, so that the ground station can be tested without hardware.
+
+The emulator can be run on its own, as fast as possible with Emulator.run,
+or behind a simulated Crazyflie link opened with URIs like
+
+    lissim://<name>?x=1.0&y=1.0&speed=20&address=226
+
+where the mission runs speed times faster than real time and the state
+estimate, attitude and motors logged from the link follow the mission.
+"""
+
+import enum
+import logging
+import math
+import struct
+import threading
+
+from cfclient.utils.sim_link import FLIGHT_TIME
+from cfclient.utils.sim_link import HOVER_THRUST
+from cfclient.utils.sim_link import SimCrazyflie
+from cfclient.utils.sim_link import SimLinkDriver
+from cfclient.utils.mock_link import register_driver
+
+from lis import Protocol
+from lis.WaypointExecutor import angle_difference
+from lis.WaypointExecutor import WaypointExecutor
+
+logger = logging.getLogger(__name__)
+
+GRAVITY = 9.81
+# Time step of Emulator.run (s)
+RUN_STEP = 0.01
+
+
+class EMULATOR_STATE(enum.IntEnum):
+    IDLE = 0
+    FLYING = 1
+    LANDING = 2
+    STOPPED = 3
+
+
+class Emulator:
+    """Emulates the LIS application of a drone with the given p2p address"""
+
+    def __init__(self, address=0xE2, x=0.0, y=0.0, speed=1.0):
+        self.address = address
+        self.speed = speed
+        self.executor = WaypointExecutor(x, y)
+        self.is_leader = 0
+        self.is_locked = False
+        self.velocity = (0.0, 0.0, 0.0)
+        self.acceleration = (0.0, 0.0, 0.0)
+        self.log_callbacks = []
+        self._lock = threading.Lock()
+
+        self._string_commands = {
+            'start': self.on_start,
+            'land': self.executor.land,
+            'stop': self.on_stop,
+            'reset': self.on_reset,
+            'unlock': self.on_unlock,
+            'take leader': self.on_take_leader,
+        }
+
+    def add_log_callback(self, callback):
+        """Add a callback called with the time and the state after every step"""
+        self.log_callbacks.append(callback)
+
+    def get_state(self):
+        if self.is_locked:
+            return EMULATOR_STATE.STOPPED
+        if self.executor.is_landing:
+            return EMULATOR_STATE.LANDING
+        if self.executor.is_running:
+            return EMULATOR_STATE.FLYING
+        return EMULATOR_STATE.IDLE
+
+    def on_start(self):
+        if not self.is_locked:
+            self.executor.start()
+
+    def on_stop(self):
+        self.executor.stop()
+        self.is_locked = True
+
+    def on_unlock(self):
+        self.is_locked = False
+
+    def on_reset(self):
+        self.executor.stop()
+        self.executor.program = []
+        self.is_locked = False
+        self.is_leader = 0
+
+    def on_take_leader(self):
+        self.is_leader = 1
+
+    def handle(self, data):
+        """Handle a packet from the ground station, returns the answers"""
+        try:
+            packet = Protocol.bytes_to_gs_packet(data)
+        except (ValueError, struct.error, UnicodeDecodeError) as e:
+            logger.warning('Dropping invalid packet %s: %s', bytes(data), e)
+            return []
+        if packet.receiver_address not in (0xFF, self.address):
+            return []
+
+        with self._lock:
+            if packet.type == Protocol.GS_PACKET_TYPE.GS_PACKET_TYPE_PING:
+                return [bytes(data[:2])]
+            if packet.type == Protocol.GS_PACKET_TYPE.GS_PACKET_TYPE_COMMAND:
+                self.executor.program.append(packet.data.waypoint)
+            elif packet.type == Protocol.GS_PACKET_TYPE.GS_PACKET_TYPE_STOP:
+                self.on_stop()
+            elif packet.type == Protocol.GS_PACKET_TYPE.GS_PACKET_TYPE_STRING:
+                command = self._string_commands.get(packet.data.string)
+                if command is None:
+                    logger.warning('Unknown command "%s"', packet.data.string)
+                else:
+                    command()
+            elif packet.type == Protocol.GS_PACKET_TYPE.GS_PACKET_TYPE_POLL:
+                return [self._poll_response()]
+        return []
+
+    def _poll_response(self):
+        x, y, z, yaw = self.executor.pose
+        pitch, roll = self._tilt()
+        poll_packet = Protocol.GS_PACKET_POLL_PACKET()
+        poll_packet.state = self.get_state()
+        poll_packet.is_leader = self.is_leader
+        poll_packet.x = round(x*1000)
+        poll_packet.y = round(y*1000)
+        poll_packet.z = round(z*1000)
+        poll_packet.yaw = round(angle_difference(yaw, 0)*1000)
+        poll_packet.pitch = round(pitch*1000)
+        poll_packet.roll = round(roll*1000)
+        return bytes(Protocol.poll_packet_to_bytes(poll_packet, self.address))
+
+    def _tilt(self):
+        # Pitch and roll (rad) needed for the acceleration in the body frame
+        ax, ay, _ = self.acceleration
+        yaw = self.executor.pose[3]
+        forward = ax*math.cos(yaw) + ay*math.sin(yaw)
+        left = -ax*math.sin(yaw) + ay*math.cos(yaw)
+        return math.atan2(forward, GRAVITY), -math.atan2(left, GRAVITY)
+
+    def step(self, dt):
+        """Advance the mission by dt seconds"""
+        with self._lock:
+            before = self.executor.pose
+            velocity = self.velocity
+            self.executor.step(dt)
+            if dt > 0:
+                after = self.executor.pose
+                self.velocity = tuple((b - a)/dt for a, b in zip(before[:3], after[:3]))
+                self.acceleration = tuple((b - a)/dt for a, b in zip(velocity, self.velocity))
+            t = self.executor.time
+            state = self._state_dict()
+        for callback in self.log_callbacks:
+            callback(t, state)
+
+    def _state_dict(self):
+        x, y, z, yaw = self.executor.pose
+        pitch, roll = self._tilt()
+        return {
+            'state': self.get_state(),
+            'x': x, 'y': y, 'z': z,
+            'vx': self.velocity[0], 'vy': self.velocity[1], 'vz': self.velocity[2],
+            'ax': self.acceleration[0], 'ay': self.acceleration[1], 'az': self.acceleration[2],
+            'yaw': yaw, 'pitch': pitch, 'roll': roll,
+        }
+
+    def run(self, timeout=None, dt=RUN_STEP):
+        """
+        Run the mission as fast as possible until it is done or until timeout
+        seconds of mission time, returns the mission time
+        """
+        start = self.executor.time
+        while self.executor.is_running:
+            if timeout is not None and self.executor.time - start >= timeout:
+                break
+            self.step(dt)
+        return self.executor.time - start
+
+    def control(self, state, dt):
+        """Advance a simulated Crazyflie, see SimCrazyflie.controller"""
+        self.step(dt*self.speed)
+        with self._lock:
+            s = self._state_dict()
+            flying = self.executor.is_running
+        for name in ('x', 'y', 'z', 'vx', 'vy', 'vz', 'ax', 'ay', 'az'):
+            setattr(state, name, s[name])
+        yaw = math.degrees(s['yaw'])
+        state.yaw_rate = angle_difference(s['yaw'], math.radians(state.yaw))*180/math.pi/dt
+        state.yaw = yaw
+        state.pitch = math.degrees(s['pitch'])
+        state.roll = math.degrees(s['roll'])
+        state.thrust = HOVER_THRUST if flying else 0
+        if flying:
+            state.used += dt/FLIGHT_TIME
+
+    def attach(self, sim: SimCrazyflie):
+        """Run the emulator behind the app channel of a simulated Crazyflie"""
+        sim.app_handler = self.handle
+        sim.controller = self.control
+
+
+class EmulatorLinkDriver(SimLinkDriver):
+    """CRTP driver for links to simulated Crazyflies running the emulator"""
+
+    SCHEME = 'lissim'
+
+    OPTIONS = {'x': float, 'y': float, 'speed': float, 'address': int}
+
+    _crazyflies = {}
+
+    def _create_crazyflie(self, options):
+        sim = SimCrazyflie(options.get('x', 0.0), options.get('y', 0.0))
+        emulator = Emulator(**options)
+        emulator.attach(sim)
+        return sim
+
+
+def init_driver():
+    """Make cflib open lissim:// links"""
+    register_driver(EmulatorLinkDriver)
@@ -0,0 +1,180 @@
+"""
+Missions for swarms of drones flying in formation.
+
+A formation is a set of offsets (m) from a reference path, in the frame of
+the path: x forward along its yaw, y to the left and z up. Every drone of
+the swarm flies the reference path moved by its offset, so the missions of
+all the drones are computed at once with numpy, and they all take the same
+time between two poses of the path to keep the formation while flying.
+
+    offsets = formation_offsets(FORMATION_TYPE.GRID, 6, spacing=0.6)
+    missions = formation_missions(path, offsets, durations=4.0)
+    backend.upload_missions(dict(zip(range(0xE2, 0xE8), missions)))
+"""
+
+import enum
+import math
+
+import numpy as np
+
+from lis.MissionSimulator import mission_segments
+from lis.MissionSimulator import DURATION
+from lis.MissionSimulator import TARGET
+from lis.Waypoint import Waypoint
+from lis.Waypoint import CONTROLLER_TYPE
+from lis.Waypoint import WAYPOINT_COMMAND_TYPE
+from lis.Waypoint import WAYPOINT_HL_COMMAND_TYPE
+from lis.Waypoint import WAYPOINT_MODE
+from lis.Waypoint import WAYPOINT_TYPE
+
+# Largest position (m) of a waypoint, positions are sent in mm on 16 bits
+MAX_POSITION = 32.767
+# Longest time (s) between two poses of the path, sent in tenths of seconds
+# on 16 bits
+MAX_DURATION = 3276.7
+
+
+class FORMATION_TYPE(enum.IntEnum):
+    LINE = 0
+    GRID = 1
+    CIRCLE = 2
+    CUSTOM = 3
+
+
+def formation_offsets(formation: FORMATION_TYPE, count, spacing=0.5, offsets=None):
+    """
+    Offsets (count, 3) of count drones in formation, spacing m apart. LINE
+    puts them side by side, GRID in rows behind the path, the widest row
+    first, and CIRCLE around it. CUSTOM takes the (x, y) or (x, y, z)
+    offsets given.
+    """
+    if formation == FORMATION_TYPE.CUSTOM:
+        if offsets is None:
+            raise ValueError("Custom formations need offsets")
+        offsets = np.atleast_2d(np.asarray(offsets, dtype=float))
+        if offsets.shape[1] not in (2, 3):
+            raise ValueError("Offsets are (x, y) or (x, y, z)")
+        return np.hstack((offsets, np.zeros((len(offsets), 3 - offsets.shape[1]))))
+
+    if count < 1:
+        raise ValueError("A formation needs at least one drone")
+    i = np.arange(count)
+    result = np.zeros((count, 3))
+    if formation == FORMATION_TYPE.LINE:
+        result[:, 1] = ((count - 1)/2.0 - i)*spacing
+    elif formation == FORMATION_TYPE.GRID:
+        columns = math.ceil(math.sqrt(count))
+        row, column = np.divmod(i, columns)
+        # The last row may be shorter, it is centered too
+        in_row = np.minimum(columns, count - row*columns)
+        result[:, 0] = -row*spacing
+        result[:, 1] = ((in_row - 1)/2.0 - column)*spacing
+    elif formation == FORMATION_TYPE.CIRCLE:
+        if count > 1:
+            # Neighbours are spacing apart
+            radius = spacing/(2*math.sin(math.pi/count))
+            angle = 2*math.pi*i/count
+            result[:, 0] = radius*np.cos(angle)
+            result[:, 1] = radius*np.sin(angle)
+    else:
+        raise ValueError("Unknown formation {}".format(formation))
+    return result
+
+
+def mission_path(waypoints: list):
+    """
+    Reference path of a mission: the poses it flies through while in the
+    air and the time to reach each one after the first
+    """
+    segments = mission_segments(waypoints)
+    segments = segments[segments[:, TARGET][:, 2] > 0]
+    return segments[:, TARGET], np.maximum(segments[1:, DURATION], 0.1)
+
+
+def formation_poses(path, offsets, rotate=True):
+    """
+    Poses (drones, poses, 4) of every drone along the path, an array of
+    poses (x, y, z, yaw) in m and rad. The formation turns with the yaw of
+    the path unless rotate is False.
+    """
+    path = np.atleast_2d(np.asarray(path, dtype=float))
+    offsets = np.asarray(offsets, dtype=float)
+    yaw = path[:, 3] if rotate else np.zeros(len(path))
+    cos, sin = np.cos(yaw), np.sin(yaw)
+    # Rotation of the offsets for every pose, (poses, 3, 3)
+    rotation = np.zeros((len(path), 3, 3))
+    rotation[:, 0, 0] = cos
+    rotation[:, 0, 1] = -sin
+    rotation[:, 1, 0] = sin
+    rotation[:, 1, 1] = cos
+    rotation[:, 2, 2] = 1.0
+    poses = np.empty((len(offsets), len(path), 4))
+    poses[:, :, :3] = path[None, :, :3] + np.einsum('pij,dj->dpi', rotation, offsets)
+    poses[:, :, 3] = path[None, :, 3]
+    return poses
+
+
+def formation_missions(path, offsets, durations=5.0, rotate=True, controller=CONTROLLER_TYPE.LEE):
+    """
+    Missions of the drones of a formation flying the path, see
+    formation_poses. Every drone takes off below the first pose of the path,
+    goes through the next ones in durations seconds each (one value, or one
+    per pose after the first) and lands below the last one. Returns a list
+    of lists of waypoints, one per drone in the order of the offsets.
+    """
+    poses = formation_poses(path, offsets, rotate)
+    count = poses.shape[1]
+    durations = np.broadcast_to(np.asarray(durations, dtype=float), (max(count - 1, 0),))
+    if np.abs(poses[:, :, :3]).max() > MAX_POSITION:
+        raise ValueError("The formation goes beyond {} m".format(MAX_POSITION))
+    if np.any(durations <= 0) or np.any(durations > MAX_DURATION):
+        raise ValueError("Durations are between 0 and {} s".format(MAX_DURATION))
+
+    positions = np.rint(poses[:, :, :3]*1000).astype(int).tolist()
+    # Yaw between -pi and pi, in mrad
+    yaws = np.rint(((poses[:, :, 3] + math.pi) % (2*math.pi) - math.pi)*1000).astype(int).tolist()
+    tenths = np.rint(durations*10).astype(int).tolist()
+
+    to_wp = Waypoint()
+    to_wp.name = "TO"
+    to_wp.parameters.type = WAYPOINT_TYPE.TAKE_OFF
+    to_wp.parameters.hl_command_type = WAYPOINT_HL_COMMAND_TYPE.TIME
+    to_wp.parameters.modes_attitude.yaw = WAYPOINT_MODE.ABSOLUTE
+    to_wp.hl_command_parameter = 20
+
+    g_wp = Waypoint()
+    g_wp.parameters.type = WAYPOINT_TYPE.GOTO
+    g_wp.parameters.controller = controller
+    g_wp.parameters.modes_position.x = WAYPOINT_MODE.ABSOLUTE
+    g_wp.parameters.modes_position.y = WAYPOINT_MODE.ABSOLUTE
+    g_wp.parameters.modes_position.z = WAYPOINT_MODE.ABSOLUTE
+    g_wp.parameters.modes_attitude.yaw = WAYPOINT_MODE.ABSOLUTE
+    g_wp.parameters.hl_command_type = WAYPOINT_HL_COMMAND_TYPE.TIME
+    g_wp.parameters.command_type = WAYPOINT_COMMAND_TYPE.HIGH_LEVEL
+
+    ld_wp = Waypoint()
+    ld_wp.name = "L"
+    ld_wp.parameters.type = WAYPOINT_TYPE.LAND
+    ld_wp.parameters.controller = controller
+    ld_wp.parameters.modes_attitude.yaw = WAYPOINT_MODE.ABSOLUTE
+
+    missions = []
+    for drone_positions, drone_yaws in zip(positions, yaws):
+        mission = []
+        for i, ((x, y, z), yaw) in enumerate(zip(drone_positions, drone_yaws)):
+            if i == 0:
+                wp = to_wp.copy()
+            else:
+                wp = g_wp.copy()
+                wp.name = "G{}".format(i)
+                wp.hl_command_parameter = tenths[i - 1]
+            wp.position.x, wp.position.y, wp.position.z = x, y, z
+            wp.attitude.yaw = yaw
+            mission.append(wp)
+        if mission:
+            wp = ld_wp.copy()
+            wp.position.x, wp.position.y = mission[-1].position.x, mission[-1].position.y
+            wp.attitude.yaw = mission[-1].attitude.yaw
+            mission.append(wp)
+        missions.append(mission)
+    return missions
@@ -0,0 +1,242 @@
+"""
+Mission files, lists of waypoints saved as a binary image or as JSON.
+
+The binary image (.lism) holds the waypoints encoded exactly as they are
+sent over the appchannel (see Waypoint.waypoint_to_bytes), one after the
+other, followed by their names:
+
+    header  "<4sHHI"   magic b'LISM', version, size of a waypoint, count
+    stream  count waypoints of 21 bytes
+    names   count names of 8 bytes, utf-8 padded with zeros
+
+so the stream of a mission can be diffed or cached as it is. The images are
+encoded and decoded for all the waypoints at once with numpy. The JSON
+variant (.json) is meant to be read and edited by hand, enums are written
+with their names.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+from lis.Waypoint import Waypoint
+from lis.Waypoint import bitfield_sizes
+from lis.Waypoint import CONTROLLER_TYPE
+from lis.Waypoint import WAYPOINT_COMMAND_TYPE
+from lis.Waypoint import WAYPOINT_FOLLOW_REFERENCE
+from lis.Waypoint import WAYPOINT_HL_COMMAND_TYPE
+from lis.Waypoint import WAYPOINT_MODE
+from lis.Waypoint import WAYPOINT_TYPE
+
+MAGIC = b'LISM'
+VERSION = 1
+HEADER = "<4sHHI"
+NAME_SIZE = 8
+
+FILE_FILTER = "Mission (*.lism);;Mission as JSON (*.json)"
+
+# A waypoint as encoded by Waypoint.waypoint_to_bytes
+WAYPOINT_DTYPE = np.dtype([
+    ('bitfield', '<u4'),
+    ('x', '<i2'), ('y', '<i2'), ('z', '<i2'),
+    ('yaw', '<i2'), ('pitch', '<i2'), ('roll', '<i2'),
+    ('loop_count', 'u1'),
+    ('type_parameter', '<i2'),
+    ('hl_command_parameter', '<i2'),
+])
+
+# First bit and type of the flags of the bitfield, in the order of
+# Waypoint.waypoint_flags_to_bitfield: type, controller, follow position and
+# yaw references, command type, hl command type, position and attitude modes
+_FLAGS = [
+    (0, WAYPOINT_TYPE),
+    (4, CONTROLLER_TYPE),
+    (8, WAYPOINT_FOLLOW_REFERENCE),
+    (9, WAYPOINT_FOLLOW_REFERENCE),
+    (10, WAYPOINT_COMMAND_TYPE),
+    (11, WAYPOINT_HL_COMMAND_TYPE),
+    (16, WAYPOINT_MODE),
+    (18, WAYPOINT_MODE),
+    (20, WAYPOINT_MODE),
+    (24, WAYPOINT_MODE),
+    (26, WAYPOINT_MODE),
+    (28, WAYPOINT_MODE),
+]
+
+# Range of the fields of a waypoint
+_FIELD_MIN = np.array([np.iinfo(WAYPOINT_DTYPE[field]).min for field in WAYPOINT_DTYPE.names])
+_FIELD_MAX = np.array([np.iinfo(WAYPOINT_DTYPE[field]).max for field in WAYPOINT_DTYPE.names])
+
+
+class MissionFileError(Exception):
+    pass
+
+
+def waypoints_to_stream(waypoints: list):
+    """
+    Encode waypoints as they are sent over the appchannel, one after the
+    other. Raises MissionFileError if a value does not fit its field.
+    """
+    rows = []
+    for wp in waypoints:
+        p = wp.parameters
+        rows.append((
+            p.type | p.controller << 4 | p.follow_position_reference << 8 | p.follow_yaw_reference << 9 |
+            p.command_type << 10 | p.hl_command_type << 11 |
+            p.modes_position.x << 16 | p.modes_position.y << 18 | p.modes_position.z << 20 |
+            p.modes_attitude.yaw << 24 | p.modes_attitude.pitch << 26 | p.modes_attitude.roll << 28,
+            wp.position.x, wp.position.y, wp.position.z,
+            wp.attitude.yaw, wp.attitude.pitch, wp.attitude.roll,
+            wp.loop_count, wp.type_parameter, wp.hl_command_parameter))
+    # numpy would wrap the values that do not fit around
+    values = np.array(rows, dtype=np.int64).reshape(-1, len(WAYPOINT_DTYPE.names))
+    invalid = (values < _FIELD_MIN) | (values > _FIELD_MAX)
+    if invalid.any():
+        row, column = np.argwhere(invalid)[0]
+        raise MissionFileError("Waypoint {}: {} {} is out of range".format(
+            waypoints[row].name, WAYPOINT_DTYPE.names[column], values[row, column]))
+    return np.array(rows, dtype=WAYPOINT_DTYPE).tobytes()
+
+
+def waypoints_to_image(waypoints: list):
+    """Encode waypoints to a mission image"""
+    names = np.array([wp.name.encode('utf-8')[:NAME_SIZE] for wp in waypoints], dtype='S{}'.format(NAME_SIZE))
+    return struct.pack(HEADER, MAGIC, VERSION, WAYPOINT_DTYPE.itemsize, len(waypoints)) + \
+        waypoints_to_stream(waypoints) + names.tobytes()
+
+
+def image_to_waypoints(data: bytes):
+    """Decode a mission image to a list of waypoints"""
+    header_size = struct.calcsize(HEADER)
+    if len(data) < header_size:
+        raise MissionFileError("Not a mission image")
+    magic, version, record_size, count = struct.unpack_from(HEADER, data)
+    if magic != MAGIC:
+        raise MissionFileError("Not a mission image")
+    if version != VERSION or record_size != WAYPOINT_DTYPE.itemsize:
+        raise MissionFileError("Unsupported mission image version {}".format(version))
+    stream_size = count*record_size
+    if len(data) < header_size + stream_size + count*NAME_SIZE:
+        raise MissionFileError("Truncated mission image")
+
+    records = np.frombuffer(data, dtype=WAYPOINT_DTYPE, count=count, offset=header_size)
+    names = np.frombuffer(data, dtype='S{}'.format(NAME_SIZE), count=count, offset=header_size + stream_size)
+
+    columns = []
+    for shift, flag_type in _FLAGS:
+        values = (records['bitfield'] >> shift) & ((1 << bitfield_sizes[flag_type]) - 1)
+        members = dict((int(member), member) for member in flag_type)
+        try:
+            columns.append([members[v] for v in values.tolist()])
+        except KeyError as e:
+            raise MissionFileError("Invalid {} {}".format(flag_type.__name__, e))
+    for field in WAYPOINT_DTYPE.names[1:]:
+        columns.append(records[field].tolist())
+    columns.append([name.decode('utf-8', errors='replace') for name in names.tolist()])
+
+    waypoints = []
+    for (waypoint_type, controller, follow_position_reference, follow_yaw_reference, command_type,
+         hl_command_type, mode_x, mode_y, mode_z, mode_yaw, mode_pitch, mode_roll,
+         x, y, z, yaw, pitch, roll, loop_count, type_parameter, hl_command_parameter, name) in zip(*columns):
+        waypoint = Waypoint()
+        p = waypoint.parameters
+        p.type = waypoint_type
+        p.controller = controller
+        p.follow_position_reference = follow_position_reference
+        p.follow_yaw_reference = follow_yaw_reference
+        p.command_type = command_type
+        p.hl_command_type = hl_command_type
+        p.modes_position.x = mode_x
+        p.modes_position.y = mode_y
+        p.modes_position.z = mode_z
+        p.modes_attitude.yaw = mode_yaw
+        p.modes_attitude.pitch = mode_pitch
+        p.modes_attitude.roll = mode_roll
+        waypoint.position.x = x
+        waypoint.position.y = y
+        waypoint.position.z = z
+        waypoint.attitude.yaw = yaw
+        waypoint.attitude.pitch = pitch
+        waypoint.attitude.roll = roll
+        waypoint.loop_count = loop_count
+        waypoint.type_parameter = type_parameter
+        waypoint.hl_command_parameter = hl_command_parameter
+        waypoint.name = name
+        waypoints.append(waypoint)
+    return waypoints
+
+
+def waypoint_to_dict(waypoint: Waypoint):
+    p = waypoint.parameters
+    return {
+        'name': waypoint.name,
+        'type': p.type.name,
+        'controller': p.controller.name,
+        'command_type': p.command_type.name,
+        'hl_command_type': p.hl_command_type.name,
+        'follow_position_reference': p.follow_position_reference.name,
+        'follow_yaw_reference': p.follow_yaw_reference.name,
+        'modes_position': {axis: getattr(p.modes_position, axis).name for axis in ('x', 'y', 'z')},
+        'modes_attitude': {axis: getattr(p.modes_attitude, axis).name for axis in ('yaw', 'pitch', 'roll')},
+        'position': {axis: getattr(waypoint.position, axis) for axis in ('x', 'y', 'z')},
+        'attitude': {axis: getattr(waypoint.attitude, axis) for axis in ('yaw', 'pitch', 'roll')},
+        'loop_count': waypoint.loop_count,
+        'type_parameter': waypoint.type_parameter,
+        'hl_command_parameter': waypoint.hl_command_parameter,
+    }
+
+
+def dict_to_waypoint(d: dict):
+    waypoint = Waypoint()
+    p = waypoint.parameters
+    try:
+        waypoint.name = d['name']
+        p.type = WAYPOINT_TYPE[d['type']]
+        p.controller = CONTROLLER_TYPE[d.get('controller', p.controller.name)]
+        p.command_type = WAYPOINT_COMMAND_TYPE[d.get('command_type', p.command_type.name)]
+        p.hl_command_type = WAYPOINT_HL_COMMAND_TYPE[d.get('hl_command_type', p.hl_command_type.name)]
+        p.follow_position_reference = \
+            WAYPOINT_FOLLOW_REFERENCE[d.get('follow_position_reference', p.follow_position_reference.name)]
+        p.follow_yaw_reference = WAYPOINT_FOLLOW_REFERENCE[d.get('follow_yaw_reference', p.follow_yaw_reference.name)]
+        for axis, mode in d.get('modes_position', {}).items():
+            setattr(p.modes_position, axis, WAYPOINT_MODE[mode])
+        for axis, mode in d.get('modes_attitude', {}).items():
+            setattr(p.modes_attitude, axis, WAYPOINT_MODE[mode])
+        for axis, value in d.get('position', {}).items():
+            setattr(waypoint.position, axis, int(value))
+        for axis, value in d.get('attitude', {}).items():
+            setattr(waypoint.attitude, axis, int(value))
+        waypoint.loop_count = int(d.get('loop_count', waypoint.loop_count))
+        waypoint.type_parameter = int(d.get('type_parameter', waypoint.type_parameter))
+        waypoint.hl_command_parameter = int(d.get('hl_command_parameter', waypoint.hl_command_parameter))
+    except (KeyError, ValueError, TypeError) as e:
+        raise MissionFileError("Invalid waypoint {}: {}".format(d.get('name', '?'), e))
+    return waypoint
+
+
+def save_mission(path, waypoints: list):
+    """Save waypoints to a mission file, as JSON if the path ends with .json"""
+    if path.lower().endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump({'version': VERSION, 'waypoints': [waypoint_to_dict(wp) for wp in waypoints]}, f, indent=1)
+    else:
+        # Encoded first, invalid waypoints leave the file as it was
+        image = waypoints_to_image(waypoints)
+        with open(path, 'wb') as f:
+            f.write(image)
+
+
+def load_mission(path):
+    """Load the waypoints of a mission file, as JSON if the path ends with .json"""
+    if path.lower().endswith('.json'):
+        with open(path) as f:
+            try:
+                data = json.load(f)
+            except ValueError as e:
+                raise MissionFileError(str(e))
+        if not isinstance(data, dict) or not isinstance(data.get('waypoints'), list):
+            raise MissionFileError("Not a mission file")
+        return [dict_to_waypoint(d) for d in data['waypoints']]
+    with open(path, 'rb') as f:
+        return image_to_waypoints(f.read())
@@ -0,0 +1,267 @@
+"""
+Offline simulation of a list of waypoints, to know before uploading a mission
+how long it takes, where it goes and if its loops are well formed.
+
+The waypoints are flown with the same kinematics as the Emulator (see
+WaypointExecutor.waypoint_segment), but the motion of every waypoint is
+computed only for the first iterations of a loop: once an iteration flies the
+previous one moved by the offset between their starts, the remaining ones
+are repeated with numpy, each moved by that offset again, and the trajectory
+is sampled for all segments at once. Long looped missions are simulated in
+milliseconds, nested loops of relative moves included.
+"""
+
+import math
+
+import numpy as np
+
+from lis.WaypointExecutor import waypoint_segment
+from lis.Waypoint import WAYPOINT_TYPE
+
+# Columns of the segment table: start and target poses (x, y, z, yaw), the
+# duration of the waypoint, the time to reach the target and if the motion
+# follows the minimum jerk profile
+START = slice(0, 4)
+TARGET = slice(4, 8)
+DURATION = 8
+MOVE_TIME = 9
+SMOOTH = 10
+COLUMNS = 11
+
+# Peak velocity of the minimum jerk profile, relative to the mean velocity
+_SMOOTH_PEAK = 1.875
+
+# Default and largest number of trajectory samples
+SAMPLE_PERIOD = 0.05
+MAX_SAMPLES = 20000
+
+
+class MissionSimulation:
+    """
+    Result of simulating a mission. Positions are in m, yaw in rad, times in
+    s and velocities in m/s. errors lists the problems that make the mission
+    run differently than written (unbalanced loops...), warnings the ones that
+    may be on purpose.
+    """
+    t: np.ndarray
+    position: np.ndarray
+    yaw: np.ndarray
+    duration: float = 0.0
+    bounding_box: tuple = ((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+    peak_velocity: tuple = (0.0, 0.0, 0.0)
+    peak_speed: float = 0.0
+    segment_count: int = 0
+    errors: list
+    warnings: list
+
+    def __init__(self):
+        self.t = np.zeros((0,))
+        self.position = np.zeros((0, 3))
+        self.yaw = np.zeros((0,))
+        self.errors = []
+        self.warnings = []
+
+    def summary(self):
+        lines = ["Duration: {:.1f} s".format(self.duration)]
+        for axis, low, high in zip("XYZ", *self.bounding_box):
+            lines.append("{}: {:.2f} .. {:.2f} m".format(axis, low, high))
+        lines.append("Peak vel: {:.2f} m/s".format(self.peak_speed))
+        lines += self.errors
+        lines += self.warnings
+        return "\n".join(lines)
+
+
+def _parse_loops(waypoints, errors):
+    # Nest the waypoints in lists of ('waypoint', waypoint) and
+    # ('loop', count, body) items, the way the drone runs them
+    root = []
+    stack = [(root, None)]
+    for i, waypoint in enumerate(waypoints):
+        waypoint_type = waypoint.parameters.type
+        if waypoint_type == WAYPOINT_TYPE.LOOP_BEGIN:
+            body = []
+            stack[-1][0].append(('loop', 1, body))
+            stack.append((body, i))
+        elif waypoint_type == WAYPOINT_TYPE.LOOP_END:
+            if len(stack) == 1:
+                errors.append("{} ends a loop that never began".format(waypoint.name))
+                continue
+            body, _ = stack.pop()
+            parent = stack[-1][0]
+            parent[-1] = ('loop', max(1, waypoint.loop_count), body)
+            if waypoint.loop_count < 1:
+                errors.append("{} loops {} times".format(waypoint.name, waypoint.loop_count))
+        else:
+            stack[-1][0].append(('waypoint', waypoint))
+    for _, begin in stack[1:]:
+        errors.append("{} begins a loop that never ends".format(waypoints[begin].name))
+    return root
+
+
+class _Stop:
+    # The motors are stopped and the drone is on the ground at once
+    def __init__(self, start, target):
+        self.start = start
+        self.target = target
+        self.duration = 0.0
+        self.move_time = 0.0
+        self.smooth = False
+
+
+def _segment_row(segment):
+    row = np.empty((COLUMNS,))
+    row[START] = segment.start
+    row[TARGET] = segment.target
+    row[DURATION] = segment.duration
+    row[MOVE_TIME] = segment.move_time
+    row[SMOOTH] = segment.smooth
+    return row
+
+
+def _fly(items, pose):
+    # Returns the table of segments, the pose at the end and if the mission
+    # was shut down
+    rows = []
+    for item in items:
+        if item[0] == 'waypoint':
+            waypoint = item[1]
+            if waypoint.parameters.type == WAYPOINT_TYPE.SHUTDOWN:
+                x, y, _, yaw = pose
+                rows.append(_segment_row(_Stop(pose, (x, y, 0.0, yaw))))
+                return _table(rows), rows[-1][TARGET], True
+            segment = waypoint_segment(waypoint, tuple(pose))
+            if segment is not None:
+                rows.append(_segment_row(segment))
+                pose = segment.target
+            continue
+
+        _, count, body = item
+        start = np.asarray(pose, dtype=float)
+        iteration, pose, stopped = _fly(body, start)
+        rows.append(iteration)
+        for i in range(1, count):
+            if stopped:
+                break
+            shift = pose - start
+            start = pose
+            previous = iteration
+            iteration, pose, stopped = _fly(body, start)
+            rows.append(iteration)
+            if not stopped and np.allclose(pose - start, shift, atol=1e-9) and \
+                    _is_shifted(iteration, previous, shift):
+                # Every other iteration is this one moved by shift once more,
+                # the waypoints flown do not depend on where they start from
+                remaining = count - 1 - i
+                rows.append(_repeat(iteration, shift, remaining))
+                pose = pose + shift*remaining
+                break
+        if stopped:
+            return _table(rows), pose, True
+    return _table(rows), np.asarray(pose, dtype=float), False
+
+
+def _shift_row(shift):
+    row = np.zeros((COLUMNS,))
+    row[START] = shift
+    row[TARGET] = shift
+    return row
+
+
+def _is_shifted(iteration, previous, shift):
+    # If the segments of iteration are those of previous moved by shift
+    return iteration.shape == previous.shape and \
+        np.allclose(iteration, previous + _shift_row(shift), atol=1e-9)
+
+
+def _repeat(iteration, shift, count):
+    # count copies of the segments of an iteration, each moved by shift from
+    # the previous one
+    steps = np.arange(1, count + 1, dtype=float)
+    copies = iteration[None, :, :] + steps[:, None, None]*_shift_row(shift)[None, None, :]
+    return copies.reshape(-1, COLUMNS)
+
+
+def _table(rows):
+    if not rows:
+        return np.zeros((0, COLUMNS))
+    return np.vstack([np.atleast_2d(row) for row in rows])
+
+
+def _sample(segments, t):
+    ends = np.cumsum(segments[:, DURATION])
+    index = np.searchsorted(ends, t, side='right')
+    index = np.minimum(index, len(segments) - 1)
+    seg = segments[index]
+    local = t - (ends[index] - seg[:, DURATION])
+
+    move_time = seg[:, MOVE_TIME]
+    s = np.ones_like(t)
+    moving = move_time > 0
+    s[moving] = np.clip(local[moving]/move_time[moving], 0.0, 1.0)
+    smooth = seg[:, SMOOTH] > 0
+    s[smooth] = s[smooth]**3*(10.0 - 15.0*s[smooth] + 6.0*s[smooth]**2)
+
+    start = seg[:, START]
+    target = seg[:, TARGET]
+    position = start[:, :3] + (target[:, :3] - start[:, :3])*s[:, None]
+    dyaw = (target[:, 3] - start[:, 3] + math.pi) % (2*math.pi) - math.pi
+    yaw = start[:, 3] + dyaw*s
+    return position, yaw
+
+
+def mission_segments(waypoints: list, start=None, errors=None, warnings=None):
+    """
+    Fly a list of waypoints and return the table of the segments flown, one
+    row per segment. The drone starts on the ground at start (x, y in m), or
+    below the first take off if not given. The problems found in the mission
+    are appended to the errors and warnings lists if given.
+    """
+    errors = [] if errors is None else errors
+    warnings = [] if warnings is None else warnings
+    if start is None:
+        start = (0.0, 0.0)
+        for waypoint in waypoints:
+            if waypoint.parameters.type == WAYPOINT_TYPE.TAKE_OFF:
+                start = (waypoint.position.x/1000.0, waypoint.position.y/1000.0)
+                break
+
+    items = _parse_loops(waypoints, errors)
+    if waypoints and waypoints[0].parameters.type != WAYPOINT_TYPE.TAKE_OFF:
+        warnings.append("The mission does not begin with a take off")
+
+    segments, end, stopped = _fly(items, np.array([start[0], start[1], 0.0, 0.0]))
+    if segments.shape[0] > 0 and end[2] > 0:
+        warnings.append("The mission ends {:.2f} m above ground".format(end[2]))
+    return segments
+
+
+def simulate_mission(waypoints: list, start=None, sample_period=SAMPLE_PERIOD, max_samples=MAX_SAMPLES):
+    """
+    Simulate a list of waypoints, see mission_segments. Returns a
+    MissionSimulation with the trajectory sampled every sample_period
+    seconds, at most max_samples times.
+    """
+    result = MissionSimulation()
+    segments = mission_segments(waypoints, start, result.errors, result.warnings)
+    if segments.shape[0] == 0:
+        return result
+
+    result.segment_count = segments.shape[0]
+    result.duration = float(segments[:, DURATION].sum())
+
+    points = np.vstack((segments[:, 0:3], segments[:, 4:7]))
+    result.bounding_box = (tuple(points.min(axis=0)), tuple(points.max(axis=0)))
+
+    delta = np.abs(segments[:, 4:7] - segments[:, 0:3])
+    move_time = segments[:, MOVE_TIME]
+    factor = np.where(segments[:, SMOOTH] > 0, _SMOOTH_PEAK, 1.0)
+    moving = move_time > 0
+    if moving.any():
+        velocity = delta[moving]*(factor[moving]/move_time[moving])[:, None]
+        result.peak_velocity = tuple(velocity.max(axis=0))
+        result.peak_speed = float(np.linalg.norm(velocity, axis=1).max())
+
+    period = max(sample_period, result.duration/max_samples)
+    result.t = np.arange(0.0, result.duration + period/2, period)
+    result.position, result.yaw = _sample(segments, result.t)
+    return result
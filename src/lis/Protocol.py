@@ -42,6 +42,16 @@ def gs_packet_to_bytes(packet: GS_Packet):
         b += Waypoint.waypoint_to_bytes(packet.data.waypoint)
     return b
 
+def bytes_to_gs_packet(data: bytearray):
+    packet = GS_Packet()
+    packet.type, packet.receiver_address = struct.unpack("<BB", data[:2])
+    packet.type = GS_PACKET_TYPE(packet.type)
+    if packet.type==GS_PACKET_TYPE.GS_PACKET_TYPE_STRING:
+        packet.data.string = bytes(data[2:]).decode('utf-8')
+    if packet.type==GS_PACKET_TYPE.GS_PACKET_TYPE_COMMAND:
+        packet.data.waypoint = Waypoint.bytes_to_waypoint(bytearray(data[2:]))
+    return packet
+
 def create_p2p_packet(p2p_address, pkt_bytes):
     return pkt_bytes
 
@@ -55,4 +65,19 @@ def bytes_to_poll_packet(data: bytearray):
     poll_packet.yaw, \
     poll_packet.pitch, \
     poll_packet.roll = struct.unpack("<BBhhhhhh", data)
-    return poll_packet
\ No newline at end of file
+    return poll_packet
+
+def poll_packet_to_bytes(poll_packet: GS_PACKET_POLL_PACKET, sender_address=0xFF):
+    b = bytearray()
+    b += struct.pack("<BB", GS_PACKET_TYPE.GS_PACKET_TYPE_POLL_RESPONSE, sender_address)
+    b += struct.pack(
+        "<BBhhhhhh",
+        poll_packet.state,
+        poll_packet.is_leader,
+        poll_packet.x,
+        poll_packet.y,
+        poll_packet.z,
+        poll_packet.yaw,
+        poll_packet.pitch,
+        poll_packet.roll)
+    return b
@@ -0,0 +1,299 @@
+"""
+Compiles a list of waypoints to a trajectory for the high level commander.
+
+The waypoints are flown with the kinematics of the MissionSimulator, which
+gives the poses to pass and when to pass them. Instead of stopping at every
+waypoint, the compiled trajectory goes through them with a cubic spline,
+continuous in velocity and acceleration, that only stops where the mission
+holds its position (hovering in place, waiting, on the ground...). Every
+piece of the spline is a cubic polynomial, so the trajectory can be written
+to the trajectory memory either uncompressed (Poly4D) or compressed (cubic
+Bezier segments, about five times smaller).
+"""
+
+import math
+
+import numpy as np
+
+from cflib.crazyflie.high_level_commander import HighLevelCommander
+from cflib.crazyflie.mem import CompressedSegment
+from cflib.crazyflie.mem import CompressedStart
+from cflib.crazyflie.mem import MemoryElement
+from cflib.crazyflie.mem import Poly4D
+
+from lis.MissionSimulator import mission_segments
+from lis.MissionSimulator import DURATION
+from lis.MissionSimulator import MOVE_TIME
+from lis.MissionSimulator import START
+from lis.MissionSimulator import TARGET
+
+# Longest piece of a compressed trajectory, the duration is stored in ms on
+# 16 bits (s)
+MAX_COMPRESSED_DURATION = 65.0
+# Largest position (m) and yaw (deg) of compressed trajectories, they are
+# stored in mm and tenths of degrees on 16 bits
+MAX_COMPRESSED_POSITION = 32.0
+MAX_COMPRESSED_YAW = 3200.0
+# Poses closer than this are the same (m and rad)
+_EPSILON = 1e-6
+
+
+class CompiledTrajectory:
+    """
+    Piecewise cubic trajectory. coefficients has one row per piece and for
+    each of x, y, z and yaw the coefficients of t^0 to t^3, t being the time
+    from the start of the piece (m, rad and s).
+    """
+    durations: np.ndarray
+    coefficients: np.ndarray
+    errors: list
+    warnings: list
+
+    def __init__(self, durations, coefficients):
+        self.durations = durations
+        self.coefficients = coefficients
+        self.errors = []
+        self.warnings = []
+
+    def __len__(self):
+        return len(self.durations)
+
+    def duration(self):
+        return float(self.durations.sum())
+
+    def start_pose(self):
+        return tuple(self.coefficients[0, :, 0]) if len(self) else (0.0, 0.0, 0.0, 0.0)
+
+    def evaluate(self, t):
+        """Return the poses (x, y, z, yaw) at the times t, as an array"""
+        t = np.atleast_1d(np.asarray(t, dtype=float))
+        ends = np.cumsum(self.durations)
+        index = np.minimum(np.searchsorted(ends, t, side='right'), len(self) - 1)
+        local = np.clip(t - (ends[index] - self.durations[index]), 0.0, self.durations[index])
+        powers = local[:, None]**np.arange(4)
+        return np.einsum('nak,nk->na', self.coefficients[index], powers)
+
+    def to_poly4d(self):
+        """Return the trajectory as Poly4D elements"""
+        trajectory = []
+        for duration, piece in zip(self.durations, self.coefficients):
+            piece = piece.copy()
+            # Every piece starts from its own yaw, keep it in one turn
+            piece[3, 0] = (piece[3, 0] + math.pi) % (2*math.pi) - math.pi
+            polys = [Poly4D.Poly([float(c) for c in axis] + [0.0]*4) for axis in piece]
+            trajectory.append(Poly4D(float(duration), *polys))
+        return trajectory
+
+    def to_compressed(self):
+        """
+        Return the trajectory as a CompressedStart followed by
+        CompressedSegment elements, with a cubic Bezier curve for moving axes.
+        Raises ValueError if the trajectory does not fit the compressed
+        format (positions beyond 32 m, yaw turning more than 9 times...).
+        """
+        if len(self):
+            points = self.evaluate(np.cumsum(self.durations))
+            points = np.vstack((points, self.coefficients[:, :, 0]))
+            if np.abs(points[:, :3]).max() > MAX_COMPRESSED_POSITION or \
+                    np.abs(np.degrees(points[:, 3])).max() > MAX_COMPRESSED_YAW:
+                raise ValueError("The trajectory is out of the range of compressed trajectories")
+        trajectory = [CompressedStart(*self.start_pose())]
+        for duration, piece in zip(self.durations, self.coefficients):
+            elements = []
+            for a0, a1, a2, a3 in piece:
+                if abs(a1) < _EPSILON and abs(a2) < _EPSILON and abs(a3) < _EPSILON:
+                    elements.append([])
+                    continue
+                # Control points of the Bezier curve, the first one is where
+                # the previous segment ends
+                h = duration
+                elements.append([a0 + a1*h/3,
+                                 a0 + 2*a1*h/3 + a2*h*h/3,
+                                 a0 + a1*h + a2*h*h + a3*h*h*h])
+            # Holds that are too long are split
+            pieces = max(1, math.ceil(duration/MAX_COMPRESSED_DURATION))
+            if pieces > 1 and any(elements):
+                raise ValueError("Moves longer than {} s can not be compressed".format(MAX_COMPRESSED_DURATION))
+            for _ in range(pieces):
+                trajectory.append(CompressedSegment(duration/pieces, *elements))
+        return trajectory
+
+    def to_elements(self, compressed=True):
+        """
+        Return the elements of the trajectory as written to the trajectory
+        memory and if they are compressed. Trajectories that can not be
+        compressed are returned as Poly4D elements, with a warning.
+        """
+        if compressed:
+            try:
+                return self.to_compressed(), True
+            except ValueError as e:
+                self.warnings.append(str(e))
+        return self.to_poly4d(), False
+
+    def pack(self, compressed=True):
+        trajectory, _ = self.to_elements(compressed)
+        return b''.join(bytes(element.pack()) for element in trajectory)
+
+    def to_csv(self, path):
+        """
+        Write the trajectory in the csv format of the uav_trajectories tools,
+        as read by the examples of cflib
+        """
+        header = ["Duration"]
+        for axis in ("x", "y", "z", "yaw"):
+            header += ["{}^{}".format(axis, i) for i in range(8)]
+        rows = np.zeros((len(self), 33))
+        rows[:, 0] = self.durations
+        for axis in range(4):
+            rows[:, 1 + axis*8:5 + axis*8] = self.coefficients[:, axis, :]
+        np.savetxt(path, rows, delimiter=",", header=",".join(header), comments="", fmt="%.9g")
+
+    def upload(self, cf, trajectory_id=1, compressed=True):
+        """
+        Write the trajectory to the trajectory memory of a connected
+        Crazyflie and define it as trajectory_id for the high level
+        commander. Trajectories that can not be compressed are written
+        uncompressed. Returns True if it was written.
+        """
+        memories = cf.mem.get_mems(MemoryElement.TYPE_TRAJ)
+        if not memories:
+            self.errors.append("The Crazyflie has no trajectory memory")
+            return False
+        memory = memories[0]
+        trajectory, compressed = self.to_elements(compressed)
+        size = sum(len(element.pack()) for element in trajectory)
+        if size > memory.size:
+            self.errors.append("The trajectory needs {} bytes, the memory has {}".format(size, memory.size))
+            return False
+        memory.trajectory = trajectory
+        if not memory.write_data_sync():
+            self.errors.append("Writing the trajectory failed")
+            return False
+        trajectory_type = HighLevelCommander.TRAJECTORY_TYPE_POLY4D_COMPRESSED if compressed else \
+            HighLevelCommander.TRAJECTORY_TYPE_POLY4D
+        pieces = len(trajectory) - 1 if compressed else len(trajectory)
+        cf.high_level_commander.define_trajectory(trajectory_id, 0, pieces, type=trajectory_type)
+        return True
+
+
+def _solve_velocities(times, values):
+    """
+    Velocities at the knots of a cubic spline through values at times,
+    continuous in acceleration and stopped at both ends. values has one
+    column per axis, the tridiagonal system is solved for all of them at once.
+    """
+    n = len(times)
+    velocities = np.zeros_like(values)
+    if n < 3:
+        return velocities
+    h = np.diff(times)
+    slopes = np.diff(values, axis=0)/h[:, None]
+
+    # Rows 1 to n - 2: h[i] v[i-1] + 2 (h[i-1] + h[i]) v[i] + h[i-1] v[i+1]
+    lower = h[1:]
+    diagonal = 2*(h[:-1] + h[1:])
+    upper = h[:-1]
+    rhs = 3*(h[1:, None]*slopes[:-1] + h[:-1, None]*slopes[1:])
+
+    # Thomas algorithm, the end velocities are zero
+    m = n - 2
+    c = np.zeros(m)
+    d = np.zeros_like(rhs)
+    c[0] = upper[0]/diagonal[0]
+    d[0] = rhs[0]/diagonal[0]
+    for i in range(1, m):
+        denominator = diagonal[i] - lower[i]*c[i - 1]
+        c[i] = upper[i]/denominator
+        d[i] = (rhs[i] - lower[i]*d[i - 1])/denominator
+    velocities[m] = d[m - 1]
+    for i in range(m - 2, -1, -1):
+        d[i] -= c[i]*d[i + 1]
+        velocities[i + 1] = d[i]
+    return velocities
+
+
+def _spline(times, values):
+    # Coefficients (pieces, axes, 4) of the spline through the knots
+    velocities = _solve_velocities(times, values)
+    h = np.diff(times)[:, None]
+    delta = np.diff(values, axis=0)
+    v0 = velocities[:-1]
+    v1 = velocities[1:]
+    coefficients = np.empty((len(h), values.shape[1], 4))
+    coefficients[:, :, 0] = values[:-1]
+    coefficients[:, :, 1] = v0
+    coefficients[:, :, 2] = (3*delta/h - 2*v0 - v1)/h
+    coefficients[:, :, 3] = (v0 + v1 - 2*delta/h)/(h*h)
+    return coefficients
+
+
+def _hold(pose):
+    coefficients = np.zeros((1, 4, 4))
+    coefficients[0, :, 0] = pose
+    return coefficients
+
+
+def compile_trajectory(waypoints: list, start=None):
+    """
+    Compile a list of waypoints to a CompiledTrajectory, see
+    MissionSimulator.mission_segments for start
+    """
+    errors = []
+    warnings = []
+    segments = mission_segments(waypoints, start, errors, warnings)
+    segments = segments[segments[:, DURATION] > 0]
+    if len(segments) == 0:
+        trajectory = CompiledTrajectory(np.zeros((0,)), np.zeros((0, 4, 4)))
+        trajectory.errors, trajectory.warnings = errors, warnings
+        return trajectory
+
+    # Yaw without wrapping, so that the spline turns the short way
+    start_yaw = segments[0, START][3]
+    turns = (segments[:, TARGET][:, 3] - segments[:, START][:, 3] + math.pi) % (2*math.pi) - math.pi
+    segments[:, 4 + 3] = start_yaw + np.cumsum(turns)
+    segments[1:, 3] = segments[:-1, 4 + 3]
+
+    durations = []
+    pieces = []
+    knots_t = [0.0]
+    knots = [segments[0, START]]
+    t = 0.0
+
+    def flush():
+        # Spline through the knots of the motion so far, returns if any
+        if len(knots) < 2:
+            return False
+        times = np.asarray(knots_t)
+        durations.extend(np.diff(times))
+        pieces.append(_spline(times, np.asarray(knots)))
+        return True
+
+    holding = False
+
+    for segment in segments:
+        move_time = segment[MOVE_TIME]
+        if np.abs(segment[TARGET] - segment[START]).max() > _EPSILON and move_time > 0:
+            t += move_time
+            knots_t.append(t)
+            knots.append(segment[TARGET])
+            hold = segment[DURATION] - move_time
+        else:
+            hold = segment[DURATION]
+        if hold > _EPSILON:
+            # The drone stops here, end the spline and hold the pose, in the
+            # same piece as the previous hold if it did not move since
+            if flush() or not holding:
+                durations.append(hold)
+                pieces.append(_hold(knots[-1]))
+            else:
+                durations[-1] += hold
+            holding = True
+            t += hold
+            knots_t = [t]
+            knots = [knots[-1]]
+    flush()
+
+    trajectory = CompiledTrajectory(np.asarray(durations), np.concatenate(pieces))
+    trajectory.errors, trajectory.warnings = errors, warnings
+    return trajectory
@@ -158,13 +158,11 @@ def waypoint_flags_to_bitfield(waypoint: Waypoint):
     bitfield_value, bitfield_index = waypoint_flag_to_bitfield(waypoint.parameters.type, bitfield_value, bitfield_index)
     bitfield_value, bitfield_index = waypoint_flag_to_bitfield(waypoint.parameters.controller, bitfield_value, bitfield_index)
     bitfield_index += 1
-    print(bitfield_index)
     bitfield_value, bitfield_index = waypoint_flag_to_bitfield(waypoint.parameters.follow_position_reference, bitfield_value, bitfield_index)
     bitfield_value, bitfield_index = waypoint_flag_to_bitfield(waypoint.parameters.follow_yaw_reference, bitfield_value, bitfield_index)
     bitfield_value, bitfield_index = waypoint_flag_to_bitfield(waypoint.parameters.command_type, bitfield_value, bitfield_index)
     bitfield_value, bitfield_index = waypoint_flag_to_bitfield(waypoint.parameters.hl_command_type, bitfield_value, bitfield_index)
     bitfield_index += 4
-    print(bitfield_index)
     bitfield_value, bitfield_index = waypoint_flag_to_bitfield(waypoint.parameters.modes_position.x, bitfield_value, bitfield_index)
     bitfield_value, bitfield_index = waypoint_flag_to_bitfield(waypoint.parameters.modes_position.y, bitfield_value, bitfield_index)
     bitfield_value, bitfield_index = waypoint_flag_to_bitfield(waypoint.parameters.modes_position.z, bitfield_value, bitfield_index)
@@ -182,25 +180,28 @@ def waypoint_flags_to_bitfield(waypoint: Waypoint):
 
 def waypoint_bitfield_to_flag(flag, bitfield, bitfield_index):
     flag_type = type(flag)
-    flag = (bitfield>>bitfield_index)&bitfield_sizes[flag_type]
+    flag = (bitfield>>bitfield_index)&((1<<bitfield_sizes[flag_type])-1)
     bitfield_index += bitfield_sizes[flag_type]
     return flag, bitfield_index
 
 def waypoint_bitfield_to_flags(b: bytearray, wp: Waypoint):
     bitfield = 0
-    for i in range(len(b)):
+    for i in range(4):
         bitfield += b[i]<<(i*8)
     
     bitfield_index = 0
     wp.parameters.type, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.type, bitfield, bitfield_index)
     wp.parameters.controller, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.controller, bitfield, bitfield_index)
+    bitfield_index += 1
     wp.parameters.follow_position_reference, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.follow_position_reference, bitfield, bitfield_index)
     wp.parameters.follow_yaw_reference, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.follow_yaw_reference, bitfield, bitfield_index)
     wp.parameters.command_type, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.command_type, bitfield, bitfield_index)
     wp.parameters.hl_command_type, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.hl_command_type, bitfield, bitfield_index)
+    bitfield_index += 4
     wp.parameters.modes_position.x, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.modes_position.x, bitfield, bitfield_index)
     wp.parameters.modes_position.y, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.modes_position.y, bitfield, bitfield_index)
     wp.parameters.modes_position.z, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.modes_position.z, bitfield, bitfield_index)
+    bitfield_index += 2
     wp.parameters.modes_attitude.yaw, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.modes_attitude.yaw, bitfield, bitfield_index)
     wp.parameters.modes_attitude.pitch, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.modes_attitude.pitch, bitfield, bitfield_index)
     wp.parameters.modes_attitude.roll, bitfield_index = waypoint_bitfield_to_flag(wp.parameters.modes_attitude.roll, bitfield, bitfield_index)
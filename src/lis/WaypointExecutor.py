@@ -0,0 +1,241 @@
+"""
+Waypoints flown with simple kinematics, without any link to a drone.
+
+waypoint_segment gives the motion flown for one waypoint from a pose, and
+WaypointExecutor runs a whole program of waypoints with its loops. They are
+used by the Emulator behind the simulated links, and to simulate and compile
+missions offline without loading the link drivers.
+"""
+
+import math
+
+from lis.Waypoint import Waypoint
+from lis.Waypoint import WAYPOINT_COMMAND_TYPE
+from lis.Waypoint import WAYPOINT_FOLLOW_REFERENCE
+from lis.Waypoint import WAYPOINT_HL_COMMAND_TYPE
+from lis.Waypoint import WAYPOINT_MODE
+from lis.Waypoint import WAYPOINT_TYPE
+
+# Velocity of waypoints not giving one (m/s)
+DEFAULT_VELOCITY = 0.5
+# Velocity when following direct setpoints (m/s)
+DIRECT_VELOCITY = 1.0
+# Waypoints that take no time (loops, zero durations...) run in a single step,
+# stops endless loops without any motion from blocking the emulator
+MAX_INSTANT_WAYPOINTS = 1000
+
+
+def _smooth(s):
+    # Minimum jerk profile, zero velocity and acceleration at both ends
+    return s*s*s*(10.0 - 15.0*s + 6.0*s*s)
+
+
+def angle_difference(a, b):
+    return (a - b + math.pi) % (2*math.pi) - math.pi
+
+
+class Segment:
+    """
+    Motion flown for a waypoint, from the start pose to the target pose
+    (x, y, z in m and yaw in rad). The target is reached after move_time
+    seconds and held until the waypoint ends after duration seconds.
+    """
+    start: tuple
+    target: tuple
+    duration: float = 0.0
+    move_time: float = 0.0
+    smooth: bool = True
+
+    def __init__(self, start, target, duration, move_time=None, smooth=True):
+        self.start = tuple(start)
+        self.target = tuple(target)
+        self.duration = max(0.0, duration)
+        self.move_time = self.duration if move_time is None else max(0.0, min(move_time, self.duration))
+        self.smooth = smooth
+
+    def at(self, t):
+        if t >= self.move_time:
+            return self.target
+        s = t/self.move_time
+        if self.smooth:
+            s = _smooth(s)
+        x, y, z = (a + (b - a)*s for a, b in zip(self.start[:3], self.target[:3]))
+        yaw = self.start[3] + angle_difference(self.target[3], self.start[3])*s
+        return x, y, z, yaw
+
+
+def _waypoint_time(waypoint: Waypoint, distance):
+    if waypoint.parameters.hl_command_type == WAYPOINT_HL_COMMAND_TYPE.TIME:
+        return waypoint.hl_command_parameter/10.0
+    velocity = waypoint.hl_command_parameter/100.0
+    if velocity <= 0:
+        velocity = DEFAULT_VELOCITY
+    return distance/velocity
+
+
+def _axis_target(mode, reference, current, value):
+    if mode == WAYPOINT_MODE.ABSOLUTE:
+        if reference == WAYPOINT_FOLLOW_REFERENCE.RELATIVE:
+            return current + value
+        return value
+    return current
+
+
+def waypoint_segment(waypoint: Waypoint, pose):
+    """
+    Return the Segment flown for a waypoint from pose (x, y, z, yaw), or None
+    for waypoints without motion (loops, shutdown...).
+
+    Positions of waypoints are in mm and angles in mrad. For high level
+    commands hl_command_parameter is the duration in tenths of seconds (TIME)
+    or the velocity in cm/s (VELOCITY), direct commands fly at DIRECT_VELOCITY
+    and hl_command_parameter is the duration in tenths of seconds. Axes in
+    VELOCITY mode move at the given velocity in mm/s during the waypoint. Take
+    off and land are vertical, as with the high level commander.
+    """
+    p = waypoint.parameters
+    x, y, z, yaw = pose
+    target_yaw = yaw
+    if p.modes_attitude.yaw == WAYPOINT_MODE.ABSOLUTE:
+        target_yaw = _axis_target(p.modes_attitude.yaw, p.follow_yaw_reference, yaw, waypoint.attitude.yaw/1000.0)
+
+    if p.type in (WAYPOINT_TYPE.TAKE_OFF, WAYPOINT_TYPE.LAND):
+        target_z = waypoint.position.z/1000.0 if p.type == WAYPOINT_TYPE.TAKE_OFF else 0.0
+        target = (x, y, target_z, target_yaw)
+        return Segment(pose, target, _waypoint_time(waypoint, abs(target_z - z)))
+
+    if p.type in (WAYPOINT_TYPE.FOLLOW, WAYPOINT_TYPE.IDLE):
+        # The leader is not emulated, followers hold their position
+        return Segment(pose, pose, waypoint.hl_command_parameter/10.0)
+
+    if p.type not in (WAYPOINT_TYPE.GOTO, WAYPOINT_TYPE.HOVER):
+        return None
+
+    modes = p.modes_position
+    reference = p.follow_position_reference
+    target = [
+        _axis_target(modes.x, reference, x, waypoint.position.x/1000.0),
+        _axis_target(modes.y, reference, y, waypoint.position.y/1000.0),
+        _axis_target(modes.z, reference, z, waypoint.position.z/1000.0),
+    ]
+    distance = math.dist(target, (x, y, z))
+
+    if p.command_type == WAYPOINT_COMMAND_TYPE.DIRECT:
+        duration = waypoint.hl_command_parameter/10.0
+        move_time = distance/DIRECT_VELOCITY
+    else:
+        duration = None
+        if any(m == WAYPOINT_MODE.VELOCITY for m in (modes.x, modes.y, modes.z)) and \
+                p.hl_command_type == WAYPOINT_HL_COMMAND_TYPE.TIME:
+            duration = waypoint.hl_command_parameter/10.0
+        move_time = None
+
+    # Velocity modes move at the given velocity (mm/s) for the whole waypoint
+    velocities = (waypoint.position.x, waypoint.position.y, waypoint.position.z)
+    for i, mode in enumerate((modes.x, modes.y, modes.z)):
+        if mode == WAYPOINT_MODE.VELOCITY:
+            if duration is None:
+                duration = _waypoint_time(waypoint, distance) if distance > 0 else 1.0
+            target[i] += velocities[i]/1000.0*duration
+
+    if duration is None:
+        duration = _waypoint_time(waypoint, distance)
+    if move_time is not None:
+        return Segment(pose, target + [target_yaw], duration, move_time, smooth=False)
+    return Segment(pose, target + [target_yaw], duration)
+
+
+class WaypointExecutor:
+    """Runs a program of waypoints, call step to advance it"""
+
+    def __init__(self, x=0.0, y=0.0):
+        self.program = []
+        self.pose = (x, y, 0.0, 0.0)
+        self.is_running = False
+        self.is_landing = False
+        self.time = 0.0
+        self._index = 0
+        self._loops = []
+        self._segment = None
+        self._segment_time = 0.0
+
+    def current_waypoint(self):
+        if self.is_running and self._index < len(self.program):
+            return self.program[self._index]
+        return None
+
+    def start(self):
+        self._index = 0
+        self._loops = []
+        self._segment = None
+        self.is_running = len(self.program) > 0
+        self.is_landing = False
+
+    def land(self):
+        """Stop the program and land where the drone is"""
+        if not self.is_running or self.is_landing:
+            return
+        x, y, z, yaw = self.pose
+        self._segment = Segment(self.pose, (x, y, 0.0, yaw), z/DEFAULT_VELOCITY)
+        self._segment_time = 0.0
+        self._index = len(self.program)
+        self.is_landing = True
+
+    def stop(self):
+        """Stop the motors, the drone falls to the ground"""
+        self.is_running = False
+        self.is_landing = False
+        self._segment = None
+        x, y, _, yaw = self.pose
+        self.pose = (x, y, 0.0, yaw)
+
+    def step(self, dt):
+        while dt > 0 and self.is_running:
+            if self._segment is None:
+                if not self._next_segment():
+                    break
+                continue
+            used = min(dt, self._segment.duration - self._segment_time)
+            self._segment_time += used
+            self.time += used
+            dt -= used
+            self.pose = self._segment.at(self._segment_time)
+            if self._segment_time >= self._segment.duration:
+                self._segment = None
+                self._index += 1
+        self.time += max(dt, 0)
+
+    def _next_segment(self):
+        for _ in range(MAX_INSTANT_WAYPOINTS):
+            if self._index >= len(self.program):
+                self.is_running = False
+                self.is_landing = False
+                return False
+
+            waypoint = self.program[self._index]
+            waypoint_type = waypoint.parameters.type
+            if waypoint_type == WAYPOINT_TYPE.LOOP_BEGIN:
+                self._loops.append([self._index + 1, 0])
+            elif waypoint_type == WAYPOINT_TYPE.LOOP_END:
+                if self._loops:
+                    loop = self._loops[-1]
+                    loop[1] += 1
+                    if loop[1] < waypoint.loop_count:
+                        self._index = loop[0]
+                        continue
+                    self._loops.pop()
+            elif waypoint_type == WAYPOINT_TYPE.SHUTDOWN:
+                self.stop()
+                return False
+            else:
+                segment = waypoint_segment(waypoint, self.pose)
+                if segment is not None:
+                    self.is_landing = waypoint_type == WAYPOINT_TYPE.LAND
+                    if segment.duration > 0:
+                        self._segment = segment
+                        self._segment_time = 0.0
+                        return True
+                    self.pose = segment.target
+            self._index += 1
+        # Only waypoints without motion so far, go on at the next step
+        return False
@@ -1,11 +1,11 @@
 import logging
 
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 import PyQt6.QtWidgets as QtWidgets
 from PyQt6.QtGui import QColor
 
 import lis
+from cfclient.utils.uicache import load_ui_type
 from lis.__init__ import lis_backend
 import lis.ui
 import lis.ui.tabs
@@ -18,7 +18,7 @@ __all__ = ['LISPlotTab']
 
 logger = logging.getLogger(__name__)
 
-log_options_class = uic.loadUiType(lis.module_path + "/ui/dialogs/log_options_dialog.ui")[0]
+log_options_class = load_ui_type(lis.module_path + "/ui/dialogs/log_options_dialog.ui")[0]
 
 default_colors_options = [
     "red",
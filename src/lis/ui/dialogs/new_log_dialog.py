@@ -28,8 +28,8 @@ Dialog box used to add a new logging variable to the lis plot canvas
 import logging
 
 from cfclient.utils.logconfigreader import FILE_REGEX_YAML
+from cfclient.utils.uicache import load_ui_type
 from PyQt6 import QtWidgets
-from PyQt6 import uic
 from PyQt6.QtCore import QAbstractTableModel, QVariant, Qt
 from PyQt6.QtGui import QBrush, QColor
 from PyQt6.QtWidgets import QInputDialog, QFileDialog
@@ -44,7 +44,7 @@ __all__ = ['NewLogDialog']
 logger = logging.getLogger(__name__)
 
 (anchor_postiong_widget_class, connect_widget_base_class) = (
-    uic.loadUiType(
+    load_ui_type(
         lis.module_path + '/ui/dialogs/new_log_dialog.ui')
 )
 
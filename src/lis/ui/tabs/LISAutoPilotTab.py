@@ -42,15 +42,14 @@ import sys
 import os
 import re
 
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QMessageBox, QListView
 from PyQt6.QtWidgets import QFileDialog
-from PyQt6.QtGui import QStandardItemModel, QStandardItem
 from PyQt6.QtCore import QModelIndex
 
 import lis
 from cfclient.ui.tab_toolbox import TabToolbox
+from cfclient.utils.uicache import load_ui_type
 
 from cflib.crazyflie.log import LogConfig
 
@@ -58,32 +57,45 @@ from lis.__init__ import lis_backend
 from lis.Waypoint import *
 
 from lis import Protocol
+from lis.Formation import FORMATION_TYPE, formation_missions, formation_offsets, mission_path
+from lis.MissionFile import FILE_FILTER, MissionFileError, load_mission, save_mission
+from lis.MissionSimulator import simulate_mission
+from lis.Trajectory import compile_trajectory
+from lis.ui.tabs.WaypointListModel import WaypointListModel
 
 __author__ = 'Stagiaires au Laboratoir d\'Ingénierie des Systèmes de l\'École Nationale Supérieure d\'Ingénieurs de Caen'
 __all__ = ['LISAutoPilotTab']
 
 logger = logging.getLogger(__name__)
 
-command_tab_class = uic.loadUiType(lis.module_path + "/ui/tabs/lisAutoPilotTab.ui")[0]
+command_tab_class = load_ui_type(lis.module_path + "/ui/tabs/lisAutoPilotTab.ui")[0]
 
 class LISAutoPilotTab(TabToolbox, command_tab_class):
     """Tab for commanding the drone with autopilot"""
 
+    tab_toolbox_name = 'LIS Command'
+
     _connected_signal = pyqtSignal(str)
     _disconnected_signal = pyqtSignal(str)
 
     def __init__(self, helper):
-        super(LISAutoPilotTab, self).__init__(helper, 'LIS Command')
+        super(LISAutoPilotTab, self).__init__(helper)
         self.setupUi(self)
         self.backend = lis_backend
         self.logs_configs = dict()
         self.running_logs = []
-        self.waypoints = []
-        self.waypoint_items = []
+        self.mission_simulation = None
+        self._formation_upload = None
         self.setupSignals()
         self.waypoints_container: QListView
-        self.waypoints_listmodel = QStandardItemModel(self.waypoints_container)
+        self.waypoints_listmodel = WaypointListModel(self.waypoints_container)
         self.waypoints_container.setModel(self.waypoints_listmodel)
+        self.waypoints_listmodel.rowsInserted.connect(self.update_mission_summary)
+        self.waypoints_listmodel.rowsRemoved.connect(self.update_mission_summary)
+        self.waypoints_listmodel.rowsMoved.connect(self.update_mission_summary)
+        self.waypoints_listmodel.dataChanged.connect(self.update_mission_summary)
+        self.waypoints_listmodel.layoutChanged.connect(self.update_mission_summary)
+        self.waypoints_listmodel.modelReset.connect(self.update_mission_summary)
 
         self.load_default_trajectory_2()
         self.backend.add_poll_callback(self.on_poll_response)
@@ -111,6 +123,8 @@ class LISAutoPilotTab(TabToolbox, command_tab_class):
         self.bt_remove.clicked.connect(self.on_remove_waypoint)
 
         self.bt_upload.clicked.connect(self.on_upload)
+        self.bt_load_mission.clicked.connect(self.on_load_mission)
+        self.bt_save_mission.clicked.connect(self.on_save_mission)
         self.bt_export_as_trajectory.clicked.connect(self.on_export_as_trajectory)
         # self.bt_send_to_waypoints.clicked.connect(self.on_send_to_waypoints)
 
@@ -118,6 +132,8 @@ class LISAutoPilotTab(TabToolbox, command_tab_class):
         self.bt_hover2.clicked.connect(self.on_hover2)
         self.bt_follow1.clicked.connect(self.on_follow1)
         self.bt_follow2.clicked.connect(self.on_follow2)
+        self.bt_upload_formation.clicked.connect(self.on_upload_formation)
+        self.backend.missions_uploaded_signal.connect(self.on_formation_uploaded)
 
         self.rbt_absolute_x.clicked.connect(lambda: self.lb_x.setText("X pos:"))
         self.rbt_absolute_x.clicked.connect(lambda: self.lb_units_x.setText("[m]"))
@@ -214,10 +230,18 @@ class LISAutoPilotTab(TabToolbox, command_tab_class):
             msgBox.exec()
             return
         self.add_waypoint(self.get_waypoint())
+    @property
+    def waypoints(self):
+        return self.waypoints_listmodel.waypoints
     def add_waypoint(self, waypoint):
-        self.waypoints.append(waypoint)
-        self.waypoint_items.append(QStandardItem(waypoint.name))
-        self.waypoints_listmodel.appendRow(self.waypoint_items[-1])
+        self.waypoints_listmodel.append(waypoint)
+    def set_waypoints(self, waypoints):
+        try:
+            self.waypoints_listmodel.set_waypoints(waypoints)
+        except ValueError as e:
+            msgBox = QMessageBox()
+            msgBox.setInformativeText(str(e))
+            msgBox.exec()
     def on_override_waypoint(self):
         selected_indexes = self.waypoints_container.selectedIndexes()
         if len(selected_indexes) < 1:
@@ -233,22 +257,8 @@ class LISAutoPilotTab(TabToolbox, command_tab_class):
             msgBox.setInformativeText("Waypoint name aready in use...")
             msgBox.exec()
             return
-        self.waypoints.pop(selected_index)
-        self.waypoint_items.pop(selected_index)
-        self.waypoints_listmodel.removeRow(selected_index)
-
-        waypoint = self.get_waypoint()
-        waypoint_item = QStandardItem(waypoint.name)
-
-        self.waypoints.insert(selected_index, waypoint)
-        self.waypoint_items.insert(selected_index, waypoint_item)
-        self.waypoints_listmodel.insertRow(selected_index, waypoint_item)
-
-        waypoint_index = self.waypoints_listmodel.index(selected_index, 0)
-        self.waypoints_container.setCurrentIndex(waypoint_index)
+        self.waypoints_listmodel.replace_waypoint(selected_index, self.get_waypoint())
     def on_erase_all_waypoints(self):
-        self.waypoints.clear()
-        self.waypoint_items.clear()
         self.waypoints_listmodel.clear()
     def on_remove_waypoint(self):
         selected_indexes = self.waypoints_container.selectedIndexes()
@@ -257,16 +267,71 @@ class LISAutoPilotTab(TabToolbox, command_tab_class):
             msgBox.setInformativeText("You need to select an existing waypoint to remove...")
             msgBox.exec()
             return
-        selected_index: QModelIndex = selected_indexes[0].row()
-        self.waypoints.pop(selected_index)
-        self.waypoint_items.pop(selected_index)
-        self.waypoints_listmodel.removeRow(selected_index)
+        self.waypoints_listmodel.remove_waypoints(index.row() for index in selected_indexes)
 
+    def update_mission_summary(self):
+        self.mission_simulation = simulate_mission(self.waypoints)
+        self.lb_mission_summary.setText(self.mission_simulation.summary() if self.waypoints else "")
     def on_upload(self):
+        # The mission is simulated again by the summary whenever it changes
+        simulation = self.mission_simulation
+        if simulation is None:
+            simulation = simulate_mission(self.waypoints)
+        if simulation.errors:
+            msgBox = QMessageBox()
+            msgBox.setInformativeText("The mission can not be uploaded:\n" + "\n".join(simulation.errors))
+            msgBox.exec()
+            return
         for waypoint in self.waypoints:
             self.backend.send_waypoint(waypoint)
+    def on_load_mission(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Load mission", "", FILE_FILTER)
+        if not path:
+            return
+        try:
+            waypoints = load_mission(path)
+        except (OSError, MissionFileError) as e:
+            msgBox = QMessageBox()
+            msgBox.setInformativeText("Could not load the mission: {}".format(e))
+            msgBox.exec()
+            return
+        self.set_waypoints(waypoints)
+    def on_save_mission(self):
+        path, selected_filter = QFileDialog.getSaveFileName(self, "Save mission", "", FILE_FILTER)
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += ".json" if "json" in selected_filter else ".lism"
+        try:
+            save_mission(path, self.waypoints)
+        except (OSError, MissionFileError) as e:
+            msgBox = QMessageBox()
+            msgBox.setInformativeText("Could not save the mission: {}".format(e))
+            msgBox.exec()
     def on_export_as_trajectory(self):
-        pass
+        trajectory = compile_trajectory(self.waypoints)
+        msgBox = QMessageBox()
+        if trajectory.errors or len(trajectory) == 0:
+            msgBox.setInformativeText("The mission can not be exported:\n" + "\n".join(trajectory.errors or ["No motion"]))
+            msgBox.exec()
+            return
+        # Missions that can not be compressed are uploaded as Poly4D
+        elements, compressed = trajectory.to_elements()
+        text = "{} pieces, {:.1f} s, {} bytes{}".format(
+            len(trajectory), trajectory.duration(), sum(len(element.pack()) for element in elements),
+            "" if compressed else " uncompressed")
+        if self.backend.is_connected:
+            # Ready to be started as trajectory 1 of the high level commander
+            if trajectory.upload(self._helper.cf, trajectory_id=1, compressed=compressed):
+                text = "Uploaded as trajectory 1: " + text
+        else:
+            path, _ = QFileDialog.getSaveFileName(self, "Export trajectory", "", "Trajectory (*.csv)")
+            if not path:
+                return
+            trajectory.to_csv(path)
+            text = "Saved to {}: ".format(path) + text
+        msgBox.setInformativeText("\n".join([text] + trajectory.errors + trajectory.warnings))
+        msgBox.exec()
     def on_send_to_waypoints(self):
         pass
 
@@ -276,9 +341,7 @@ class LISAutoPilotTab(TabToolbox, command_tab_class):
         self.lb_connectivity_state.setText("State: Disconnected")
     
     def does_waypoint_already_exist(self, ignore=None):
-        if self.lned_name.text().upper() in [wp.name for wp, i in zip(self.waypoints, range(len(self.waypoints))) if i != ignore]:
-            return True
-        return False
+        return self.waypoints_listmodel.contains(self.lned_name.text().upper(), ignore=ignore)
     def is_waypoint_valid(self):
         wpname = self.lned_name.text().upper()
         if len(wpname) < 1:
@@ -390,7 +453,7 @@ class LISAutoPilotTab(TabToolbox, command_tab_class):
         if len(selected_indexes) < 1:
             return
         selected_index: QModelIndex = selected_indexes[0]
-        waypoint: Waypoint = self.waypoints[selected_index.row()]
+        waypoint: Waypoint = self.waypoints_listmodel.waypoint(selected_index.row())
 
         if waypoint.parameters.type == WAYPOINT_TYPE.TAKE_OFF:
             self.rbt_takeoff.setChecked(True)
@@ -556,9 +619,7 @@ class LISAutoPilotTab(TabToolbox, command_tab_class):
         ld_wp.position.y = 1000
 
         waypoints = [to_wp, lb_wp, h1_wp, h2_wp, h3_wp, h4_wp, le_wp, ld_wp]
-        self.on_erase_all_waypoints()
-        for wp in waypoints:
-            self.add_waypoint(wp)
+        self.set_waypoints(waypoints)
     
     def load_default_trajectory_2(self):
         to_wp = Waypoint()
@@ -625,9 +686,7 @@ class LISAutoPilotTab(TabToolbox, command_tab_class):
         ld_wp.attitude.yaw = int(0*1000/180.0*3.14159265)
 
         waypoints = [to_wp, lb_wp, h1_wp, h2_wp, h3_wp, h4_wp, le_wp, ld_wp]
-        self.on_erase_all_waypoints()
-        for wp in waypoints:
-            self.add_waypoint(wp)
+        self.set_waypoints(waypoints)
     
     def on_hover1(self):
         self.load_default_trajectory_1()
@@ -675,9 +734,7 @@ class LISAutoPilotTab(TabToolbox, command_tab_class):
         ld_wp.attitude.yaw = int(0*1000/180.0*3.14159265)
 
         waypoints = [to_wp, f_wp, ld_wp]
-        self.on_erase_all_waypoints()
-        for wp in waypoints:
-            self.add_waypoint(wp)
+        self.set_waypoints(waypoints)
         
     def on_follow2(self):
         to_wp = Waypoint()
@@ -718,6 +775,54 @@ class LISAutoPilotTab(TabToolbox, command_tab_class):
         ld_wp.attitude.yaw = int(0*1000/180.0*3.14159265)
 
         waypoints = [to_wp, f_wp, ld_wp]
-        self.on_erase_all_waypoints()
-        for wp in waypoints:
-            self.add_waypoint(wp)
\ No newline at end of file
+        self.set_waypoints(waypoints)
+    def on_upload_formation(self):
+        # The drones fly the current mission in formation, from the p2p
+        # address on
+        count = self.spbx_formation_count.value()
+        first_address = self.spbx_p2p_address.value()
+        msgBox = QMessageBox()
+        path, durations = mission_path(self.waypoints)
+        if len(path) == 0:
+            msgBox.setInformativeText("The mission never takes off...")
+            msgBox.exec()
+            return
+        try:
+            offsets = formation_offsets(FORMATION_TYPE(self.cbbx_formation.currentIndex()), count,
+                                        self.sb_formation_spacing.value())
+            missions = formation_missions(path, offsets, durations)
+        except ValueError as e:
+            msgBox.setInformativeText("The formation can not be flown: {}".format(e))
+            msgBox.exec()
+            return
+        if first_address + count - 1 > self.backend.MAX_P2P_ADDRESS:
+            msgBox.setInformativeText("The drones need addresses up to 0x{:X}, 0xFF is the broadcast address...".format(
+                first_address + count - 1))
+            msgBox.exec()
+            return
+        try:
+            started = self.backend.upload_missions(dict(zip(range(first_address, first_address + count), missions)))
+        except (ValueError, MissionFileError) as e:
+            msgBox.setInformativeText("The formation can not be uploaded: {}".format(e))
+            msgBox.exec()
+            return
+        if not started:
+            msgBox.setInformativeText("A formation is already being uploaded..." if self.backend.is_connected else
+                                      "You need to be connected to upload the formation...")
+            msgBox.exec()
+            return
+        self.bt_upload_formation.setEnabled(False)
+        self._formation_upload = (count, len(missions[0]), first_address)
+    def on_formation_uploaded(self, elapsed, errors):
+        if self._formation_upload is None:
+            return
+        self.bt_upload_formation.setEnabled(True)
+        count, waypoints, first_address = self._formation_upload
+        self._formation_upload = None
+        text = "Uploaded {} missions of {} waypoints to 0x{:X}..0x{:X} in {:.3f} s".format(
+            count - len(errors), waypoints, first_address, first_address + count - 1, elapsed)
+        for address, error in sorted(errors.items()):
+            text += "\nFailed to upload to 0x{:X}: {}".format(address, error)
+        msgBox = QMessageBox()
+        msgBox.setInformativeText(text)
+        msgBox.exec()
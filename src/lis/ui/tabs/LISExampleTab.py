@@ -34,11 +34,11 @@ connects the connected/disconnected callbacks.
 
 import logging
 
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
 
 import lis
+from cfclient.utils.uicache import load_ui_type
 import cfclient
 from cfclient.ui.tab_toolbox import TabToolbox
 
@@ -47,12 +47,14 @@ __all__ = ['LISExampleTab']
 
 logger = logging.getLogger(__name__)
 
-example_tab_class = uic.loadUiType(lis.module_path + "/ui/tabs/lisexampleTab.ui")[0]
+example_tab_class = load_ui_type(lis.module_path + "/ui/tabs/lisexampleTab.ui")[0]
 
 
 class LISExampleTab(TabToolbox, example_tab_class):
     """Tab for plotting logging data"""
 
+    tab_toolbox_name = 'LIS Example'
+
     _connected_signal = pyqtSignal(str)
     _disconnected_signal = pyqtSignal(str)
     _log_data_signal = pyqtSignal(int, object, object)
@@ -60,7 +62,7 @@ class LISExampleTab(TabToolbox, example_tab_class):
     _param_updated_signal = pyqtSignal(str, str)
 
     def __init__(self, helper):
-        super(LISExampleTab, self).__init__(helper, 'LIS Example')
+        super(LISExampleTab, self).__init__(helper)
         self.setupUi(self)
 
         # Always wrap callbacks from Crazyflie API though QT Signal/Slots
@@ -40,13 +40,13 @@ import csv
 import sys
 import os
 
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtWidgets import QFileDialog
 
 import lis
 from cfclient.ui.tab_toolbox import TabToolbox
+from cfclient.utils.uicache import load_ui_type
 
 from cflib.crazyflie.log import LogConfig
 
@@ -57,12 +57,14 @@ __all__ = ['LISMainTab']
 
 logger = logging.getLogger(__name__)
 
-main_tab_class = uic.loadUiType(lis.module_path + "/ui/tabs/lisMainTab.ui")[0]
+main_tab_class = load_ui_type(lis.module_path + "/ui/tabs/lisMainTab.ui")[0]
 
 
 class LISMainTab(TabToolbox, main_tab_class):
     """Tab for plotting logging data"""
 
+    tab_toolbox_name = 'LIS Main'
+
     _connected_signal = pyqtSignal(str)
     _disconnected_signal = pyqtSignal(str)
     _log_data_signal = pyqtSignal(int, object, object)
@@ -70,11 +72,10 @@ class LISMainTab(TabToolbox, main_tab_class):
     _param_updated_signal = pyqtSignal(str, str)
 
     def __init__(self, helper):
-        super(LISMainTab, self).__init__(helper, 'LIS Main')
+        super(LISMainTab, self).__init__(helper)
         self.setupUi(self)
         self.backend = lis_backend
         self.setupSignals()
-        self.backend.attach_cf(self._helper.cf)
 
         # self.backend.add_callback_to_default_log('log_stateEstimateAttRate', lambda timestamp, data, logconf: self.callback_stateEstimateAttRate(timestamp, data, logconf, key='log_stateEstimateAttRate'))
         self.backend.add_callback_to_log('log_stateEstimateAtt', lambda timestamp, data, logconf: self.callback_stateEstimateAtt(timestamp, data, logconf, key='log_stateEstimateAtt'))
@@ -41,7 +41,6 @@ import sys
 import os
 import random
 
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
 import PyQt6.QtCore as QtCore
@@ -50,20 +49,20 @@ import PyQt6.Qt6 as Qt6
 import PyQt6.QtGui as QtGui
 import PyQt6.QtQuick as QtQuick
 from cfclient.ui.tab_toolbox import TabToolbox
+from cfclient.utils.uicache import load_ui_type
 
 from cflib.crazyflie.log import LogConfig
 import cflib.crazyflie as crazyflie
 
 import lis
 from lis.__init__ import lis_backend
-from .PyQtGraphCanvas import PlotTab, PlotCanvas
 
 __author__ = 'Stagiaires au Laboratoir d\'Ingénierie de Systèmes de l\'École Nationale Supérieure d\'Ingénieurs de Caen'
 __all__ = ['LISPlotTab']
 
 logger = logging.getLogger(__name__)
 
-plot_tab_class = uic.loadUiType(lis.module_path + "/ui/tabs/lisPlotTab.ui")[0]
+plot_tab_class = load_ui_type(lis.module_path + "/ui/tabs/lisPlotTab.ui")[0]
 
 
 class SimulationWorker(QtCore.QObject):
@@ -99,12 +98,14 @@ class SimulationWorker(QtCore.QObject):
 class LISPlotTab(TabToolbox, plot_tab_class):
     """Tab for plotting logging data"""
 
+    tab_toolbox_name = 'LIS Plot'
+
     _connected_signal = pyqtSignal(str)
     _disconnected_signal = pyqtSignal(str)
     _request_simulation_stop_signal = pyqtSignal()
 
     def __init__(self, helper):
-        super(LISPlotTab, self).__init__(helper, 'LIS Plot')
+        super(LISPlotTab, self).__init__(helper)
         self.setupUi(self)
         self.backend = lis_backend
         self.setupSignals()
@@ -113,6 +114,8 @@ class LISPlotTab(TabToolbox, plot_tab_class):
         self.default_canvases = self.get_default_canvases()
         self.default_plots = self.get_default_plots()
 
+        # pyqtgraph is slow to import, only load the canvas when the tab is created
+        from .PyQtGraphCanvas import PlotTab
         default_plots_tab = PlotTab(parent=self, fps_label=self.fpsLb)
         for config in self.default_canvases:
             canvas = default_plots_tab.add_new_canvas()
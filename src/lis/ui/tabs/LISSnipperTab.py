@@ -35,12 +35,12 @@ connects the connected/disconnected callbacks.
 import logging
 import numpy as np
 
-from PyQt6 import uic
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QFrame, QMessageBox, QHBoxLayout, QTextEdit
 from PyQt6.QtCore import QTimer
 
 import lis
+from cfclient.utils.uicache import load_ui_type
 import cflib
 import cflib.crazyflie
 from cfclient.ui.tab_toolbox import TabToolbox
@@ -52,7 +52,7 @@ __all__ = ['LISSnipperTab']
 
 logger = logging.getLogger(__name__)
 
-snipper_tab_class = uic.loadUiType(lis.module_path + "/ui/tabs/lisSnipperTab.ui")[0]
+snipper_tab_class = load_ui_type(lis.module_path + "/ui/tabs/lisSnipperTab.ui")[0]
 
 
 class AddressLogTab(QFrame):
@@ -68,6 +68,8 @@ class AddressLogTab(QFrame):
 class LISSnipperTab(TabToolbox, snipper_tab_class):
     """Tab for plotting logging data"""
 
+    tab_toolbox_name = 'LIS Snipper'
+
     _connected_signal = pyqtSignal(str)
     _disconnected_signal = pyqtSignal(str)
     _connection_failed_signal = pyqtSignal(str, str)
@@ -83,7 +85,7 @@ class LISSnipperTab(TabToolbox, snipper_tab_class):
     tabs = []
 
     def __init__(self, helper):
-        super(LISSnipperTab, self).__init__(helper, 'LIS Snipper')
+        super(LISSnipperTab, self).__init__(helper)
         self.setupUi(self)
         self.cf = helper.cf
         self.is_connected = False
@@ -0,0 +1,196 @@
+"""
+List model of the waypoints of a mission, for the waypoints list of the
+autopilot tab.
+
+The waypoints are kept in a single list, with a dict from their names to
+their rows so that looking up a name does not go through the whole
+mission. Names are unique. Waypoints are inserted, removed and moved in
+batches with a single notification of the view, so that generated missions
+of thousands of waypoints stay responsive.
+"""
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from lis.Waypoint import Waypoint
+
+
+class WaypointListModel(QAbstractListModel):
+    # The waypoint of a row, as data of the model
+    WaypointRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, parent=None):
+        super(WaypointListModel, self).__init__(parent)
+        self._waypoints = []
+        self._rows = dict()
+
+    @property
+    def waypoints(self):
+        """The waypoints of the mission, in order. Do not modify the list."""
+        return self._waypoints
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._waypoints)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._waypoints):
+            return None
+        waypoint = self._waypoints[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return waypoint.name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return waypoint.parameters.type.name
+        if role == self.WaypointRole:
+            return waypoint
+        return None
+
+    def waypoint(self, row):
+        return self._waypoints[row]
+
+    def row_of(self, name):
+        """Row of the waypoint named name, -1 if there is none"""
+        return self._rows.get(name, -1)
+
+    def contains(self, name, ignore=None):
+        """If a waypoint other than the one at row ignore is named name"""
+        row = self._rows.get(name)
+        return row is not None and row != ignore
+
+    def _reindex(self, first=0):
+        # The rows of the waypoints from first on have changed
+        rows = self._rows
+        for row in range(first, len(self._waypoints)):
+            rows[self._waypoints[row].name] = row
+
+    def _check_names(self, waypoints, ignore=None):
+        names = set()
+        for waypoint in waypoints:
+            if waypoint.name in names or self.contains(waypoint.name, ignore):
+                raise ValueError("Waypoint name {} already in use".format(waypoint.name))
+            names.add(waypoint.name)
+
+    def append(self, waypoint: Waypoint):
+        self.insert_waypoints(len(self._waypoints), [waypoint])
+
+    def insert_waypoints(self, row, waypoints: list):
+        """Insert waypoints before row, raises ValueError if a name is in use"""
+        if not waypoints:
+            return
+        self._check_names(waypoints)
+        row = max(0, min(row, len(self._waypoints)))
+        self.beginInsertRows(QModelIndex(), row, row + len(waypoints) - 1)
+        self._waypoints[row:row] = waypoints
+        self._reindex(row)
+        self.endInsertRows()
+
+    def replace_waypoint(self, row, waypoint: Waypoint):
+        """Replace the waypoint at row, raises ValueError if the name is in use"""
+        self._check_names([waypoint], ignore=row)
+        del self._rows[self._waypoints[row].name]
+        self._waypoints[row] = waypoint
+        self._rows[waypoint.name] = row
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index)
+
+    def set_waypoints(self, waypoints: list):
+        """Replace all the waypoints, raises ValueError if names repeat"""
+        names = set()
+        for waypoint in waypoints:
+            if waypoint.name in names:
+                raise ValueError("Waypoint name {} already in use".format(waypoint.name))
+            names.add(waypoint.name)
+        self.beginResetModel()
+        self._waypoints = list(waypoints)
+        self._rows = dict()
+        self._reindex()
+        self.endResetModel()
+
+    def clear(self):
+        self.set_waypoints([])
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or count < 1 or row < 0 or row + count > len(self._waypoints):
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        for waypoint in self._waypoints[row:row + count]:
+            del self._rows[waypoint.name]
+        del self._waypoints[row:row + count]
+        self._reindex(row)
+        self.endRemoveRows()
+        return True
+
+    def remove_waypoints(self, rows):
+        """
+        Remove the waypoints at rows. Contiguous rows are removed as a single
+        block, scattered ones with a single reset of the model.
+        """
+        rows = list(rows)
+        blocks = _blocks(rows)
+        if len(blocks) == 1:
+            self.removeRows(*blocks[0])
+        elif blocks:
+            removed = set(rows)
+            self.set_waypoints([waypoint for row, waypoint in enumerate(self._waypoints) if row not in removed])
+
+    def moveRows(self, source_parent, source_row, count, destination_parent, destination_child):
+        # destination_child is the row before which the rows go, as counted
+        # before moving them
+        if source_parent.isValid() or destination_parent.isValid() or count < 1:
+            return False
+        if source_row < 0 or source_row + count > len(self._waypoints) or \
+                not 0 <= destination_child <= len(self._waypoints):
+            return False
+        if source_row <= destination_child <= source_row + count:
+            return destination_child in (source_row, source_row + count)
+        if not self.beginMoveRows(QModelIndex(), source_row, source_row + count - 1,
+                                  QModelIndex(), destination_child):
+            return False
+        moved = self._waypoints[source_row:source_row + count]
+        del self._waypoints[source_row:source_row + count]
+        row = destination_child - count if destination_child > source_row else destination_child
+        self._waypoints[row:row] = moved
+        self._reindex(min(source_row, row))
+        self.endMoveRows()
+        return True
+
+    def move_waypoints(self, rows, destination):
+        """
+        Move the waypoints at rows before the waypoint at row destination,
+        keeping their order. Returns the rows where they end.
+        """
+        moved = set(rows)
+        rows = sorted(moved)
+        order = [row for row in range(len(self._waypoints)) if row not in moved]
+        before = sum(1 for row in order if row < destination)
+        order[before:before] = rows
+        self.reorder(order)
+        return list(range(before, before + len(rows)))
+
+    def reorder(self, order):
+        """
+        Put the waypoints in a new order, order[i] being the current row of
+        the waypoint to put at row i. Selections follow their waypoints.
+        """
+        if sorted(order) != list(range(len(self._waypoints))):
+            raise ValueError("Not an order of the waypoints")
+        self.layoutAboutToBeChanged.emit()
+        new_rows = [0]*len(order)
+        for new_row, old_row in enumerate(order):
+            new_rows[old_row] = new_row
+        self._waypoints = [self._waypoints[row] for row in order]
+        self._reindex()
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(persistent, [self.index(new_rows[index.row()], 0) for index in persistent])
+        self.layoutChanged.emit()
+
+
+def _blocks(rows):
+    # Sorted (first row, count) of the blocks of contiguous rows
+    blocks = []
+    for row in sorted(set(rows)):
+        if blocks and blocks[-1][0] + blocks[-1][1] == row:
+            blocks[-1][1] += 1
+        else:
+            blocks.append([row, 1])
+    return [tuple(block) for block in blocks]